@@ -1,11 +1,13 @@
 import sys
 import os
-from scrapy.crawler import CrawlerProcess
-from scrapy.utils.project import get_project_settings
-from warframe_wiki.spiders.warframe_spider import WarframeSpider
-from warframe_wiki.spiders.weapon_spider import WeaponSpider
-from warframe_wiki.spiders.mod_spider import ModSpider
-from warframe_wiki.web_interface import app
+import argparse
+from warframe_wiki.database import init_db
+from warframe_wiki.versions import check_table_stats
+from warframe_wiki.exporters import export_all, export_json_document, EXPORT_FORMATS, EXPORT_MODELS
+from warframe_wiki.scheduler import CrawlScheduler, CrawlWorker
+from warframe_wiki.jobs import SPIDER_CLASSES, enqueue_job, run_next_job
+import signal
+import threading
 import logging
 
 # 设置日志级别
@@ -18,18 +20,140 @@ logging.basicConfig(
     ]
 )
 
-def run_spiders():
-    process = CrawlerProcess(get_project_settings())
-    process.crawl(WarframeSpider)
-    process.crawl(WeaponSpider)
-    process.crawl(ModSpider)
-    process.start()
+# Scrapy只在需要爬取或读取爬虫设置时导入，启动Web界面和导出数据不加载爬虫
+def project_settings():
+    from scrapy.utils.project import get_project_settings
+    return get_project_settings()
 
-def run_web():
-    app.run(host='127.0.0.1', port=8080, debug=True)
+def snapshot_store(settings):
+    from warframe_wiki.snapshots import SnapshotStore
+    return SnapshotStore(settings.get('SNAPSHOT_DIR'))
+
+def run_spiders(replay=None, data_types=None):
+    """提交爬取任务并在当前进程中运行；指定replay时从快照离线重建数据库"""
+    settings = project_settings()
+    overrides = {}
+    if replay:
+        store = snapshot_store(settings)
+        snapshot_id = store.resolve(replay)
+        # 重放不访问网络，不需要下载延迟和限速
+        overrides = {
+            'SNAPSHOT_REPLAY': snapshot_id,
+            'DOWNLOAD_DELAY': 0,
+            'AUTOTHROTTLE_ENABLED': False,
+            'HTTP_CONDITIONAL_CACHE_ENABLED': False,
+            'CONCURRENT_REQUESTS': 16
+        }
+        logging.info(f'从快照 {snapshot_id} 重放爬取')
+    db = init_db()
+    try:
+        job_id = enqueue_job(db, list(data_types or SPIDER_CLASSES), source='cli')
+    finally:
+        db.close()
+    if job_id is None:
+        logging.error('已有爬取任务在排队或运行中，请等待其结束或先取消')
+        return
+    run_next_job(overrides)
+
+def run_scheduler():
+    """常驻运行定时爬取，收到SIGINT/SIGTERM后在当前任务结束时退出"""
+    settings = project_settings()
+    worker = CrawlWorker(
+        max_jobs=settings.getint('CRAWL_WORKER_MAX_JOBS', 50),
+        timeout=settings.getint('CRAWL_JOB_TIMEOUT', 3600)
+    )
+    scheduler = CrawlScheduler(
+        worker,
+        settings.getdict('CRAWL_SCHEDULE'),
+        jitter=settings.getfloat('CRAWL_SCHEDULE_JITTER', 0.1)
+    )
+    stop_event = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *args: stop_event.set())
+    logging.info('定时爬取服务已启动')
+    scheduler.run_forever(stop_event)
+    logging.info('定时爬取服务已停止')
+
+def list_snapshots():
+    store = snapshot_store(project_settings())
+    for snapshot_id in store.list_snapshots():
+        manifest = store.load_manifest(snapshot_id)
+        size = sum(entry['size'] for entry in manifest['entries'].values())
+        print(f"{snapshot_id}  {len(manifest['entries'])} 个响应  {size / 1024 / 1024:.1f} MB")
+
+def run_web(debug=False):
+    """启动完整的Web界面（包括编辑和爬虫控制），只读部署请使用 serve.py"""
+    from warframe_wiki.web_interface import app
+    app.run(host='127.0.0.1', port=8080, debug=debug, use_reloader=False, threaded=True)
+
+def run_export(fmt, output, compress=False, data_types=None, single_file=False):
+    """流式导出数据库中的数据"""
+    if single_file:
+        path = output if output.endswith(('.json', '.json.gz')) else os.path.join(output, 'warframe_wiki.json' + ('.gz' if compress else ''))
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        counts = export_json_document(path, compress=compress)
+    else:
+        counts = export_all(output, fmt=fmt, compress=compress, data_types=data_types)
+    for data_type, count in counts.items():
+        logging.info(f'已导出 {data_type}: {count} 条')
+
+def run_check_stats(repair=False):
+    """检查统计信息与基础表是否一致，可选重建"""
+    db = init_db()
+    try:
+        mismatches = check_table_stats(db, repair=repair)
+    finally:
+        db.close()
+    if not mismatches:
+        logging.info('统计信息与基础表一致')
+    for table_name, detail in mismatches.items():
+        logging.warning(f"{table_name} 统计信息不一致 - 记录: {detail['recorded']}, 实际: {detail['actual']}")
+    return mismatches
+
+def run_check_query_plans():
+    """检查数值列的过滤和排序查询是否使用索引，存在全表扫描时返回False"""
+    from warframe_wiki.query_plans import check_query_plans
+    db = init_db()
+    try:
+        failures = check_query_plans(db)
+    finally:
+        db.close()
+    if not failures:
+        logging.info('所有过滤和排序查询均使用索引')
+    for table_name, label, plan, problems in failures:
+        logging.error(f"{table_name} {label} 存在全表扫描: {'; '.join(problems)}（计划: {' | '.join(plan)}）")
+    return not failures
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Warframe Wiki 爬虫与数据导出')
+    parser.add_argument('--web', action='store_true', help='启动Web界面')
+    parser.add_argument('--debug', action='store_true', help='与--web一起使用，开启Flask调试模式')
+    parser.add_argument('--export', choices=EXPORT_FORMATS, help='导出数据的格式')
+    parser.add_argument('--output', default='export', help='导出目录（或--single-file时的文件路径）')
+    parser.add_argument('--gzip', action='store_true', help='使用gzip压缩导出文件')
+    parser.add_argument('--type', dest='data_types', action='append', choices=list(EXPORT_MODELS), help='只导出（或重放）指定类型，可重复')
+    parser.add_argument('--single-file', action='store_true', help='JSON格式时导出为单个文档')
+    parser.add_argument('--check-stats', action='store_true', help='检查统计信息是否与基础表一致')
+    parser.add_argument('--repair', action='store_true', help='与--check-stats一起使用，重建不一致的统计信息')
+    parser.add_argument('--check-query-plans', action='store_true', help='检查数值列的过滤和排序查询是否使用索引')
+    parser.add_argument('--replay', metavar='SNAPSHOT', help='从指定快照（或latest）离线重建数据库，不访问网络')
+    parser.add_argument('--list-snapshots', action='store_true', help='列出已保存的快照')
+    parser.add_argument('--scheduler', action='store_true', help='常驻运行，按CRAWL_SCHEDULE定时爬取')
+    return parser.parse_args(argv)
 
 if __name__ == '__main__':
-    if len(sys.argv) > 1 and sys.argv[1] == '--web':
-        run_web()
+    args = parse_args()
+    if args.web:
+        run_web(args.debug)
+    elif args.check_stats:
+        run_check_stats(args.repair)
+    elif args.check_query_plans:
+        sys.exit(0 if run_check_query_plans() else 1)
+    elif args.export:
+        run_export(args.export, args.output, args.gzip, args.data_types, args.single_file and args.export == 'json')
+    elif args.list_snapshots:
+        list_snapshots()
+    elif args.scheduler:
+        run_scheduler()
     else:
-        run_spiders() 
\ No newline at end of file
+        run_spiders(args.replay, args.data_types if args.replay else None) 
\ No newline at end of file
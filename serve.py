@@ -0,0 +1,109 @@
+"""只读API服务入口
+
+只提供数据查询、导出、统计和指标接口，不加载Scrapy和爬虫代码，编辑数据和启动爬虫的请求返回405。
+
+    python serve.py --host 0.0.0.0 --port 8080
+    gunicorn -w 4 'serve:create_app()'
+    python serve.py --async --port 8080      # asyncio服务，适合大量并发的keep-alive连接
+    python serve.py --replica                # 将数据加载到内存副本，列表/搜索接口不查询SQLite
+    python serve.py --check-budget
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+
+# 启动预算：导入并创建应用的耗时（毫秒）和常驻内存（MB）
+IMPORT_BUDGET_MS = 1000
+RSS_BUDGET_MB = 64
+# 只读服务的导入图中不允许出现的模块
+FORBIDDEN_MODULES = ('scrapy', 'twisted', 'pandas', 'numpy', 'lxml', 'parsel')
+
+def start_replica():
+    """加载进程内只读副本并启动后台刷新线程"""
+    from warframe_wiki.replica import replica
+    replica.start()
+
+def create_app():
+    from warframe_wiki.web_interface import app
+    from warframe_wiki.settings import READ_REPLICA_ENABLED
+    app.config['READ_ONLY'] = True
+    if READ_REPLICA_ENABLED:
+        start_replica()
+    return app
+
+_MEASURE = '''
+import json, os, sys, time
+sys.path.insert(0, {root!r})
+started = time.perf_counter()
+import serve
+serve.create_app()
+elapsed = time.perf_counter() - started
+with open('/proc/self/status') as f:
+    rss = int(f.read().split('VmRSS:')[1].split()[0]) / 1024
+loaded = sorted({{name.split('.')[0] for name in sys.modules}} & set(serve.FORBIDDEN_MODULES))
+print(json.dumps({{'ms': elapsed * 1000, 'rss_mb': rss, 'forbidden': loaded}}))
+'''
+
+def measure_startup(runs=5):
+    """在新的解释器中导入并创建应用，返回耗时和内存的中位数以及加载的禁止模块"""
+    root = os.path.dirname(os.path.abspath(__file__))
+    results = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', _MEASURE.format(root=root)],
+            capture_output=True, text=True, check=True, cwd=root
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        'ms': statistics.median(result['ms'] for result in results),
+        'rss_mb': statistics.median(result['rss_mb'] for result in results),
+        'forbidden': sorted({name for result in results for name in result['forbidden']}),
+    }
+
+def check_budget():
+    """检查启动耗时、内存和导入图是否在预算内，超出时返回False"""
+    result = measure_startup()
+    logging.info(
+        f"启动耗时 {result['ms']:.0f} ms（预算 {IMPORT_BUDGET_MS} ms），"
+        f"常驻内存 {result['rss_mb']:.1f} MB（预算 {RSS_BUDGET_MB} MB）"
+    )
+    ok = True
+    if result['forbidden']:
+        logging.error(f"只读服务加载了爬虫相关模块: {', '.join(result['forbidden'])}")
+        ok = False
+    if result['ms'] > IMPORT_BUDGET_MS:
+        logging.error('启动耗时超出预算')
+        ok = False
+    if result['rss_mb'] > RSS_BUDGET_MB:
+        logging.error('常驻内存超出预算')
+        ok = False
+    return ok
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Warframe Wiki 只读API服务')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    parser.add_argument('--port', type=int, default=8080, help='监听端口')
+    parser.add_argument('--async', dest='use_async', action='store_true', help='使用基于aiohttp的异步服务（只提供统计和列表/搜索接口）')
+    parser.add_argument('--threads', type=int, help='与--async一起使用，数据库读取线程数（默认为只读连接池大小）')
+    parser.add_argument('--replica', action='store_true', help='启用进程内只读副本（也可设置环境变量 WARFRAME_READ_REPLICA=1）')
+    parser.add_argument('--check-budget', action='store_true', help='检查启动耗时、内存和导入图是否在预算内')
+    return parser.parse_args(argv)
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+    args = parse_args()
+    if args.check_budget:
+        sys.exit(0 if check_budget() else 1)
+    if args.replica:
+        start_replica()
+    if args.use_async:
+        from warframe_wiki.async_server import run_async_server
+        from warframe_wiki.settings import SQLITE_READ_POOL_SIZE
+        run_async_server(args.host, args.port, args.threads or SQLITE_READ_POOL_SIZE)
+    else:
+        from werkzeug.serving import run_simple
+        run_simple(args.host, args.port, create_app(), threaded=True)
@@ -0,0 +1,100 @@
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 数据库路径在导入 warframe_wiki.settings 时读取，必须在导入项目代码之前指定临时数据库
+TEST_DIR = tempfile.mkdtemp(prefix='warframe-tests-')
+os.environ['WARFRAME_DATABASE_PATH'] = os.path.join(TEST_DIR, 'warframe_data.db')
+
+from sqlalchemy import insert
+from warframe_wiki.database import Warframe, Weapon, Mod, init_db, init_read_db
+from warframe_wiki.translations import replace_translations
+
+# 名称和描述中的词：中英文、大小写、重音字符以及LIKE的特殊字符
+WORDS = [
+    'Serration', 'Split', 'Chamber', 'Vitality', 'Redirection', 'Flow', 'Hornet', 'Strike',
+    'Point', 'Blank', 'Primed', 'Galvanized', 'Blood', 'Rush', 'Condition', 'Overload',
+    '暴击', '伤害', '多重', '射击', '弹匣', '护盾', '生命', 'CRIT', 'crit', 'Ärger', 'Straße',
+    'ÉCLAIR', 'aaa', 'aaaa', 'ab_c', '50%', 'x',
+]
+
+def _phrase(rng, count):
+    return ' '.join(rng.choice(WORDS) for _ in range(count))
+
+def _common(rng, table_name, index, now):
+    return {
+        'id': f'/Lotus/{table_name}/{index:04d}',
+        'name_en': _phrase(rng, rng.randint(1, 3)),
+        'name_zh': _phrase(rng, rng.randint(1, 2)),
+        'name_alias': rng.choice([None, '', _phrase(rng, 1)]),
+        'description_en': rng.choice([None, _phrase(rng, rng.randint(3, 12))]),
+        'description_zh': _phrase(rng, rng.randint(0, 5)),
+        'last_updated': now - timedelta(minutes=index),
+    }
+
+def _maybe(rng, values):
+    """数值列的取值：包含重复值和NULL"""
+    return rng.choice(values + [None])
+
+def populate(db, seed=7):
+    """写入确定性的测试数据，返回 {表名: 记录数}"""
+    rng = random.Random(seed)
+    now = datetime(2024, 1, 1, 12, 0, 0)
+    rows = {
+        'warframes': [
+            dict(_common(rng, 'warframes', i, now),
+                 health=_maybe(rng, [100.0, 300.5, 740.0]), shield=_maybe(rng, [100.0, 200.0]),
+                 armor=_maybe(rng, [65.0, 225.0, 350.0]), energy=_maybe(rng, [100.0, 150.0]),
+                 sprint_speed=_maybe(rng, [0.95, 1.0, 1.2]), mastery_rank=rng.randint(0, 5),
+                 polarities=['V', 'D'], abilities_en=[{'name': _phrase(rng, 1)}])
+            for i in range(60)
+        ],
+        'weapons': [
+            dict(_common(rng, 'weapons', i, now),
+                 type=rng.choice(['Rifle', 'Pistol', 'Melee']), mastery_rank=_maybe(rng, list(range(17))),
+                 critical_chance=_maybe(rng, [0.05, 0.1, 0.2, 0.25, 0.3, 0.5]),
+                 critical_multiplier=_maybe(rng, [1.5, 2.0, 3.0]),
+                 status_chance=_maybe(rng, [round(rng.random(), 3) for _ in range(20)]),
+                 fire_rate=_maybe(rng, [1.0, 5.0, 10.0, 12.5]), accuracy=_maybe(rng, [25.0, 100.0]),
+                 magazine_size=_maybe(rng, [1, 30, 60]), reload_time=_maybe(rng, [1.0, 2.5]),
+                 disposition=_maybe(rng, [1, 3, 5]), damage={'impact': rng.randint(1, 50)})
+            for i in range(400)
+        ],
+        'mods': [
+            dict(_common(rng, 'mods', i, now),
+                 polarity=rng.choice(['madurai', 'naramon', 'vazarin']), rarity=rng.choice(['Common', 'Rare']),
+                 drain=_maybe(rng, list(range(2, 16))), max_rank=_maybe(rng, [3, 5, 10]),
+                 effect_en=_phrase(rng, 2), effect_zh=_phrase(rng, 1), tradable=rng.random() < 0.5)
+            for i in range(300)
+        ],
+    }
+    for model in (Warframe, Weapon, Mod):
+        table_rows = rows[model.__tablename__]
+        db.execute(insert(model), table_rows)
+        replace_translations(db, model.__tablename__, [
+            (row['id'], {'ja': {'name': _phrase(rng, 2)}}) for row in table_rows if rng.random() < 0.5
+        ])
+    db.commit()
+    return {table_name: len(table_rows) for table_name, table_rows in rows.items()}
+
+@pytest.fixture(scope='session')
+def sample_data():
+    db = init_db()
+    try:
+        return populate(db)
+    finally:
+        db.close()
+
+@pytest.fixture
+def read_db(sample_data):
+    db = init_read_db()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,29 @@
+import json
+import subprocess
+import sys
+from warframe_wiki.exporters import EXPORT_MODELS, export_columns, export_table
+from warframe_wiki.serializers import HIDDEN_FIELDS
+
+def test_export_columns_exclude_hidden_fields():
+    for model in EXPORT_MODELS.values():
+        columns = export_columns(model)
+        assert 'id' in columns
+        assert not set(columns) & set(HIDDEN_FIELDS)
+
+def test_cli_export_omits_hidden_fields(tmp_path, sample_data):
+    path = tmp_path / 'weapons.ndjson'
+    count = export_table('weapons', str(path), fmt='ndjson')
+    rows = [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+    assert count == len(rows) == sample_data['weapons']
+    assert all(set(row) == set(export_columns(EXPORT_MODELS['weapons'])) for row in rows)
+
+def test_http_export_omits_hidden_fields(sample_data):
+    from warframe_wiki.web_interface import app
+    response = app.test_client().get('/api/export/mods?format=csv')
+    header = response.get_data(as_text=True).splitlines()[0].split(',')
+    assert header == export_columns(EXPORT_MODELS['mods'])
+
+def test_export_and_pipeline_do_not_import_flask():
+    code = 'import sys, warframe_wiki.exporters, warframe_wiki.pipelines; print("flask" in sys.modules)'
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == 'False'
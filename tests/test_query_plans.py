@@ -0,0 +1,24 @@
+from warframe_wiki.database import Weapon
+from warframe_wiki.pagination import page_statement
+from warframe_wiki.query_plans import PLAN_COLUMNS, check_query_plans, explain, plan_problems
+from warframe_wiki.read_api import build_list_query
+
+def test_numeric_filters_and_sorts_use_indexes(read_db):
+    assert check_query_plans(read_db) == []
+
+def test_full_scan_is_reported():
+    filters = [('critical_chance', 'gte', 1)]
+    assert plan_problems('weapons', ['SCAN weapons USING INDEX sqlite_autoindex_weapons_1'], filters, [])
+    assert plan_problems('weapons', ['SCAN weapons'], [], [('critical_chance', False)])
+    assert not plan_problems(
+        'weapons', ['SEARCH weapons USING INDEX ix_weapons_critical_chance (critical_chance>?)'], filters, []
+    )
+    assert not plan_problems('weapons', ['SCAN weapons USING INDEX ix_weapons_fire_rate'], [], [('fire_rate', True)])
+
+def test_filter_on_one_column_sort_on_another(read_db):
+    filters, sort = [('critical_chance', 'gte', 0.3)], [('status_chance', False)]
+    query, sort_keys, descending = build_list_query(Weapon, PLAN_COLUMNS, '', filters, sort)
+    statement, _ = page_statement(query, sort_keys, 1, 10, None, descending)
+    plan = explain(read_db, statement)
+    assert plan_problems('weapons', plan, filters, sort) == []
+    assert plan_problems('weapons', ['SCAN weapons USING INDEX ix_weapons_status_chance'], filters, sort)
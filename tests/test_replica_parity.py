@@ -0,0 +1,121 @@
+"""只读副本与SQLite查询的一致性：同样的参数返回完全相同的响应内容"""
+import pytest
+from warframe_wiki.pagination import encode_cursor
+from warframe_wiki.read_api import READ_MODELS, list_payload, stats_payload
+from warframe_wiki.replica import replica
+
+# 全文检索（三个字符以上）、LIKE匹配（较短的词和特殊字符）、大小写和中文
+SEARCHES = ['', 'crit', 'CRIT', 'serration', 'blood rush', '暴击伤害', '伤害', 'straße', 'éclair',
+            'ab', 'x', '50%', 'ab_c', 'aaa', 'nothing-matches']
+PAGES = [{}, {'page': '3', 'per_page': '7'}, {'per_page': '25'}, {'page': '99'}]
+FIELDS = [{}, {'fields': 'id,name_en,name_ja'}, {'lang': 'ja'}]
+FILTERS = {
+    'warframes': [('mastery_rank:lte:3', 'armor'), ('health:in:100|300.5', '-shield,health')],
+    'weapons': [('critical_chance:gte:0.25', '-status_chance'), ('', '-mastery_rank,critical_chance'),
+                ('fire_rate:eq:10', '')],
+    'mods': [('drain:gte:4', '-max_rank'), ('max_rank:in:3|5', '')],
+}
+# 每个方向最多跟随的游标页数
+MAX_CURSOR_PAGES = 30
+
+@pytest.fixture(scope='module')
+def loaded_replica(sample_data):
+    replica.refresh()
+    yield replica
+    replica.state = None
+
+def payloads(db, model, args):
+    """分别查询SQLite和只读副本，返回两者的结果（异常按类型和消息比较）"""
+    results = []
+    saved = replica.state
+    for state in (None, saved):
+        replica.state = state
+        try:
+            results.append(list_payload(db, model, args))
+        except Exception as e:
+            results.append((type(e).__name__, str(e)))
+        finally:
+            replica.state = saved
+    return results
+
+def assert_same_pages(db, model, args):
+    """首页以及沿游标向后、向前翻页的结果一致"""
+    sqlite_payload, replica_payload = payloads(db, model, args)
+    assert sqlite_payload == replica_payload, args
+    if not isinstance(sqlite_payload, dict):
+        return
+    for direction in ('next_cursor', 'prev_cursor'):
+        cursor = sqlite_payload.get(direction)
+        for _ in range(MAX_CURSOR_PAGES):
+            if not cursor:
+                break
+            page_args = dict(args, cursor=cursor)
+            sqlite_page, replica_page = payloads(db, model, page_args)
+            assert sqlite_page == replica_page, page_args
+            cursor = sqlite_page.get(direction)
+
+@pytest.mark.parametrize('data_type', list(READ_MODELS))
+@pytest.mark.parametrize('search', SEARCHES)
+def test_list_and_search(read_db, loaded_replica, data_type, search):
+    model = READ_MODELS[data_type][0]
+    for page in PAGES:
+        for fields in FIELDS:
+            args = dict(page, **fields)
+            if search:
+                args['search'] = search
+            assert_same_pages(read_db, model, args)
+
+@pytest.mark.parametrize('data_type', list(READ_MODELS))
+def test_filters_and_sorting(read_db, loaded_replica, data_type):
+    model = READ_MODELS[data_type][0]
+    for expression, sort in FILTERS[data_type]:
+        for search in ('', 'crit', 'ab'):
+            args = {'filter': expression, 'sort': sort, 'per_page': '9'}
+            if search:
+                args['search'] = search
+            assert_same_pages(read_db, model, args)
+
+# 无效的过滤条件：非数值列、非数值、超出64位整数范围
+BAD_FILTERS = ['name_en:eq:1', 'critical_chance:gte:abc', f'mastery_rank:gt:{2 ** 63}', f'mastery_rank:in:1|{-2 ** 63 - 1}']
+# 伪造的游标：排序键的类型、取值范围或个数不对
+BAD_CURSORS = [[[1], '/x'], [{'a': 1}, '/x'], [True, '/x'], [2 ** 64, '/x'], [float('nan'), '/x'], [0.5], [0.5, 1, '/x']]
+
+def test_invalid_arguments(read_db, loaded_replica):
+    model = READ_MODELS['weapons'][0]
+    cursors = [{'sort': 'critical_chance', 'cursor': encode_cursor(values, 'next')} for values in BAD_CURSORS]
+    filters = [{'filter': expression} for expression in BAD_FILTERS]
+    for args in [*filters, {'sort': 'name_en'}, {'cursor': 'not-a-cursor'}, *cursors]:
+        sqlite_payload, replica_payload = payloads(read_db, model, args)
+        assert sqlite_payload == replica_payload, args
+    for args in filters:
+        assert payloads(read_db, model, args)[0][0] == 'FilterError', args
+    for args in cursors:
+        assert payloads(read_db, model, args)[0][0] == 'CursorError', args
+
+def test_cursor_walk_returns_every_row_once(read_db, loaded_replica):
+    model = READ_MODELS['weapons'][0]
+    args = {'filter': 'critical_chance:gte:0.2', 'sort': '-status_chance,mastery_rank', 'per_page': '50', 'fields': 'id'}
+    walks = []
+    for state in (None, loaded_replica.state):
+        saved, replica.state = replica.state, state
+        try:
+            payload = list_payload(read_db, model, args)
+            ids = [row['id'] for row in payload['data']]
+            while payload['next_cursor']:
+                payload = list_payload(read_db, model, dict(args, cursor=payload['next_cursor']))
+                ids.extend(row['id'] for row in payload['data'])
+        finally:
+            replica.state = saved
+        assert len(ids) == len(set(ids)) == payload['total']
+        walks.append(ids)
+    assert walks[0] == walks[1]
+
+def test_stats(read_db, loaded_replica, sample_data):
+    saved = replica.state
+    replica.state = None
+    try:
+        sqlite_stats = stats_payload(read_db)
+    finally:
+        replica.state = saved
+    assert stats_payload(read_db) == sqlite_stats
+    assert {data_type: stats['count'] for data_type, stats in sqlite_stats['data'].items()} == sample_data
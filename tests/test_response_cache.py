@@ -0,0 +1,16 @@
+from warframe_wiki.response_cache import ResponseCache, response_cache
+
+def test_key_keeps_raw_values_and_first_duplicate():
+    assert ResponseCache.make_key('/api/weapons', [('lang', ' zh')]) != ResponseCache.make_key('/api/weapons', [('lang', 'zh')])
+    assert ResponseCache.make_key('/x', [('b', '1'), ('a', '2')]) == ResponseCache.make_key('/x', [('a', '2'), ('b', '1')])
+    assert ResponseCache.make_key('/x', [('a', '1'), ('a', '2')]) != ResponseCache.make_key('/x', [('a', '2'), ('a', '1')])
+
+def test_cached_response_matches_uncached(sample_data):
+    from warframe_wiki.web_interface import app
+    client = app.test_client()
+    response_cache.clear()
+    cold = client.get('/api/weapons?lang=%20zh')
+    response_cache.clear()
+    assert client.get('/api/weapons?lang=zh').status_code == 200
+    warm = client.get('/api/weapons?lang=%20zh')
+    assert (warm.status_code, warm.get_json()) == (cold.status_code, cold.get_json())
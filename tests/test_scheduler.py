@@ -0,0 +1,12 @@
+from warframe_wiki.scheduler import CrawlWorker
+
+def test_job_that_cannot_start_fails_immediately():
+    worker = CrawlWorker(timeout=60)
+    try:
+        result = worker.run(['unknown'])
+    finally:
+        worker.stop()
+    assert result['status'] == 'failed'
+    assert 'unknown' in result['error']
+    assert result['items'] == {'unknown': 0}
+    assert result['duration'] < 60
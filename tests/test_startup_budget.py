@@ -0,0 +1,7 @@
+import serve
+
+def test_read_only_server_startup_within_budget():
+    result = serve.measure_startup(runs=3)
+    assert result['forbidden'] == []
+    assert result['ms'] <= serve.IMPORT_BUDGET_MS
+    assert result['rss_mb'] <= serve.RSS_BUDGET_MB
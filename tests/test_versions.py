@@ -0,0 +1,43 @@
+from datetime import datetime
+from sqlalchemy import create_engine, insert, delete, text
+from sqlalchemy.orm import Session
+from warframe_wiki.database import Base, Warframe
+from warframe_wiki.versions import check_table_stats, ensure_version_tracking, get_table_stats
+
+def make_engine():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    ensure_version_tracking(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Warframe), [
+            {'id': f'/w{day}', 'name_en': f'W{day}', 'last_updated': datetime(2024, 1, day)} for day in (1, 2, 3)
+        ])
+    return engine
+
+def test_delete_recomputes_last_updated():
+    engine = make_engine()
+    with engine.begin() as conn:
+        conn.execute(delete(Warframe).where(Warframe.id == '/w3'))
+        conn.execute(delete(Warframe).where(Warframe.id == '/w1'))
+    with Session(engine) as db:
+        assert get_table_stats(db)['warframes'] == {'count': 1, 'last_updated': datetime(2024, 1, 2)}
+        assert check_table_stats(db) == {}
+
+def test_outdated_trigger_is_replaced():
+    engine = make_engine()
+    with engine.begin() as conn:
+        # 旧版本的DELETE触发器不维护last_updated
+        conn.execute(text("DROP TRIGGER warframes_stats_delete"))
+        conn.execute(text(
+            "CREATE TRIGGER warframes_stats_delete AFTER DELETE ON warframes BEGIN "
+            "UPDATE data_versions SET version = version + 1, row_count = row_count - 1 "
+            "WHERE table_name = 'warframes'; END"
+        ))
+        conn.execute(delete(Warframe).where(Warframe.id == '/w3'))
+    ensure_version_tracking(engine)
+    with Session(engine) as db:
+        assert check_table_stats(db) == {}
+    with engine.begin() as conn:
+        conn.execute(delete(Warframe).where(Warframe.id == '/w2'))
+    with Session(engine) as db:
+        assert get_table_stats(db)['warframes'] == {'count': 1, 'last_updated': datetime(2024, 1, 1)}
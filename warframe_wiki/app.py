@@ -1,5 +1,6 @@
 from flask import Flask, request, jsonify
 import sqlite3
+from .engine import get_engine
 import json
 import logging
 from logging.handlers import RotatingFileHandler
@@ -22,9 +23,8 @@ handler.setFormatter(logging.Formatter(
 app.logger.addHandler(handler)
 
 def get_db_connection():
-    conn = sqlite3.connect('warframe_wiki/warframe.db')
-    conn.row_factory = sqlite3.Row
-    return conn
+    # 从共享连接池获取原始DBAPI连接，close()时归还连接池
+    return get_engine().raw_connection()
 
 @app.route('/api/<string:data_type>/<path:item_id>', methods=['PUT'])
 def update_item(data_type, item_id):
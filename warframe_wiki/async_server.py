@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from aiohttp import web
+from .database import init_read_db
+from .read_api import READ_MODELS, stats_payload, list_payload, suggest_payload
+from .response_cache import response_cache, etag_matches
+from .events import broadcaster
+from .serializers import dumps
+from .metrics import registry, read_families, HTTP_REQUEST_SECONDS
+from .settings import SQLITE_READ_POOL_SIZE, METRICS_FILE
+
+logger = logging.getLogger(__name__)
+
+# 与Flask的no_cache_response一致
+NO_STORE_HEADERS = {
+    'Cache-Control': 'no-store, no-cache, must-revalidate, max-age=0',
+    'Pragma': 'no-cache',
+    'Expires': '0'
+}
+
+def render_cached(key, tables, build, label):
+    """在线程池中执行：读取缓存或查询数据库，返回缓存条目或错误响应体
+
+    与Flask的 response_cache.cached 使用相同的缓存和ETag规则，只缓存成功的响应。
+    """
+    versions = response_cache.current_versions(tables)
+    entry = response_cache.get(key, versions)
+    if entry is not None:
+        return entry, None
+    db = init_read_db()
+    try:
+        payload = build(db)
+    except Exception as e:
+        logger.error(f"获取{label}数据失败: {str(e)}")
+        return None, dumps({'success': False, 'error': str(e)})
+    finally:
+        db.close()
+    return response_cache.store(key, versions, dumps(payload), 'application/json'), None
+
+class AsyncReadAPI:
+    """基于asyncio的只读API，与Flask服务的 /api/stats 和 /api/<type> 接口一致，并提供爬取任务的事件流
+
+    事件循环只负责连接和协议处理，数据库读取在有界线程池中执行，线程数不超过只读连接池大小，
+    大量空闲的keep-alive连接不占用线程。
+    """
+
+    def __init__(self, max_workers=SQLITE_READ_POOL_SIZE):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='read-api')
+
+    async def respond(self, request, tables, build, label):
+        started = time.perf_counter()
+        key = response_cache.make_key(request.path, request.query.items())
+        loop = asyncio.get_running_loop()
+        entry, error_body = await loop.run_in_executor(
+            self.executor, render_cached, key, tables, build, label
+        )
+        if entry is None:
+            response = web.Response(body=error_body, content_type='application/json', headers=NO_STORE_HEADERS)
+        elif etag_matches(request.headers.get('If-None-Match'), entry['etag']):
+            response = web.Response(status=304, headers={'ETag': f'"{entry["etag"]}"', 'Cache-Control': 'no-cache'})
+        else:
+            response = web.Response(
+                body=entry['body'], content_type=entry['mimetype'],
+                headers={'ETag': f'"{entry["etag"]}"', 'Cache-Control': 'no-cache'}
+            )
+        route = request.match_info.route.resource.canonical if request.match_info.route.resource else 'unmatched'
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, request.method, route, response.status)
+        return response
+
+    async def stats(self, request):
+        return await self.respond(request, tuple(READ_MODELS), stats_payload, '统计')
+
+    async def list_items(self, request):
+        model, label = READ_MODELS[request.match_info['data_type']]
+        query = request.query
+
+        def build(db):
+            return list_payload(db, model, query)
+        return await self.respond(request, (model.__tablename__,), build, label)
+
+    async def suggest(self, request):
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        try:
+            # 索引在内存中，但数据版本变化后的首次查询需要读取数据库，在线程池中执行
+            body = dumps(await loop.run_in_executor(self.executor, suggest_payload, request.query))
+        except Exception as e:
+            logger.error(f"获取自动补全建议失败: {str(e)}")
+            body = dumps({'success': False, 'error': str(e)})
+        response = web.Response(body=body, content_type='application/json', headers=NO_STORE_HEADERS)
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, request.method, '/api/suggest', response.status)
+        return response
+
+    async def crawler_events(self, request):
+        """以Server-Sent Events推送爬取任务的状态、进度和数据统计，连接只在事件循环中等待"""
+        try:
+            last_event_id = int(request.headers.get('Last-Event-ID'))
+        except (TypeError, ValueError):
+            last_event_id = None
+        response = web.StreamResponse(headers={
+            'Content-Type': 'text/event-stream',
+            'Cache-Control': 'no-cache',
+            # 禁止反向代理缓冲事件流
+            'X-Accel-Buffering': 'no',
+        })
+        await response.prepare(request)
+        messages = broadcaster.listen_async(last_event_id)
+        try:
+            async for message in messages:
+                await response.write(message)
+        except ConnectionResetError:
+            pass
+        finally:
+            await messages.aclose()
+        return response
+
+    async def metrics(self, request):
+        body = registry.render([read_families(METRICS_FILE)])
+        return web.Response(text=body, content_type='text/plain')
+
+    async def close(self, app):
+        self.executor.shutdown(wait=False)
+
+def create_async_app(max_workers=SQLITE_READ_POOL_SIZE):
+    api = AsyncReadAPI(max_workers)
+    app = web.Application()
+    app.router.add_get('/api/stats', api.stats)
+    app.router.add_get('/api/suggest', api.suggest)
+    app.router.add_get('/api/crawler/events', api.crawler_events)
+    app.router.add_get('/api/{data_type:warframes|weapons|mods}', api.list_items)
+    app.router.add_get('/metrics', api.metrics)
+    app.on_cleanup.append(api.close)
+    return app
+
+def run_async_server(host, port, max_workers=SQLITE_READ_POOL_SIZE):
+    """启动异步只读API服务"""
+    web.run_app(create_async_app(max_workers), host=host, port=port, access_log=None)
@@ -1,8 +1,9 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, Boolean, JSON, DateTime
+from sqlalchemy import inspect, text, Column, Integer, String, Float, Boolean, JSON, DateTime, Index
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.orm import Session
 from datetime import datetime
-from .settings import DATABASE_URL
+from .engine import get_engine, get_read_engine
 
 Base = declarative_base()
 
@@ -18,9 +19,16 @@ class BaseModel(Base):
     image_url = Column(String)
     wiki_url = Column(String)
     last_updated = Column(DateTime, default=datetime.utcnow)
+    # 上游数据的内容指纹，用于重复爬取时跳过未变化的记录
+    content_hash = Column(String)
+
+def stat_indexes(table_name, *columns):
+    """数值列的 (列, id) 索引，按数值过滤、排序和游标翻页时使用（见 filters.py）"""
+    return tuple(Index(f'ix_{table_name}_{column}', column, 'id') for column in columns)
 
 class Warframe(BaseModel):
     __tablename__ = 'warframes'
+    __table_args__ = stat_indexes('warframes', 'health', 'shield', 'armor', 'energy', 'sprint_speed', 'mastery_rank')
     
     health = Column(Float)
     shield = Column(Float)
@@ -36,6 +44,10 @@ class Warframe(BaseModel):
 
 class Weapon(BaseModel):
     __tablename__ = 'weapons'
+    __table_args__ = stat_indexes(
+        'weapons', 'mastery_rank', 'critical_chance', 'critical_multiplier', 'status_chance',
+        'fire_rate', 'accuracy', 'magazine_size', 'reload_time', 'disposition'
+    )
     
     type = Column(String)
     mastery_rank = Column(Integer)
@@ -51,6 +63,7 @@ class Weapon(BaseModel):
 
 class Mod(BaseModel):
     __tablename__ = 'mods'
+    __table_args__ = stat_indexes('mods', 'drain', 'max_rank')
     
     polarity = Column(String)
     rarity = Column(String)
@@ -63,7 +76,95 @@ class Mod(BaseModel):
     base_effects = Column(JSON)
     upgrade_effects = Column(JSON)
 
+class Translation(Base):
+    """多语言文本，每个实体的每个字段在每种语言下一行
+
+    主键顺序 (entity_type, entity_id, lang, field) 同时作为按实体和语言查询的索引。
+    """
+    __tablename__ = 'translations'
+
+    entity_type = Column(String, primary_key=True)
+    entity_id = Column(String, primary_key=True)
+    lang = Column(String, primary_key=True)
+    field = Column(String, primary_key=True)
+    value = Column(JSON)
+
+class DataVersion(Base):
+    """每张数据表的版本号和统计信息，数据发生变化时由触发器增量维护"""
+    __tablename__ = 'data_versions'
+
+    table_name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    row_count = Column(Integer)
+    last_updated = Column(DateTime)
+
+class CrawlSchedule(Base):
+    """定时爬取的状态，服务重启后据此补跑错过的任务"""
+    __tablename__ = 'crawl_schedule'
+
+    data_type = Column(String, primary_key=True)
+    interval = Column(Integer, nullable=False)
+    last_run_at = Column(DateTime)
+    next_run_at = Column(DateTime)
+    last_status = Column(String)
+    last_duration = Column(Float)
+
+class CrawlJob(Base):
+    """爬取任务，Web进程、命令行和定时任务通过该表协调，同一时间只有一个任务在排队或运行"""
+    __tablename__ = 'crawl_jobs'
+    __table_args__ = (
+        # 部分唯一索引：排队中和运行中的任务最多一个，并发提交时由数据库保证
+        Index(
+            'ix_crawl_jobs_active', text("(status IN ('queued', 'running'))"),
+            unique=True, sqlite_where=text("status IN ('queued', 'running')")
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # 逗号分隔的数据类型
+    data_types = Column(String, nullable=False)
+    source = Column(String)
+    # queued / running / finished / failed / cancelled
+    status = Column(String, nullable=False, default='queued')
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    worker = Column(String)
+    message = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    heartbeat_at = Column(DateTime)
+    items_scraped = Column(Integer, default=0)
+    items_written = Column(Integer, default=0)
+    bytes_downloaded = Column(Integer, default=0)
+    items_per_second = Column(Float, default=0)
+    # 各爬虫及各语言的进度 {爬虫: {'items_scraped', 'items_written', 'languages': {语言: {...}}}}
+    details = Column(JSON)
+
+def ensure_columns(engine):
+    """为已存在的旧表补充新增的列（create_all不会修改已有表）"""
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {c['name'] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+
+def ensure_indexes(engine):
+    """为已存在的旧表创建新增的索引（create_all只在新建表时创建索引）"""
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                conn.execute(CreateIndex(index, if_not_exists=True))
+
 def init_db():
-    engine = create_engine(DATABASE_URL)
-    Base.metadata.create_all(engine)
-    return sessionmaker(bind=engine)() 
\ No newline at end of file
+    """创建一个绑定到共享可写引擎的会话"""
+    return Session(bind=get_engine())
+
+def init_read_db():
+    """创建一个绑定到共享只读引擎的会话"""
+    return Session(bind=get_read_engine())
+ 
\ No newline at end of file
@@ -0,0 +1,95 @@
+import os
+import sqlite3
+import threading
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+from .settings import DATABASE_URL, SQLITE_PRAGMAS, SQLITE_READ_POOL_SIZE
+from .metrics import instrument_engine
+
+# 进程内共享的引擎，fork后的子进程会重新创建
+_engines = {}
+_lock = threading.Lock()
+
+def database_path():
+    """从DATABASE_URL中解析SQLite数据库文件路径"""
+    return make_url(DATABASE_URL).database
+
+def _apply_pragmas(dbapi_connection, pragmas):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+    finally:
+        cursor.close()
+
+def _create_write_engine():
+    engine = create_engine(DATABASE_URL, connect_args={'check_same_thread': False})
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        _apply_pragmas(dbapi_connection, SQLITE_PRAGMAS)
+
+    instrument_engine(engine, 'write')
+    # 首次创建引擎时初始化表结构
+    from .database import Base, ensure_columns, ensure_indexes
+    from .search import ensure_search_index
+    from .versions import ensure_version_tracking
+    Base.metadata.create_all(engine)
+    ensure_columns(engine)
+    ensure_indexes(engine)
+    ensure_search_index(engine)
+    ensure_version_tracking(engine)
+    return engine
+
+def _create_read_engine():
+    path = os.path.abspath(database_path())
+
+    def connect():
+        return sqlite3.connect(f'file:{path}?mode=ro', uri=True, check_same_thread=False)
+
+    engine = create_engine(
+        'sqlite://',
+        creator=connect,
+        poolclass=QueuePool,
+        pool_size=SQLITE_READ_POOL_SIZE,
+        max_overflow=SQLITE_READ_POOL_SIZE
+    )
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        # journal_mode只能由可写连接设置，WAL模式会持久保存在数据库文件中
+        pragmas = {k: v for k, v in SQLITE_PRAGMAS.items() if k != 'journal_mode'}
+        pragmas['query_only'] = 'ON'
+        _apply_pragmas(dbapi_connection, pragmas)
+
+    instrument_engine(engine, 'read')
+    return engine
+
+def _get(kind, factory):
+    key = (kind, os.getpid())
+    engine = _engines.get(key)
+    if engine is None:
+        with _lock:
+            engine = _engines.get(key)
+            if engine is None:
+                engine = _engines[key] = factory()
+    return engine
+
+def get_engine():
+    """获取进程内共享的可写引擎（WAL模式，连接池复用连接）"""
+    return _get('write', _create_write_engine)
+
+def get_read_engine():
+    """获取进程内共享的只读引擎，用于Web读取接口"""
+    # 确保数据库文件和表结构已经存在
+    get_engine()
+    return _get('read', _create_read_engine)
+
+def dispose_engines():
+    """关闭当前进程中所有的连接池"""
+    with _lock:
+        for (kind, pid), engine in list(_engines.items()):
+            if pid == os.getpid():
+                engine.dispose()
+                del _engines[(kind, pid)]
@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from .database import init_read_db
+from .jobs import current_status
+from .versions import get_versions, get_table_stats
+from .serializers import dumps
+from .settings import CRAWL_EVENTS_POLL_INTERVAL, CRAWL_EVENTS_KEEPALIVE, CRAWL_EVENTS_BACKLOG
+
+logger = logging.getLogger(__name__)
+
+# 进度事件中的计数字段
+PROGRESS_FIELDS = ('items_scraped', 'items_written', 'bytes_downloaded', 'items_per_second', 'spiders')
+
+def format_event(event_id, event, data):
+    """编码为SSE消息"""
+    return b'id: %d\nevent: %s\ndata: %s\n\n' % (event_id, event.encode(), dumps(data))
+
+def format_stats(table_stats):
+    stats = {}
+    for data_type in ('warframes', 'weapons', 'mods'):
+        category = dict(table_stats.get(data_type, {'count': 0, 'last_updated': None}))
+        if category['last_updated']:
+            category['last_updated'] = category['last_updated'].strftime('%Y-%m-%d %H:%M:%S')
+        stats[data_type] = category
+    return stats
+
+class CrawlEventBroadcaster:
+    """爬取任务事件的广播器
+
+    一个后台线程按固定间隔读取crawl_jobs和data_versions表，状态变化时生成事件：
+    status（任务的排队、运行、取消、结束）、progress（计数和各爬虫/各语言的进度）、
+    stats（数据表统计信息）。事件写入共享的环形缓冲区，所有连接在同一个条件变量上等待，
+    数据库查询次数与连接数无关；没有连接时后台线程不查询数据库。
+
+    listen_async供异步服务使用，连接只在事件循环中等待，不占用线程；
+    listen为WSGI的阻塞生成器，每个连接占用一个线程。
+    """
+
+    def __init__(self, poll_interval=CRAWL_EVENTS_POLL_INTERVAL, keepalive=CRAWL_EVENTS_KEEPALIVE,
+                 backlog=CRAWL_EVENTS_BACKLOG, session_factory=init_read_db):
+        self.poll_interval = poll_interval
+        self.keepalive = keepalive
+        self.session_factory = session_factory
+        # (事件ID, 编码后的消息)
+        self.events = deque(maxlen=backlog)
+        self.last_id = 0
+        self.condition = threading.Condition()
+        self.listeners = 0
+        # 异步连接的 (事件循环, asyncio.Event)，发布事件时唤醒
+        self.waiters = set()
+        self.thread = None
+        # 每类事件最近一次的内容，新连接先收到当前状态
+        self.latest = {}
+        self.previous = {}
+
+    def publish(self, event, data):
+        with self.condition:
+            self.last_id += 1
+            message = format_event(self.last_id, event, data)
+            self.events.append((self.last_id, message))
+            self.latest[event] = message
+            self.condition.notify_all()
+            for loop, wakeup in self.waiters:
+                loop.call_soon_threadsafe(wakeup.set)
+
+    def poll(self):
+        """读取一次当前状态，与上一次比较后发布变化的事件"""
+        db = self.session_factory()
+        try:
+            status = current_status(db)
+            versions = get_versions(db)
+            stats = format_stats(get_table_stats(db)) if versions != self.previous.get('versions') else None
+        finally:
+            db.close()
+
+        job = status['job']
+        lifecycle = {key: status[key] for key in ('is_running', 'message', 'current_type', 'last_run')}
+        if job:
+            lifecycle.update({key: job[key] for key in ('id', 'status', 'cancel_requested')})
+        if lifecycle != self.previous.get('status'):
+            self.previous['status'] = lifecycle
+            self.publish('status', status)
+        if job:
+            progress = {key: job[key] for key in PROGRESS_FIELDS}
+            progress['id'] = job['id']
+            if progress != self.previous.get('progress'):
+                self.previous['progress'] = progress
+                self.publish('progress', progress)
+        if stats is not None:
+            self.previous['versions'] = versions
+            self.publish('stats', stats)
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.listeners:
+                    self.condition.wait()
+            try:
+                self.poll()
+            except Exception as e:
+                logger.warning(f'读取爬取任务状态失败: {str(e)}')
+            time.sleep(self.poll_interval)
+
+    def ensure_started(self):
+        with self.condition:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, name='crawl-events', daemon=True)
+                self.thread.start()
+
+    def _backlog(self, last_event_id):
+        """新连接需要先发送的消息和起始位置，调用方持有锁"""
+        # Last-Event-ID大于当前ID说明服务已重启，事件编号重新开始，只能发送最新状态
+        if (last_event_id is not None and last_event_id <= self.last_id
+                and self.events and self.events[0][0] <= last_event_id + 1):
+            # 缓冲区中还有断开期间的事件，从断点继续
+            backlog = [message for event_id, message in self.events if event_id > last_event_id]
+        else:
+            backlog = list(self.latest.values())
+        return backlog, self.last_id
+
+    def _pending(self, cursor):
+        """cursor之后的消息和新的位置，调用方持有锁"""
+        if self.events and self.events[0][0] > cursor + 1:
+            # 客户端太慢，缓冲区已覆盖未发送的事件，只补发最新状态
+            messages = list(self.latest.values())
+        else:
+            messages = [message for event_id, message in self.events if event_id > cursor]
+        return messages, self.last_id
+
+    def listen(self, last_event_id=None):
+        """逐条产出SSE消息；last_event_id为浏览器重连时带回的Last-Event-ID"""
+        self.ensure_started()
+        with self.condition:
+            self.listeners += 1
+            self.condition.notify_all()
+            backlog, cursor = self._backlog(last_event_id)
+        try:
+            yield b'retry: 3000\n\n'
+            for message in backlog:
+                yield message
+            while True:
+                with self.condition:
+                    if self.last_id == cursor:
+                        self.condition.wait(self.keepalive)
+                    messages, cursor = self._pending(cursor)
+                if not messages:
+                    # 注释行用于保持连接
+                    yield b': keepalive\n\n'
+                for message in messages:
+                    yield message
+        finally:
+            with self.condition:
+                self.listeners -= 1
+
+    async def listen_async(self, last_event_id=None):
+        """listen的异步版本，在事件循环中等待新事件"""
+        self.ensure_started()
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self.condition:
+            self.listeners += 1
+            self.waiters.add(waiter)
+            self.condition.notify_all()
+            backlog, cursor = self._backlog(last_event_id)
+        try:
+            yield b'retry: 3000\n\n'
+            for message in backlog:
+                yield message
+            while True:
+                with self.condition:
+                    messages, cursor = self._pending(cursor)
+                    if not messages:
+                        # 在锁内清除，之后发布的事件一定会再次唤醒
+                        waiter[1].clear()
+                if messages:
+                    for message in messages:
+                        yield message
+                    continue
+                try:
+                    await asyncio.wait_for(waiter[1].wait(), self.keepalive)
+                except asyncio.TimeoutError:
+                    yield b': keepalive\n\n'
+        finally:
+            with self.condition:
+                self.listeners -= 1
+                self.waiters.discard(waiter)
+
+broadcaster = CrawlEventBroadcaster()
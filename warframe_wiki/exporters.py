@@ -0,0 +1,165 @@
+import csv
+import gzip
+import io
+import json
+import os
+from datetime import datetime
+from sqlalchemy import select
+from .database import init_db, Warframe, Weapon, Mod
+from .serializers import HIDDEN_FIELDS
+
+# 可导出的数据表
+EXPORT_MODELS = {
+    'warframes': Warframe,
+    'weapons': Weapon,
+    'mods': Mod
+}
+
+EXPORT_FORMATS = ('json', 'ndjson', 'csv')
+
+# 每次从游标读取的行数
+DEFAULT_CHUNK_SIZE = 1000
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return str(value)
+
+def dumps_row(row):
+    """将一行数据编码为紧凑的JSON字符串"""
+    return json.dumps(row, ensure_ascii=False, separators=(',', ':'), default=_json_default)
+
+def csv_value(value):
+    """将单元格的值转换为CSV文本，列表和字典编码为JSON"""
+    if value is None:
+        return ''
+    if isinstance(value, (list, dict)):
+        return dumps_row(value)
+    if isinstance(value, datetime):
+        return _json_default(value)
+    return value
+
+def export_columns(model):
+    """导出的列，与列表接口一致不包括内部字段"""
+    return [c.name for c in model.__table__.columns if c.name not in HIDDEN_FIELDS]
+
+def iter_rows(db, model, chunk_size=DEFAULT_CHUNK_SIZE):
+    """使用流式游标分块读取整张表（export_columns中的列），逐行返回字典"""
+    table = model.__table__
+    result = db.execute(
+        select(*[table.c[name] for name in export_columns(model)]).order_by(table.c.id),
+        execution_options={'stream_results': True, 'max_row_buffer': chunk_size}
+    )
+    try:
+        for partition in result.mappings().partitions(chunk_size):
+            for row in partition:
+                yield dict(row)
+    finally:
+        result.close()
+
+def open_output(path, compress=False):
+    """打开输出文件，compress为True时使用gzip压缩"""
+    if compress:
+        return gzip.open(path, 'wt', encoding='utf-8', newline='')
+    return open(path, 'w', encoding='utf-8', newline='')
+
+def encode_rows(rows, fmt, columns, chunk_size=DEFAULT_CHUNK_SIZE):
+    """将行数据按格式编码，每chunk_size行产出一段文本"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f'不支持的导出格式: {fmt}')
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == 'csv' else None
+    if fmt == 'csv':
+        writer.writerow(columns)
+    elif fmt == 'json':
+        buffer.write('[')
+
+    count = 0
+    for row in rows:
+        if fmt == 'ndjson':
+            buffer.write(dumps_row(row))
+            buffer.write('\n')
+        elif fmt == 'json':
+            buffer.write(',\n' if count else '\n')
+            buffer.write(dumps_row(row))
+        else:
+            writer.writerow([csv_value(row[name]) for name in columns])
+        count += 1
+        if count % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if fmt == 'json':
+        buffer.write('\n]' if count else ']')
+    tail = buffer.getvalue()
+    if tail:
+        yield tail
+
+def write_rows(rows, fileobj, fmt, columns):
+    """将行数据增量写入文件对象，返回写入的行数"""
+    count = 0
+
+    def counted():
+        nonlocal count
+        for row in rows:
+            count += 1
+            yield row
+
+    for text in encode_rows(counted(), fmt, columns):
+        fileobj.write(text)
+    return count
+
+def export_filename(data_type, fmt, compress=False):
+    return f"{data_type}.{fmt}" + ('.gz' if compress else '')
+
+def export_table(data_type, path, fmt='ndjson', compress=False, db=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """流式导出一张表到文件，返回导出的行数"""
+    if data_type not in EXPORT_MODELS:
+        raise ValueError(f'无效的数据类型: {data_type}')
+    model = EXPORT_MODELS[data_type]
+    columns = export_columns(model)
+
+    own_session = db is None
+    db = db or init_db()
+    try:
+        with open_output(path, compress) as f:
+            return write_rows(iter_rows(db, model, chunk_size), f, fmt, columns)
+    finally:
+        if own_session:
+            db.close()
+
+def export_all(directory, fmt='ndjson', compress=False, data_types=None, db=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """将每种数据导出为单独的文件，返回 {数据类型: 行数}"""
+    os.makedirs(directory, exist_ok=True)
+    own_session = db is None
+    db = db or init_db()
+    try:
+        counts = {}
+        for data_type in data_types or EXPORT_MODELS:
+            path = os.path.join(directory, export_filename(data_type, fmt, compress))
+            counts[data_type] = export_table(data_type, path, fmt, compress, db=db, chunk_size=chunk_size)
+        return counts
+    finally:
+        if own_session:
+            db.close()
+
+def export_json_document(path, compress=False, db=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """流式导出为单个JSON文档：{"warframes": [...], "weapons": [...], "mods": [...]}"""
+    own_session = db is None
+    db = db or init_db()
+    try:
+        counts = {}
+        with open_output(path, compress) as f:
+            f.write('{')
+            for index, (data_type, model) in enumerate(EXPORT_MODELS.items()):
+                f.write(',\n' if index else '\n')
+                f.write(f'{json.dumps(data_type)}: ')
+                columns = export_columns(model)
+                counts[data_type] = write_rows(iter_rows(db, model, chunk_size), f, 'json', columns)
+            f.write('\n}\n')
+        return counts
+    finally:
+        if own_session:
+            db.close()
@@ -0,0 +1,176 @@
+import logging
+import time
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from twisted.internet import task
+from .database import init_db
+from .jobs import update_progress
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# {任务ID: {爬虫名称: crawler}}，同一任务的多个爬虫在同一进程中运行，进度合并计算
+_job_crawlers = {}
+# {任务ID: 开始时间}
+_job_started = {}
+# {任务ID: 尚未关闭的爬虫}，全部关闭后清理该任务的记录
+_job_open = {}
+
+def spider_progress(stats):
+    """单个爬虫的进度，语言统计由 MultilingualMergeSpider 写入 language/<语言>/<键>"""
+    languages = {}
+    for key, value in stats.items():
+        if key.startswith('language/'):
+            _, language, name = key.split('/', 2)
+            languages.setdefault(language, {})[name] = value
+    return {
+        'items_scraped': stats.get('item_scraped_count', 0),
+        'items_written': sum(
+            value for key, value in stats.items()
+            if key.startswith('pipeline/') and key.endswith(('/inserted', '/updated'))
+        ),
+        'bytes_downloaded': stats.get('downloader/response_bytes', 0),
+        'finish_reason': stats.get('finish_reason'),
+        'languages': languages,
+    }
+
+def job_progress(job_id):
+    """汇总任务中所有爬虫的统计数据"""
+    details = {
+        name: spider_progress(crawler.stats.get_stats())
+        for name, crawler in _job_crawlers.get(job_id, {}).items()
+    }
+    items_scraped = sum(spider['items_scraped'] for spider in details.values())
+    elapsed = time.monotonic() - _job_started.get(job_id, time.monotonic())
+    return {
+        'items_scraped': items_scraped,
+        'items_written': sum(spider['items_written'] for spider in details.values()),
+        'bytes_downloaded': sum(spider['bytes_downloaded'] for spider in details.values()),
+        'items_per_second': items_scraped / elapsed if elapsed > 0 else 0,
+        'details': details,
+    }
+
+class JobProgress:
+    """定期将爬取任务的进度写入crawl_jobs表，并在任务被取消时关闭爬虫
+
+    只对带有job_id参数的爬虫生效（由任务管理器启动的爬取）。
+    """
+
+    def __init__(self, crawler, interval):
+        self.crawler = crawler
+        self.interval = interval
+        self.job_id = None
+        self.task = None
+        self.cancelling = False
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        interval = crawler.settings.getfloat('JOB_PROGRESS_INTERVAL', 1.0)
+        if interval <= 0:
+            raise NotConfigured
+        extension = cls(crawler, interval)
+        crawler.signals.connect(extension.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(extension.spider_closed, signal=signals.spider_closed)
+        return extension
+
+    def spider_opened(self, spider):
+        self.job_id = getattr(spider, 'job_id', None)
+        if self.job_id is None:
+            return
+        _job_started.setdefault(self.job_id, time.monotonic())
+        _job_crawlers.setdefault(self.job_id, {})[spider.name] = self.crawler
+        _job_open.setdefault(self.job_id, set()).add(spider.name)
+        self.task = task.LoopingCall(self.report, spider)
+        self.task.start(self.interval, now=False)
+
+    def report(self, spider, final=False):
+        db = init_db()
+        try:
+            cancel_requested = update_progress(db, self.job_id, job_progress(self.job_id))
+        except Exception as e:
+            logger.warning(f'更新任务 {self.job_id} 的进度失败: {str(e)}')
+            return
+        finally:
+            db.close()
+        if cancel_requested and not final and not self.cancelling:
+            self.cancelling = True
+            logger.info(f'任务 {self.job_id} 已被取消，正在关闭爬虫 {spider.name}')
+            # 正在下载的请求仍会返回，由爬虫根据cancelled标记跳过解析
+            spider.cancelled = True
+            self.crawler.engine.close_spider(spider, 'cancelled')
+
+    def spider_closed(self, spider, reason):
+        if self.job_id is None:
+            return
+        if self.task and self.task.running:
+            self.task.stop()
+        self.report(spider, final=True)
+        # 已关闭爬虫的统计数据仍然计入任务进度，所有爬虫关闭后再清理
+        still_open = _job_open.get(self.job_id, set())
+        still_open.discard(spider.name)
+        if not still_open:
+            _job_open.pop(self.job_id, None)
+            _job_crawlers.pop(self.job_id, None)
+            _job_started.pop(self.job_id, None)
+
+class CrawlMetrics:
+    """记录爬取各阶段的耗时指标，并定期写入METRICS_FILE
+
+    下载耗时取自Scrapy的download_latency；请求从进入调度器到收到响应的总时间减去下载耗时，
+    即为DOWNLOAD_DELAY和AutoThrottle造成的等待。解析和合并阶段由 MultilingualMergeSpider 记录，
+    入库阶段由 WarframeWikiPipeline 记录。
+    """
+
+    def __init__(self, crawler, path, interval):
+        self.crawler = crawler
+        self.path = path
+        self.interval = interval
+        self.task = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        path = crawler.settings.get('METRICS_FILE')
+        if not path:
+            raise NotConfigured
+        metrics.set_process_role('crawler')
+        extension = cls(crawler, path, crawler.settings.getfloat('METRICS_WRITE_INTERVAL', 10.0))
+        crawler.signals.connect(extension.request_scheduled, signal=signals.request_scheduled)
+        crawler.signals.connect(extension.response_received, signal=signals.response_received)
+        crawler.signals.connect(extension.item_scraped, signal=signals.item_scraped)
+        crawler.signals.connect(extension.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(extension.spider_closed, signal=signals.spider_closed)
+        return extension
+
+    def request_scheduled(self, request, spider):
+        request.meta.setdefault('metrics_scheduled_at', time.monotonic())
+
+    def response_received(self, response, request, spider):
+        metrics.CRAWL_RESPONSES.inc(1, spider.name, response.status)
+        latency = request.meta.get('download_latency')
+        if latency is None:
+            # 快照重放和缓存命中的响应没有经过下载器
+            return
+        metrics.CRAWL_STAGE_SECONDS.observe(latency, spider.name, 'download')
+        scheduled_at = request.meta.get('metrics_scheduled_at')
+        if scheduled_at is not None:
+            waited = time.monotonic() - scheduled_at - latency
+            metrics.CRAWL_STAGE_SECONDS.observe(max(waited, 0), spider.name, 'wait')
+
+    def item_scraped(self, item, spider):
+        metrics.CRAWL_ITEMS.inc(1, spider.name)
+
+    def spider_opened(self, spider):
+        if self.interval > 0:
+            self.task = task.LoopingCall(self.write)
+            self.task.start(self.interval, now=False)
+
+    def spider_closed(self, spider, reason):
+        if self.task and self.task.running:
+            self.task.stop()
+        self.write()
+
+    def write(self):
+        try:
+            metrics.registry.write(self.path)
+        except OSError as e:
+            logger.warning(f'写入指标文件失败: {str(e)}')
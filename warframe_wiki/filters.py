@@ -0,0 +1,115 @@
+import math
+import operator
+from sqlalchemy import Integer, Float, literal_column
+from .pagination import INT64_MIN, INT64_MAX
+
+# 比较操作符，同时用于生成SQL条件和在只读副本中过滤
+FILTER_OPERATORS = {
+    'eq': operator.eq,
+    'gt': operator.gt,
+    'gte': operator.ge,
+    'lt': operator.lt,
+    'lte': operator.le,
+}
+# in的取值个数上限
+MAX_IN_VALUES = 100
+
+class FilterError(ValueError):
+    """无效的filter或sort参数"""
+
+def numeric_columns(model):
+    """可以过滤和排序的数值列（整数和浮点数，不包括布尔值），每列都有 (列, id) 索引"""
+    return [c.name for c in model.__table__.columns if isinstance(c.type, (Integer, Float))]
+
+def _parse_number(text, clause):
+    try:
+        value = int(text)
+    except ValueError:
+        try:
+            value = float(text)
+        except ValueError:
+            raise FilterError(f'无效的数值: {clause}')
+        if not math.isfinite(value):
+            raise FilterError(f'无效的数值: {clause}')
+        return value
+    if not INT64_MIN <= value <= INT64_MAX:
+        # 超出SQLite整数范围的值无法绑定为参数
+        raise FilterError(f'数值超出范围: {clause}')
+    return value
+
+def parse_filters(model, expression):
+    """解析 ?filter=列:操作符:值,...，返回 [(列名, 操作符, 值)]
+
+    操作符为 eq/gt/gte/lt/lte/in，in的多个值用|分隔，例如
+    critical_chance:gte:0.3,mastery_rank:in:5|6|7
+    """
+    if not expression:
+        return []
+    allowed = numeric_columns(model)
+    filters = []
+    for clause in expression.split(','):
+        clause = clause.strip()
+        if not clause:
+            continue
+        parts = [part.strip() for part in clause.split(':')]
+        if len(parts) != 3:
+            raise FilterError(f'无效的过滤条件: {clause}')
+        name, op, text = parts
+        if name not in allowed:
+            raise FilterError(f'不支持过滤的字段: {name}')
+        if op == 'in':
+            values = tuple(dict.fromkeys(_parse_number(value.strip(), clause) for value in text.split('|')))
+            if len(values) > MAX_IN_VALUES:
+                raise FilterError(f'in的取值不能超过{MAX_IN_VALUES}个: {name}')
+            filters.append((name, op, values))
+        elif op in FILTER_OPERATORS:
+            filters.append((name, op, _parse_number(text, clause)))
+        else:
+            raise FilterError(f'不支持的操作符: {op}')
+    return filters
+
+def parse_sort(model, expression):
+    """解析 ?sort=-列,列，返回 [(列名, 是否降序)]，列名前加-表示降序"""
+    if not expression:
+        return []
+    allowed = numeric_columns(model)
+    keys = {}
+    for item in expression.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        name = item.lstrip('-')
+        if name not in allowed:
+            raise FilterError(f'不支持排序的字段: {name}')
+        keys.setdefault(name, item.startswith('-'))
+    return list(keys.items())
+
+def filter_key(filters):
+    """过滤条件的规范化表示，用作总数缓存的键"""
+    return tuple(sorted(filters, key=repr))
+
+def apply_filters(query, model, filters):
+    """为查询（Core select()）添加过滤条件，NULL不满足任何条件"""
+    table = model.__table__
+    conditions = []
+    for name, op, value in filters:
+        column = table.c[name]
+        if op == 'in':
+            conditions.append(column.in_(value))
+        else:
+            conditions.append(FILTER_OPERATORS[op](column, value))
+    return query.where(*conditions) if conditions else query
+
+def sort_columns(model, sort, indexed=True):
+    """返回 (排序列, 是否降序)，最后加上主键作为唯一的排序键
+
+    indexed为False时排序列前加一元+，SQLite不会选择沿排序列的索引扫描。
+    """
+    table = model.__table__
+    names = [name for name, _ in sort] + ['id']
+    if indexed:
+        columns = [table.c[name] for name in names]
+    else:
+        columns = [literal_column(f'+{table.name}.{name}', table.c[name].type) for name in names]
+    descending = [desc for _, desc in sort] + [False]
+    return columns, descending
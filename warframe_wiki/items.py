@@ -17,6 +17,8 @@ class ModItem(scrapy.Item):
     image_url = scrapy.Field()
     wiki_url = scrapy.Field()
     last_updated = scrapy.Field()
+    # {语言: {字段: 文本}}，写入translations表
+    translations = scrapy.Field()
 
 class WeaponItem(scrapy.Item):
     id = scrapy.Field()
@@ -34,6 +36,8 @@ class WeaponItem(scrapy.Item):
     image_url = scrapy.Field()
     wiki_url = scrapy.Field()
     last_updated = scrapy.Field()
+    # {语言: {字段: 文本}}，写入translations表
+    translations = scrapy.Field()
 
 class WarframeItem(scrapy.Item):
     id = scrapy.Field()
@@ -55,4 +59,6 @@ class WarframeItem(scrapy.Item):
     polarities = scrapy.Field()
     image_url = scrapy.Field()
     wiki_url = scrapy.Field()
-    last_updated = scrapy.Field() 
\ No newline at end of file
+    last_updated = scrapy.Field() 
+    # {语言: {字段: 文本}}，写入translations表
+    translations = scrapy.Field()
\ No newline at end of file
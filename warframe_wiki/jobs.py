@@ -0,0 +1,214 @@
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+from sqlalchemy import select, update, text, func, bindparam, DateTime
+from sqlalchemy.exc import IntegrityError
+from .database import init_db, CrawlJob
+
+logger = logging.getLogger(__name__)
+
+# 数据类型对应的爬虫类，在执行任务时才导入，Web进程和调度进程不需要加载Scrapy
+SPIDER_CLASSES = {
+    'warframes': 'warframe_wiki.spiders.warframe_spider.WarframeSpider',
+    'weapons': 'warframe_wiki.spiders.weapon_spider.WeaponSpider',
+    'mods': 'warframe_wiki.spiders.mod_spider.ModSpider',
+}
+
+ACTIVE_STATUSES = ('queued', 'running')
+# 运行中的任务超过该时间没有心跳（或排队的任务无人认领）视为已失效
+JOB_STALE_SECONDS = 300
+
+def worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+def job_to_dict(job):
+    def fmt(value):
+        return value.strftime('%Y-%m-%d %H:%M:%S') if value else None
+    return {
+        'id': job.id,
+        'data_types': job.data_types.split(','),
+        'source': job.source,
+        'status': job.status,
+        'cancel_requested': bool(job.cancel_requested),
+        'worker': job.worker,
+        'message': job.message,
+        'created_at': fmt(job.created_at),
+        'started_at': fmt(job.started_at),
+        'finished_at': fmt(job.finished_at),
+        'heartbeat_at': fmt(job.heartbeat_at),
+        'items_scraped': job.items_scraped or 0,
+        'items_written': job.items_written or 0,
+        'bytes_downloaded': job.bytes_downloaded or 0,
+        'items_per_second': round(job.items_per_second or 0, 1),
+        'spiders': job.details or {},
+    }
+
+def expire_stale_jobs(db, stale_seconds=JOB_STALE_SECONDS):
+    """将失去心跳的运行中任务和无人认领的排队任务标记为失败"""
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=stale_seconds)
+    table = CrawlJob.__table__
+    db.execute(
+        update(table)
+        .where(table.c.status == 'running')
+        .where(func.coalesce(table.c.heartbeat_at, table.c.started_at) < cutoff)
+        .values(status='failed', finished_at=now, message='爬虫进程长时间没有响应')
+    )
+    db.execute(
+        update(table)
+        .where(table.c.status == 'queued', table.c.created_at < cutoff)
+        .values(status='failed', finished_at=now, message='没有进程认领该任务')
+    )
+
+def enqueue_job(db, data_types, source):
+    """提交爬取任务，已有任务在排队或运行时返回None
+
+    是否已有任务由 ix_crawl_jobs_active 部分唯一索引判断，多个进程同时提交时只有一个成功。
+    """
+    expire_stale_jobs(db)
+    job = CrawlJob(data_types=','.join(data_types), source=source, status='queued', message='等待运行')
+    db.add(job)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return None
+    return job.id
+
+def claim_job(db, worker=None):
+    """原子地认领最早的排队任务，返回 (id, 数据类型列表, 来源)，没有任务时返回None"""
+    expire_stale_jobs(db)
+    row = db.execute(
+        text(
+            "UPDATE crawl_jobs SET status = 'running', started_at = :now, heartbeat_at = :now, "
+            "worker = :worker, message = '正在运行' "
+            "WHERE id = (SELECT id FROM crawl_jobs WHERE status = 'queued' ORDER BY id LIMIT 1) "
+            "AND status = 'queued' "
+            "RETURNING id, data_types, source"
+        ).bindparams(bindparam('now', type_=DateTime)),
+        {'now': datetime.utcnow(), 'worker': worker or worker_id()}
+    ).first()
+    db.commit()
+    if row is None:
+        return None
+    return row.id, row.data_types.split(','), row.source
+
+def update_progress(db, job_id, progress):
+    """写入任务进度和心跳，返回是否已请求取消"""
+    cancel_requested = db.execute(
+        update(CrawlJob.__table__)
+        .where(CrawlJob.id == job_id)
+        .values(heartbeat_at=datetime.utcnow(), **progress)
+        .returning(CrawlJob.cancel_requested)
+    ).scalar()
+    db.commit()
+    return bool(cancel_requested)
+
+def finish_job(db, job_id, status, message=None):
+    now = datetime.utcnow()
+    db.execute(
+        update(CrawlJob.__table__)
+        .where(CrawlJob.id == job_id, CrawlJob.status.in_(ACTIVE_STATUSES))
+        .values(status=status, finished_at=now, heartbeat_at=now, message=message)
+    )
+    db.commit()
+
+def cancel_job(db, job_id=None):
+    """取消任务（默认为当前任务）：排队中的任务直接取消，运行中的任务在下次心跳时停止"""
+    query = select(CrawlJob).where(CrawlJob.status.in_(ACTIVE_STATUSES))
+    if job_id is not None:
+        query = query.where(CrawlJob.id == job_id)
+    job = db.execute(query).scalars().first()
+    if job is None:
+        return None
+    if job.status == 'queued':
+        job.status = 'cancelled'
+        job.finished_at = datetime.utcnow()
+        job.message = '任务已取消'
+    else:
+        job.cancel_requested = True
+        job.message = '正在取消'
+    db.commit()
+    return job_to_dict(job)
+
+def get_job(db, job_id):
+    job = db.get(CrawlJob, job_id)
+    return job_to_dict(job) if job else None
+
+def list_jobs(db, limit=20):
+    """最近的任务记录，最新的在前"""
+    jobs = db.execute(select(CrawlJob).order_by(CrawlJob.id.desc()).limit(limit)).scalars()
+    return [job_to_dict(job) for job in jobs]
+
+def current_status(db, stale_seconds=JOB_STALE_SECONDS):
+    """当前（或最近一次）任务的状态，兼容原有 crawler_status 的字段"""
+    job = db.execute(select(CrawlJob).order_by(CrawlJob.id.desc()).limit(1)).scalars().first()
+    if job is None:
+        return {'is_running': False, 'last_run': None, 'message': '', 'current_type': None, 'job': None}
+    is_running = job.status in ACTIVE_STATUSES
+    if job.status == 'running':
+        heartbeat = job.heartbeat_at or job.started_at
+        is_running = heartbeat is not None and heartbeat >= datetime.utcnow() - timedelta(seconds=stale_seconds)
+    data = job_to_dict(job)
+    return {
+        'is_running': is_running,
+        'last_run': data['started_at'] or data['created_at'],
+        'message': job.message or '',
+        'current_type': job.data_types if is_running else None,
+        'job': data
+    }
+
+def job_outcome(finish_reasons, errors=()):
+    """根据各爬虫的结束原因确定任务状态，返回 (状态, 消息)"""
+    if errors:
+        return 'failed', '; '.join(errors)
+    if 'cancelled' in finish_reasons:
+        return 'cancelled', '任务已取消'
+    unfinished = [reason for reason in finish_reasons if reason != 'finished']
+    if unfinished:
+        return 'failed', f"爬虫异常结束: {', '.join(str(reason) for reason in unfinished)}"
+    return 'finished', '任务完成'
+
+def new_snapshot_id(settings):
+    """为一次爬取任务生成快照ID"""
+    from .snapshots import SnapshotStore
+    return SnapshotStore(settings.get('SNAPSHOT_DIR')).new_snapshot_id()
+
+def run_next_job(settings=None):
+    """认领下一个排队任务并在当前进程中运行（命令行和Web接口使用），返回任务ID
+
+    settings为覆盖项目设置的配置项。
+    """
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.utils.misc import load_object
+    from scrapy.utils.project import get_project_settings
+
+    db = init_db()
+    try:
+        claimed = claim_job(db)
+        if claimed is None:
+            return None
+        job_id, data_types, _ = claimed
+
+        project_settings = get_project_settings()
+        project_settings.setdict(settings or {}, priority='cmdline')
+        process = CrawlerProcess(project_settings)
+        crawlers = [process.create_crawler(load_object(SPIDER_CLASSES[data_type])) for data_type in data_types]
+        # 任务中的所有爬虫写入同一个快照
+        snapshot_id = new_snapshot_id(project_settings)
+        errors = []
+        for crawler in crawlers:
+            process.crawl(crawler, job_id=job_id, snapshot_id=snapshot_id).addErrback(lambda failure: errors.append(repr(failure.value)))
+        try:
+            process.start()
+        except Exception as e:
+            errors.append(repr(e))
+        status, message = job_outcome(
+            [crawler.stats.get_value('finish_reason') if crawler.stats else None for crawler in crawlers], errors
+        )
+        finish_job(db, job_id, status, message)
+        logger.info(f'爬取任务 {job_id} 结束: {message}')
+        return job_id
+    finally:
+        db.close()
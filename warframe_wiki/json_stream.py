@@ -0,0 +1,32 @@
+import json
+import re
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+def iter_array(data):
+    """逐个解析JSON数组中的元素，不一次性构建整个列表
+
+    每次只解码一条记录，调用方处理完（例如只保留需要的字段）后即可释放，
+    解析大数组时峰值内存远小于 json.loads。
+    """
+    text = data.decode('utf-8') if isinstance(data, (bytes, bytearray)) else data
+    decoder = json.JSONDecoder()
+
+    index = _WHITESPACE.match(text, 0).end()
+    if text[index:index + 1] != '[':
+        raise json.JSONDecodeError('Expecting JSON array', text, index)
+    index = _WHITESPACE.match(text, index + 1).end()
+    if text[index:index + 1] == ']':
+        return
+
+    while True:
+        value, index = decoder.raw_decode(text, index)
+        yield value
+        index = _WHITESPACE.match(text, index).end()
+        char = text[index:index + 1]
+        if char == ',':
+            index = _WHITESPACE.match(text, index + 1).end()
+        elif char == ']':
+            return
+        else:
+            raise json.JSONDecodeError("Expecting ',' delimiter", text, index)
@@ -0,0 +1,145 @@
+import copy
+
+class FieldSpec:
+    """单个Item字段的映射规则"""
+
+    __slots__ = ('language', 'key', 'cast', 'default', 'function', 'sources')
+
+    def __init__(self, language=None, key=None, cast=None, default=None, function=None, sources=None):
+        self.language = language
+        self.key = key
+        self.cast = cast
+        self.default = default
+        self.function = function
+        # {语言: 原始字段}，用于确定解析时需要保留的字段
+        self.sources = sources if sources is not None else {language: (key,)}
+
+def text(language, key, default=''):
+    """原样取值的字段"""
+    return FieldSpec(language, key, default=default)
+
+def number(language, key, default=0):
+    """转换为float的数值字段"""
+    return FieldSpec(language, key, cast=float, default=default)
+
+def integer(language, key, default=0):
+    """转换为int的整数字段"""
+    return FieldSpec(language, key, cast=int, default=default)
+
+def computed(function, **sources):
+    """由函数根据 {语言: 原始记录} 计算的字段，sources声明用到的原始字段"""
+    return FieldSpec(function=function, sources={language: tuple(keys) for language, keys in sources.items()})
+
+def translated(key, default=''):
+    """每种语言都原样取值的翻译字段，用于translated_fields"""
+    return lambda language: text(language, key, default)
+
+# 不可变的默认值可以在记录之间共享，其他默认值每次取值时复制
+_IMMUTABLE_TYPES = (str, int, float, bool, bytes, type(None))
+_MISSING = object()
+
+def field_getter(spec):
+    """将字段规则编译为取值函数 getter(records)，records为 {语言: 原始记录}"""
+    if spec.function is not None:
+        return spec.function
+    language, key, cast, default = spec.language, spec.key, spec.cast, spec.default
+    if isinstance(default, _IMMUTABLE_TYPES):
+        if cast is None:
+            return lambda records: records[language].get(key, default)
+        return lambda records: cast(records[language].get(key, default))
+
+    def getter(records):
+        value = records[language].get(key, _MISSING)
+        if value is _MISSING:
+            value = copy.deepcopy(default)
+        return value if cast is None else cast(value)
+    return getter
+
+class CompiledMapping:
+    """将声明式的字段映射预先编译为取值函数，按批处理合并后的记录
+
+    每个字段在创建时编译为一个闭包，映射时不再逐字段判断规则。
+    转换失败或未通过校验的记录进入拒绝列表，不会抛出异常。
+    """
+
+    def __init__(self, item_class, fields, validate=None, translations=None, languages=()):
+        self.item_class = item_class
+        self.fields = dict(fields)
+        # {翻译字段: language -> FieldSpec}，为每种语言生成 translations[语言][字段]
+        self.translations = dict(translations or {})
+        self.languages = tuple(languages) if self.translations else ()
+        # 字段名在编译时检查，避免映射时才发现拼写错误
+        names = ['id', *self.fields] + (['translations'] if self.translations else [])
+        unknown = [field for field in names if field not in item_class.fields]
+        if unknown:
+            raise KeyError(f"{item_class.__name__} 没有这些字段: {', '.join(unknown)}")
+        # validate(item) 返回拒绝原因，通过时返回None
+        self.validate = validate
+        self.translation_specs = {
+            language: {field: factory(language) for field, factory in self.translations.items()}
+            for language in self.languages
+        }
+        self.source_fields = self._collect_sources()
+        self.extract = self._compile()
+
+    def _collect_sources(self):
+        sources = {}
+        specs = list(self.fields.values())
+        for language_specs in self.translation_specs.values():
+            specs.extend(language_specs.values())
+        for spec in specs:
+            for language, keys in spec.sources.items():
+                sources.setdefault(language, [])
+                sources[language].extend(key for key in keys if key not in sources[language])
+        return {language: tuple(keys) for language, keys in sources.items()}
+
+    def _compile(self):
+        """返回取值函数 extract(unique_id, records)，生成Item的字段值"""
+        # 主字段用到的语言是必需的，缺少时记录无法映射
+        required = tuple(sorted({language for spec in self.fields.values() for language in spec.sources}))
+        getters = tuple((field, field_getter(spec)) for field, spec in self.fields.items())
+        translation_getters = tuple(
+            (language, tuple((field, field_getter(spec)) for field, spec in specs.items()))
+            for language, specs in self.translation_specs.items()
+        )
+        has_translations = bool(self.translations)
+
+        def extract(unique_id, records):
+            for language in required:
+                if language not in records:
+                    raise KeyError(language)
+            values = {field: getter(records) for field, getter in getters}
+            values['id'] = unique_id
+            if has_translations:
+                # 缺少某种语言的记录只是没有该语言的翻译
+                values['translations'] = {
+                    language: {field: getter(records) for field, getter in language_getters}
+                    for language, language_getters in translation_getters
+                    if records.get(language) is not None
+                }
+            return values
+        return extract
+
+    def map_batch(self, batch):
+        """映射一批 (unique_id, {语言: 原始记录})，返回 (items, rejects)"""
+        items = []
+        rejects = []
+        extract = self.extract
+        validate = self.validate
+        item_class = self.item_class
+        for unique_id, records in batch:
+            try:
+                values = extract(unique_id, records)
+            except (ValueError, TypeError, AttributeError, KeyError, IndexError) as e:
+                rejects.append(self._reject(unique_id, records, f'{type(e).__name__}: {e}'))
+                continue
+            reason = validate(values) if validate is not None else None
+            if reason:
+                rejects.append(self._reject(unique_id, records, reason))
+                continue
+            items.append(item_class(values))
+        return items, rejects
+
+    def _reject(self, unique_id, records, reason):
+        name = next((record.get('name') for record in records.values() if record.get('name')), None)
+        return {'id': unique_id, 'name': name, 'reason': reason}
@@ -0,0 +1,232 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# 默认的耗时分桶（秒），覆盖从单条SQL到整段下载的范围
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_number(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1, *labels):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self):
+        with self.lock:
+            items = sorted(self.values.items())
+        for labels, value in items:
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        # {标签值: [各分桶计数..., 总和, 次数]}
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def observe(self, amount, *labels):
+        with self.lock:
+            state = self.values.get(labels)
+            if state is None:
+                state = self.values[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if amount <= bound:
+                    state[index] += 1
+                    break
+            state[-2] += amount
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def samples(self):
+        with self.lock:
+            items = sorted((labels, list(state)) for labels, state in self.values.items())
+        for labels, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                yield (f'{self.name}_bucket',
+                       _format_labels(self.labelnames, labels, [('le', _format_number(float(bound)))]),
+                       cumulative)
+            yield f'{self.name}_sum', _format_labels(self.labelnames, labels), state[-2]
+            yield f'{self.name}_count', _format_labels(self.labelnames, labels), state[-1]
+
+class Registry:
+    """进程内的指标集合，按Prometheus文本格式输出"""
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def _register(self, metric_class, name, *args, **kwargs):
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = metric_class(name, *args, **kwargs)
+            return metric
+
+    def clear(self):
+        """清空所有指标的数值（保留已注册的指标）"""
+        with self.lock:
+            metrics = list(self.metrics.values())
+        for metric in metrics:
+            with metric.lock:
+                metric.values.clear()
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def families(self):
+        """{指标名: (说明, 类型, [样本行])}"""
+        with self.lock:
+            metrics = list(self.metrics.values())
+        return {
+            metric.name: (metric.documentation, metric.kind, [
+                f'{name}{labels} {_format_number(value)}' for name, labels, value in metric.samples()
+            ])
+            for metric in metrics
+        }
+
+    def render(self, extra_families=()):
+        """输出文本格式；extra_families为从其他进程的指标文件读取的指标，同名指标的样本合并"""
+        families = self.families()
+        for other in extra_families:
+            for name, (documentation, kind, samples) in other.items():
+                if name in families:
+                    families[name][2].extend(samples)
+                else:
+                    families[name] = (documentation, kind, list(samples))
+        lines = []
+        for name, (documentation, kind, samples) in families.items():
+            lines.append(f'# HELP {name} {documentation}')
+            lines.append(f'# TYPE {name} {kind}')
+            lines.extend(samples)
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """原子地写入指标文件（可由node_exporter的textfile收集器读取）"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(temp_path, path)
+
+def read_families(path):
+    """读取其他进程写入的指标文件，文件不存在时返回空"""
+    families = {}
+    try:
+        with open(path, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return families
+    documentation = {}
+    current = None
+    for line in lines:
+        if line.startswith('# HELP '):
+            name, _, text = line[7:].partition(' ')
+            documentation[name] = text
+        elif line.startswith('# TYPE '):
+            name, _, kind = line[7:].partition(' ')
+            current = families[name] = (documentation.get(name, ''), kind, [])
+        elif line and current is not None:
+            current[2].append(line)
+    return families
+
+registry = Registry()
+
+# 爬取各阶段：download（网络下载）、wait（DOWNLOAD_DELAY和AutoThrottle造成的排队等待）、
+# parse（JSON解析和按uniqueName归并）、merge（多语言记录映射为Item）
+CRAWL_STAGE_SECONDS = registry.histogram(
+    'warframe_crawl_stage_seconds', '爬取各阶段的耗时', ('spider', 'stage')
+)
+CRAWL_RESPONSES = registry.counter(
+    'warframe_crawl_responses_total', '下载的响应数', ('spider', 'status')
+)
+CRAWL_ITEMS = registry.counter(
+    'warframe_crawl_items_total', '产出的Item数', ('spider',)
+)
+# 入库各阶段：lookup（查询已有指纹）、fingerprint、upsert（写入数据和翻译）、commit
+INGEST_STAGE_SECONDS = registry.histogram(
+    'warframe_ingest_stage_seconds', '入库各阶段的耗时', ('table', 'stage')
+)
+INGEST_ROWS = registry.counter(
+    'warframe_ingest_rows_total', '入库的记录数', ('table', 'result')
+)
+HTTP_REQUEST_SECONDS = registry.histogram(
+    'warframe_http_request_seconds', 'Web接口的响应时间', ('method', 'route', 'status')
+)
+HTTP_REQUEST_QUERIES = registry.histogram(
+    'warframe_http_request_db_queries', '每个Web请求执行的SQL语句数', ('route',),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100)
+)
+DB_QUERIES = registry.counter(
+    'warframe_db_queries_total', '执行的SQL语句数', ('process', 'engine')
+)
+
+# 当前进程的角色（web / crawler），作为DB_QUERIES的标签
+_process_role = {'name': 'web'}
+# 当前线程正在处理的请求中已执行的SQL语句数
+_request_queries = threading.local()
+
+def set_process_role(name):
+    """设置进程角色；从Web进程fork出的爬虫进程会继承父进程的数值，切换角色时清空"""
+    if _process_role['name'] != name:
+        registry.clear()
+        _process_role['name'] = name
+
+def instrument_engine(engine, kind):
+    """统计引擎执行的SQL语句数"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def count_query(conn, cursor, statement, parameters, context, executemany):
+        DB_QUERIES.inc(1, _process_role['name'], kind)
+        count = getattr(_request_queries, 'count', None)
+        if count is not None:
+            _request_queries.count = count + 1
+
+def start_request_queries():
+    _request_queries.count = 0
+
+def finish_request_queries():
+    count = getattr(_request_queries, 'count', None)
+    _request_queries.count = None
+    return count or 0
@@ -0,0 +1,151 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+
+logger = logging.getLogger(__name__)
+
+class ConditionalRequestMiddleware:
+    """基于ETag/Last-Modified的条件请求缓存
+
+    每个URL保存最近一次响应的验证信息和压缩后的响应体，下次请求时发送
+    If-None-Match/If-Modified-Since。服务器返回304时不再传输数据，
+    响应的meta中会带上 not_modified 和缓存文件路径，由爬虫决定是否需要读取。
+
+    本次爬取下载的验证信息先暂存，只有爬虫正常结束且管道已将数据全部写入数据库时才
+    替换缓存；取消、出错或进程崩溃时丢弃，下次爬取仍会重新下载并入库。
+    """
+
+    def __init__(self, cache_dir, stats):
+        self.cache_dir = cache_dir
+        self.stats = stats
+        # {URL: (暂存的元数据文件, 暂存的响应体文件)}
+        self.pending = {}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool('HTTP_CONDITIONAL_CACHE_ENABLED'):
+            raise NotConfigured
+        middleware = cls(settings.get('HTTP_CONDITIONAL_CACHE_DIR'), crawler.stats)
+        middleware.allowed_codes = settings.getlist('HTTPERROR_ALLOWED_CODES')
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def _paths(self, url):
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return (os.path.join(self.cache_dir, f'{key}.json'),
+                os.path.join(self.cache_dir, f'{key}.body.gz'))
+
+    def _load_meta(self, url):
+        meta_path, body_path = self._paths(url)
+        if not (os.path.exists(meta_path) and os.path.exists(body_path)):
+            return None
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def process_request(self, request, spider):
+        if getattr(spider, 'force_refresh', False) or request.method != 'GET':
+            return None
+        meta = self._load_meta(request.url)
+        if not meta:
+            return None
+        if meta.get('etag'):
+            request.headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            request.headers['If-Modified-Since'] = meta['last_modified']
+        # 让304响应交给爬虫处理，同时保留原有允许的状态码
+        allowed = request.meta.get('handle_httpstatus_list', self.allowed_codes)
+        request.meta['handle_httpstatus_list'] = list(allowed) + [304]
+        return None
+
+    def process_response(self, request, response, spider):
+        if response.status == 304:
+            meta = self._load_meta(request.url)
+            if meta is None:
+                return response
+            request.meta['not_modified'] = True
+            request.meta['http_cache_path'] = self._paths(request.url)[1]
+            self.stats.inc_value('http_conditional/not_modified', spider=spider)
+            self.stats.inc_value('http_conditional/bytes_saved', meta.get('size', 0), spider=spider)
+            saved = max(meta.get('download_latency', 0) - request.meta.get('download_latency', 0), 0)
+            self.stats.inc_value('http_conditional/time_saved', saved, spider=spider)
+            return response
+
+        if response.status == 200:
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if etag or last_modified:
+                self._store(request, response, etag, last_modified)
+        return response
+
+    def _store(self, request, response, etag, last_modified):
+        """将验证信息和响应体写入暂存文件，爬取成功后再替换缓存"""
+        meta_path, body_path = (f'{path}.pending' for path in self._paths(request.url))
+        with gzip.open(body_path, 'wb') as f:
+            f.write(response.body)
+        meta = {
+            'url': request.url,
+            'etag': etag.decode('latin-1') if etag else None,
+            'last_modified': last_modified.decode('latin-1') if last_modified else None,
+            'size': len(response.body),
+            'download_latency': request.meta.get('download_latency', 0)
+        }
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        self.pending[request.url] = (meta_path, body_path)
+
+    def _ingested(self, reason):
+        """本次爬取是否正常结束且数据已全部入库"""
+        return (
+            reason == 'finished'
+            and self.stats.get_value('pipeline/flushed', False)
+            and not self.stats.get_value('spider_exceptions/count', 0)
+        )
+
+    def _commit_pending(self):
+        for url, pending_paths in self.pending.items():
+            # 先替换响应体再替换元数据，中途失败时旧的元数据不会指向不完整的缓存
+            meta_path, body_path = self._paths(url)
+            os.replace(pending_paths[1], body_path)
+            os.replace(pending_paths[0], meta_path)
+        self.pending.clear()
+
+    def _discard_pending(self):
+        for pending_paths in self.pending.values():
+            for path in pending_paths:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        self.pending.clear()
+
+    def spider_closed(self, spider, reason):
+        if self.pending:
+            if self._ingested(reason):
+                count = len(self.pending)
+                self._commit_pending()
+                logger.info(f"已更新 {count} 个URL的条件请求缓存")
+            else:
+                logger.warning(f"爬取未正常完成（{reason}），丢弃 {len(self.pending)} 个URL的条件请求缓存")
+                self._discard_pending()
+        count = self.stats.get_value('http_conditional/not_modified', 0, spider=spider)
+        if count:
+            saved_bytes = self.stats.get_value('http_conditional/bytes_saved', 0, spider=spider)
+            saved_time = self.stats.get_value('http_conditional/time_saved', 0, spider=spider)
+            logger.info(
+                f"条件请求命中 {count} 次，节省 {saved_bytes / 1024 / 1024:.1f} MB 下载，"
+                f"约 {saved_time:.1f} 秒"
+            )
+
+def load_cached_body(path):
+    """读取条件请求缓存中保存的响应体"""
+    with gzip.open(path, 'rb') as f:
+        return f.read()
@@ -0,0 +1,156 @@
+import base64
+import json
+import math
+import threading
+from collections import OrderedDict
+from sqlalchemy import tuple_, select, func, and_, or_, false
+from .versions import get_version
+
+# 缓存的总数条目上限
+TOTAL_CACHE_SIZE = 256
+# SQLite整数的取值范围（64位有符号整数）
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+class CursorError(ValueError):
+    """无效的分页游标"""
+
+def encode_cursor(values, direction):
+    """将排序键编码为不透明的游标字符串"""
+    payload = json.dumps({'k': list(values), 'd': direction}, separators=(',', ':'), ensure_ascii=False)
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def _valid_key(value):
+    """排序键只能是字符串、SQLite可以保存的整数、有限的浮点数或NULL"""
+    if value is None or isinstance(value, str):
+        return True
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, int):
+        return INT64_MIN <= value <= INT64_MAX
+    return isinstance(value, float) and math.isfinite(value)
+
+def decode_cursor(token, width=None):
+    """解析游标，返回 (排序键, 方向)；width为当前查询排序键的列数"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        values, direction = payload['k'], payload['d']
+    except (ValueError, KeyError, TypeError) as e:
+        raise CursorError(f'无效的分页游标: {str(e)}')
+    if direction not in ('next', 'prev') or not isinstance(values, list) or not all(map(_valid_key, values)):
+        raise CursorError('无效的分页游标')
+    if width is not None and len(values) != width:
+        raise CursorError('分页游标与当前查询不匹配')
+    return values, direction
+
+class TotalCache:
+    """按数据版本失效的总数缓存，数据未变化时翻页不再重复执行count()"""
+
+    def __init__(self, max_size=TOTAL_CACHE_SIZE):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, db, table_name, key, query):
+        version = get_version(db, table_name)
+        cache_key = (table_name, key)
+        with self.lock:
+            entry = self.entries.get(cache_key)
+            if entry and entry[0] == version:
+                self.entries.move_to_end(cache_key)
+                return entry[1]
+
+        total = db.execute(
+            select(func.count()).select_from(query.order_by(None).subquery())
+        ).scalar()
+        with self.lock:
+            self.entries[cache_key] = (version, total)
+            self.entries.move_to_end(cache_key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+        return total
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+total_cache = TotalCache()
+
+def _after(column, descending, value):
+    """排在value之后的条件；SQLite中NULL最小，升序时排在最前，降序时排在最后"""
+    if not descending:
+        return column.is_not(None) if value is None else column > value
+    return false() if value is None else or_(column < value, column.is_(None))
+
+def _equal(column, value):
+    return column.is_(None) if value is None else column == value
+
+def keyset_condition(sort_keys, descending, values):
+    """按各列的排序方向展开的游标条件：(a之后) OR (a相等 AND b之后) OR ...
+
+    排序键可能为NULL或方向不同时无法使用行值比较 tuple_(...) > tuple_(...)。
+    第一列的取值不为NULL时额外加上可以使用索引的范围条件。
+    """
+    clauses = []
+    for i, (column, desc, value) in enumerate(zip(sort_keys, descending, values)):
+        equal = [_equal(c, v) for c, v in zip(sort_keys[:i], values[:i])]
+        clauses.append(and_(*equal, _after(column, desc, value)))
+    condition = or_(*clauses)
+    first, first_desc, first_value = sort_keys[0], descending[0], values[0]
+    if first_value is not None:
+        # 冗余的范围条件，SQLite可以据此从索引中的游标位置开始扫描
+        bound = or_(first <= first_value, first.is_(None)) if first_desc else first >= first_value
+        condition = and_(bound, condition)
+    return condition
+
+def page_statement(query, sort_keys, page=1, per_page=10, cursor=None, descending=None):
+    """生成分页查询语句，返回 (statement, direction)，direction为None（偏移量分页）、'next'或'prev'
+
+    descending为各排序键是否降序，省略时全部升序。
+    """
+    keyed = query.add_columns(*[key.label(f'_sort_{i}') for i, key in enumerate(sort_keys)])
+    # 显式指定排序方向的排序键（按数值列排序）可能为NULL，游标条件需要按列展开
+    expanded = descending is not None
+    if descending is None:
+        descending = [False] * len(sort_keys)
+
+    if not cursor:
+        order = [key.desc() if desc else key for key, desc in zip(sort_keys, descending)]
+        return keyed.order_by(*order).offset((page - 1) * per_page).limit(per_page + 1), None
+
+    values, direction = decode_cursor(cursor, len(sort_keys))
+    if direction == 'prev':
+        # 向前翻页时按相反的方向查询，取出后再反转
+        descending = [not desc for desc in descending]
+    order = [key.desc() if desc else key for key, desc in zip(sort_keys, descending)]
+    if expanded:
+        condition = keyset_condition(sort_keys, descending, values)
+    elif direction == 'prev':
+        condition = tuple_(*sort_keys) < tuple_(*values)
+    else:
+        condition = tuple_(*sort_keys) > tuple_(*values)
+    return keyed.where(condition).order_by(*order).limit(per_page + 1), direction
+
+def paginate(db, query, sort_keys, page=1, per_page=10, cursor=None, descending=None):
+    """分页查询，支持偏移量分页和基于排序键的游标（keyset）分页
+
+    query为Core select()，sort_keys为唯一且稳定的排序列（最后一列须为主键），
+    descending为各排序键是否降序（省略时全部升序）。
+    返回 (rows, next_cursor, prev_cursor)，rows只包含query中原有的列。
+    """
+    statement, direction = page_statement(query, sort_keys, page, per_page, cursor, descending)
+    rows = db.execute(statement).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if direction == 'next':
+        has_next, has_prev = has_more, True
+    elif direction == 'prev':
+        rows = list(reversed(rows))
+        has_next, has_prev = True, has_more
+    else:
+        has_next, has_prev = has_more, page > 1
+
+    count = len(sort_keys)
+    next_cursor = encode_cursor(rows[-1][-count:], 'next') if rows and has_next else None
+    prev_cursor = encode_cursor(rows[0][-count:], 'prev') if rows and has_prev else None
+    return [row[:-count] for row in rows], next_cursor, prev_cursor
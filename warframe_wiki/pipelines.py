@@ -1,75 +1,227 @@
 import json
+import hashlib
+import logging
+import time
 from datetime import datetime
+from sqlalchemy import func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from .database import init_db, Warframe, Weapon, Mod
 from .items import WarframeItem, WeaponItem, ModItem
+from .exporters import export_all, export_json_document
+from .translations import replace_translations
+from .metrics import INGEST_STAGE_SECONDS, INGEST_ROWS
+
+logger = logging.getLogger(__name__)
+
+# 不参与内容指纹计算的字段
+FINGERPRINT_EXCLUDED_FIELDS = ('id', 'last_updated', 'content_hash')
+
+def content_fingerprint(data):
+    """计算记录的稳定内容指纹（只包含已映射的非空字段）"""
+    payload = {
+        key: value for key, value in data.items()
+        if key not in FINGERPRINT_EXCLUDED_FIELDS and value is not None
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()
 
 class WarframeWikiPipeline:
-    def __init__(self):
+    def __init__(self, bulk_mode=True, batch_size=500):
         self.db = init_db()
         self.item_models = {
             WarframeItem: Warframe,
             WeaponItem: Weapon,
             ModItem: Mod
         }
+        # 批量写入模式：按模型缓冲数据，达到批次大小后一次事务写入
+        self.bulk_mode = bulk_mode
+        self.batch_size = max(1, batch_size)
+        self.buffers = {model_class: [] for model_class in self.item_models.values()}
+        # 每种数据的写入统计：新增/更新/未变化
+        self.write_stats = {
+            model_class.__tablename__: {'inserted': 0, 'updated': 0, 'unchanged': 0}
+            for model_class in self.item_models.values()
+        }
+        self.stats = None
+        # 写入数据库是否失败过，失败时不认为本次爬取已完整入库
+        self.failed = False
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        pipeline = cls(
+            bulk_mode=crawler.settings.getbool('PIPELINE_BULK_MODE', True),
+            batch_size=crawler.settings.getint('PIPELINE_BATCH_SIZE', 500)
+        )
+        pipeline.stats = crawler.stats
+        return pipeline
 
     def process_item(self, item, spider):
         model_class = self.item_models[type(item)]
+
+        if self.bulk_mode:
+            buffer = self.buffers[model_class]
+            buffer.append(dict(item))
+            if len(buffer) >= self.batch_size:
+                self.flush(model_class)
+            return item
         
+        data = dict(item)
+        table_name = model_class.__tablename__
+        # 指纹包含各语言的翻译，任一语言的文本变化都会触发更新
+        with INGEST_STAGE_SECONDS.time(table_name, 'fingerprint'):
+            data['content_hash'] = content_fingerprint(data)
+        translations = data.pop('translations', None)
+        counters = self.write_stats[table_name]
+
         # 检查记录是否存在
-        existing = self.db.query(model_class).filter_by(id=item['id']).first()
+        with INGEST_STAGE_SECONDS.time(table_name, 'lookup'):
+            existing = self.db.query(model_class).filter_by(id=item['id']).first()
         
         if existing:
+            if existing.content_hash == data['content_hash']:
+                # 内容未变化，跳过写入
+                counters['unchanged'] += 1
+                INGEST_ROWS.inc(1, table_name, 'unchanged')
+                return item
             # 更新现有记录
-            for key, value in dict(item).items():
+            for key, value in data.items():
                 if value is not None:  # 只更新非空值
                     setattr(existing, key, value)
             existing.last_updated = datetime.utcnow()
+            result = 'updated'
         else:
             # 创建新记录
-            db_item = model_class(**dict(item))
+            db_item = model_class(**data)
             self.db.add(db_item)
+            result = 'inserted'
 
         try:
-            self.db.commit()
+            with INGEST_STAGE_SECONDS.time(table_name, 'upsert'):
+                replace_translations(self.db, table_name, [(data['id'], translations)])
+                self.db.flush()
+            with INGEST_STAGE_SECONDS.time(table_name, 'commit'):
+                self.db.commit()
         except Exception as e:
             self.db.rollback()
+            self.failed = True
             raise e
+        counters[result] += 1
+        INGEST_ROWS.inc(1, table_name, result)
+        self.publish_write_stats(table_name)
 
         return item
 
+    def flush(self, model_class=None):
+        """将缓冲的数据批量写入数据库（INSERT ... ON CONFLICT DO UPDATE）"""
+        model_classes = [model_class] if model_class else list(self.buffers)
+        for model_class in model_classes:
+            buffer = self.buffers[model_class]
+            if not buffer:
+                continue
+
+            table = model_class.__table__
+            columns = [c.name for c in table.columns]
+            now = datetime.utcnow()
+
+            # 批量查询已有记录的内容指纹
+            ids = list({data['id'] for data in buffer})
+            with INGEST_STAGE_SECONDS.time(table.name, 'lookup'):
+                known_hashes = dict(self.db.execute(
+                    select(table.c.id, table.c.content_hash).where(table.c.id.in_(ids))
+                ).all())
+
+            # 只写入新增或内容发生变化的记录，所有行使用相同的列集合
+            rows = []
+            translation_entries = []
+            results = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+            started = time.perf_counter()
+            for data in buffer:
+                fingerprint = content_fingerprint(data)
+                if data['id'] not in known_hashes:
+                    results['inserted'] += 1
+                elif known_hashes[data['id']] != fingerprint:
+                    results['updated'] += 1
+                else:
+                    results['unchanged'] += 1
+                    continue
+                known_hashes[data['id']] = fingerprint
+
+                row = {name: data.get(name) for name in columns}
+                row['content_hash'] = fingerprint
+                row['last_updated'] = now
+                rows.append(row)
+                translation_entries.append((data['id'], data.get('translations')))
+            INGEST_STAGE_SECONDS.observe(time.perf_counter() - started, table.name, 'fingerprint')
+
+            if not rows:
+                self.count_results(table.name, results)
+                buffer.clear()
+                continue
+
+            stmt = sqlite_insert(table)
+            # 与逐条模式保持一致：只用非空值覆盖已有字段
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.id],
+                set_={
+                    name: (stmt.excluded[name] if name == 'last_updated'
+                           else func.coalesce(stmt.excluded[name], table.c[name]))
+                    for name in columns if name != 'id'
+                }
+            )
+
+            try:
+                with INGEST_STAGE_SECONDS.time(table.name, 'upsert'):
+                    self.db.execute(stmt, rows)
+                    replace_translations(self.db, table.name, translation_entries)
+                with INGEST_STAGE_SECONDS.time(table.name, 'commit'):
+                    self.db.commit()
+            except Exception as e:
+                self.db.rollback()
+                self.failed = True
+                raise e
+            self.count_results(table.name, results)
+            buffer.clear()
+
+    def count_results(self, table_name, results):
+        """累计一批记录的写入结果"""
+        counters = self.write_stats[table_name]
+        for result, count in results.items():
+            counters[result] += count
+            if count:
+                INGEST_ROWS.inc(count, table_name, result)
+        self.publish_write_stats(table_name)
+
     def close_spider(self, spider):
-        self.db.close()
-
-    def export_to_json(self, file_path):
-        """导出数据为JSON格式"""
-        data = {}
-        for item_class, model_class in self.item_models.items():
-            items = self.db.query(model_class).all()
-            data[model_class.__tablename__] = [
-                {c.name: getattr(item, c.name) 
-                 for c in item.__table__.columns}
-                for item in items
-            ]
-        
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+        try:
+            self.flush()
+        finally:
+            self.db.close()
+        self.report_write_stats(spider)
+        # 条件请求缓存据此判断是否可以保存本次下载的验证信息
+        if self.stats and not self.failed:
+            self.stats.set_value('pipeline/flushed', True)
 
-    def export_to_csv(self, directory):
-        """导出数据为CSV格式，每种类型一个文件"""
-        import pandas as pd
-        import os
-        
-        os.makedirs(directory, exist_ok=True)
-        
-        for item_class, model_class in self.item_models.items():
-            items = self.db.query(model_class).all()
-            data = [
-                {c.name: getattr(item, c.name) 
-                 for c in item.__table__.columns}
-                for item in items
-            ]
-            
-            if data:
-                df = pd.DataFrame(data)
-                file_path = os.path.join(directory, f"{model_class.__tablename__}.csv")
-                df.to_csv(file_path, index=False, encoding='utf-8') 
\ No newline at end of file
+    def publish_write_stats(self, table_name):
+        """将写入统计同步到爬虫统计中，任务进度可以实时读取"""
+        if self.stats:
+            for key, value in self.write_stats[table_name].items():
+                self.stats.set_value(f'pipeline/{table_name}/{key}', value)
+
+    def report_write_stats(self, spider):
+        """输出本次爬取的新增/更新/未变化数量"""
+        for table_name, counters in self.write_stats.items():
+            if not any(counters.values()):
+                continue
+            logger.info(
+                f"{table_name} 写入统计 - 新增: {counters['inserted']}, "
+                f"更新: {counters['updated']}, 未变化: {counters['unchanged']}"
+            )
+            self.publish_write_stats(table_name)
+
+    def export_to_json(self, file_path, compress=False):
+        """导出数据为JSON格式（流式写入）"""
+        return export_json_document(file_path, compress=compress, db=self.db)
+
+    def export_to_csv(self, directory, compress=False):
+        """导出数据为CSV格式，每种类型一个文件（流式写入）"""
+        return export_all(directory, fmt='csv', compress=compress, db=self.db)
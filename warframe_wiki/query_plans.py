@@ -0,0 +1,89 @@
+import logging
+from sqlalchemy import select, func, text
+from sqlalchemy.dialects import sqlite
+from .read_api import READ_MODELS, build_list_query
+from .filters import numeric_columns
+from .pagination import page_statement, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+# 检查查询计划时只查询主键和名称
+PLAN_COLUMNS = ('id', 'name_en')
+
+def explain(db, statement):
+    """返回语句的 EXPLAIN QUERY PLAN 结果（每一步的描述）"""
+    sql = str(statement.compile(dialect=sqlite.dialect(), compile_kwargs={'literal_binds': True}))
+    return [row[-1] for row in db.execute(text(f'EXPLAIN QUERY PLAN {sql}'))]
+
+def plan_cases(column, other):
+    """一个数值列的过滤和排序查询，产出 (名称, filters, sort, 游标值, 游标方向)
+
+    other为同一张表的另一个数值列，用于按一列过滤、按另一列排序以及多列排序的组合。
+    """
+    yield f'{column} eq', [(column, 'eq', 1)], [], None, None
+    yield f'{column} range', [(column, 'gte', 1), (column, 'lt', 100)], [], None, None
+    yield f'{column} in', [(column, 'in', (1, 2, 3))], [], None, None
+    yield f'{column} filter+cursor', [(column, 'gte', 1)], [], ['/x'], 'next'
+    for descending in (False, True):
+        label = f"sort {'-' if descending else ''}{column}"
+        sort = [(column, descending)]
+        yield label, [], sort, None, None
+        for value in (1, None):
+            for direction in ('next', 'prev'):
+                yield f'{label} cursor={value} {direction}', [], sort, [value, '/x'], direction
+        # 过滤后排序：同一列时沿索引的范围顺序读取，不同列时用过滤列的索引定位后再排序
+        yield f'{column} gte + {label}', [(column, 'gte', 1)], sort, None, None
+        yield f'{other} gte + {label}', [(other, 'gte', 1)], sort, None, None
+        for direction in ('next', 'prev'):
+            yield f'{other} in + {label} cursor {direction}', [(other, 'in', (1, 2))], sort, [1, '/x'], direction
+        # 多列排序：第一列沿索引顺序读取，同值的部分再排序（USE TEMP B-TREE FOR RIGHT PART OF ORDER BY）
+        multi = [(column, descending), (other, not descending)]
+        label = f"sort {'-' if descending else ''}{column},{'' if descending else '-'}{other}"
+        yield label, [], multi, None, None
+        for direction in ('next', 'prev'):
+            yield f'{label} cursor {direction}', [], multi, [1, None, '/x'], direction
+        yield f'{other} lte + {label}', [(other, 'lte', 5)], multi, None, None
+
+def plan_problems(table_name, plan, filters, sort):
+    """找出查询计划中的全表扫描
+
+    有过滤条件时必须用过滤列的索引定位（SEARCH），没有过滤条件时只允许沿第一个排序列的索引顺序扫描；
+    多列排序时其余排序列只对第一列同值的行排序（RIGHT PART OF ORDER BY），不视为问题。
+    """
+    problems = []
+    ordered_scan = f'SCAN {table_name} USING INDEX ix_{table_name}_{sort[0][0]}' if sort else None
+    for detail in plan:
+        if detail.startswith(f'SCAN {table_name}') and detail != ordered_scan:
+            problems.append(detail)
+    if filters:
+        searches = [
+            f'SEARCH {table_name} USING {kind}INDEX ix_{table_name}_{name} '
+            for name, _, _ in filters for kind in ('', 'COVERING ')
+        ]
+        if not any(detail.startswith(prefix) for detail in plan for prefix in searches):
+            problems.append('未使用过滤列的索引')
+    return problems
+
+def check_query_plans(db):
+    """检查所有数值列的过滤、排序、游标分页和计数查询都使用索引，返回 [(表名, 查询, 计划, 问题)]"""
+    failures = []
+    for model, _ in READ_MODELS.values():
+        table_name = model.__tablename__
+        columns = numeric_columns(model)
+        for column, other in zip(columns, columns[1:] + columns[:1]):
+            for name, filters, sort, values, direction in plan_cases(column, other):
+                query, sort_keys, descending = build_list_query(model, PLAN_COLUMNS, '', filters, sort)
+                cursor = encode_cursor(values, direction) if values else None
+                statement, _ = page_statement(query, sort_keys, 1, 10, cursor, descending)
+                statements = [(name, statement)]
+                if filters and not values:
+                    # 过滤条件下的总数
+                    count = select(func.count()).select_from(query.order_by(None).subquery())
+                    statements.append((f'{name} count', count))
+                for label, stmt in statements:
+                    plan = explain(db, stmt)
+                    problems = plan_problems(table_name, plan, filters, sort)
+                    logger.debug(f"{table_name} {label}: {' | '.join(plan)}")
+                    if problems:
+                        failures.append((table_name, label, plan, problems))
+    return failures
@@ -0,0 +1,123 @@
+from sqlalchemy import select, literal_column, String
+from .database import Warframe, Weapon, Mod
+from .search import apply_search
+from .filters import parse_filters, parse_sort, apply_filters, sort_columns, filter_key
+from .pagination import paginate, total_cache
+from .versions import get_table_stats
+from .serializers import resolve_fields, split_fields, select_columns, serialize_rows
+from .translations import attach_translations
+from .replica import replica
+from .suggest import suggest_index, DEFAULT_LIMIT, MAX_LIMIT
+
+# 列表/搜索接口的数据类型 {路径: (模型, 日志中的名称)}
+READ_MODELS = {
+    'warframes': (Warframe, 'Warframes'),
+    'weapons': (Weapon, 'Weapons'),
+    'mods': (Mod, 'Mods'),
+}
+
+def int_arg(args, name, default):
+    """读取整数参数，缺少或无效时使用默认值（与Flask的 args.get(type=int) 一致）"""
+    try:
+        return int(args.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+def stats_payload(db):
+    """/api/stats 的响应内容"""
+    # 统计信息由触发器在写入时增量维护，一次查询即可读取；启用只读副本时从当前快照读取
+    table_stats = replica.table_stats() if replica.active else get_table_stats(db)
+    stats = {
+        data_type: dict(table_stats.get(data_type, {'count': 0, 'last_updated': None}))
+        for data_type in READ_MODELS
+    }
+
+    # 格式化时间
+    for category in stats.values():
+        if category['last_updated']:
+            category['last_updated'] = category['last_updated'].strftime('%Y-%m-%d %H:%M:%S')
+    return {'success': True, 'data': stats}
+
+def build_list_query(model, columns, search='', filters=(), sort=()):
+    """列表查询及其排序键，返回 (query, sort_keys, descending)
+
+    descending为None时所有排序键升序且不为NULL（主键或相关度），分页时使用行值比较。
+    """
+    query = select(*select_columns(model, columns)).select_from(model.__table__)
+    rank = None
+    if search:
+        query, rank = apply_search(query, model, search)
+    query = apply_filters(query, model, filters)
+    if sort:
+        # 按指定的数值列排序，主键作为最后的排序键。有过滤条件且第一个排序列未被过滤时，
+        # 先用过滤列的索引定位再排序，而不是沿排序列的索引扫描整张表逐行检查过滤条件
+        indexed = not filters or sort[0][0] in {name for name, _, _ in filters}
+        sort_keys, descending = sort_columns(model, sort, indexed)
+    elif rank is not None:
+        # 稳定的排序键：检索时按相关度，否则按主键
+        sort_keys, descending = [rank, model.__table__.c.id], None
+    elif filters:
+        # 一元+使SQLite不沿主键索引顺序扫描全表，而是先用过滤列的索引定位再排序
+        sort_keys, descending = [literal_column(f'+{model.__tablename__}.id', String)], None
+    else:
+        sort_keys, descending = [model.__table__.c.id], None
+    return query, sort_keys, descending
+
+def query_rows(db, model, names, columns, translated, search, page, per_page, cursor, filters=(), sort=()):
+    """在SQLite中检索、过滤、排序和分页，返回 (行字典列表, 总数, next_cursor, prev_cursor)"""
+    query, sort_keys, descending = build_list_query(model, columns, search, filters, sort)
+
+    total = total_cache.get(db, model.__tablename__, (search, filter_key(filters)), query)
+    rows, next_cursor, prev_cursor = paginate(db, query, sort_keys, page, per_page, cursor, descending)
+
+    data = serialize_rows(columns, rows)
+    if translated:
+        attach_translations(db, model.__tablename__, data, translated)
+        data = [{name: row[name] for name in names} for row in data]
+    return data, total, next_cursor, prev_cursor
+
+def list_payload(db, model, args):
+    """列表/搜索接口的响应内容：按?fields=和?lang=只查询需要的列，不经过ORM
+
+    ?filter=和?sort=按数值列过滤和排序（见 filters.parse_filters）。
+    args为查询参数（支持 .get(name, default) 的映射），Flask和aiohttp服务共用。
+    """
+    page = int_arg(args, 'page', 1)
+    per_page = int_arg(args, 'per_page', 10)
+    search = ' '.join(args.get('search', '').split())
+    cursor = args.get('cursor')
+    names = resolve_fields(model, args.get('fields'), args.get('lang'))
+    # en/zh在数据表列中，其他语言按主键索引从translations表读取
+    columns, translated = split_fields(model, names)
+    filters = parse_filters(model, args.get('filter'))
+    sort = parse_sort(model, args.get('sort'))
+
+    if replica.active:
+        # 只读副本：在内存快照中完成检索、排序和分页
+        data, total, next_cursor, prev_cursor = replica.query(
+            model.__tablename__, names, translated, search, page, per_page, cursor, filters, sort
+        )
+    else:
+        data, total, next_cursor, prev_cursor = query_rows(
+            db, model, names, columns, translated, search, page, per_page, cursor, filters, sort
+        )
+
+    return {
+        'success': True,
+        'data': data,
+        'total': total,
+        'page': page,
+        'per_page': per_page,
+        'next_cursor': next_cursor,
+        'prev_cursor': prev_cursor
+    }
+
+def suggest_payload(args):
+    """/api/suggest 的响应内容：?q=为名称前缀，?type=限定数据类型（逗号分隔），?limit=为返回条数"""
+    limit = min(int_arg(args, 'limit', DEFAULT_LIMIT), MAX_LIMIT)
+    data_types = [name.strip() for name in args.get('type', '').split(',') if name.strip()]
+    unknown = [name for name in data_types if name not in READ_MODELS]
+    if unknown:
+        raise ValueError(f"未知的数据类型: {', '.join(unknown)}")
+    data = suggest_index.lookup(args.get('q', ''), limit, set(data_types) or None)
+    return {'success': True, 'data': data}
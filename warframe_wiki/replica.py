@@ -0,0 +1,441 @@
+import logging
+import math
+import re
+import string
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from sqlalchemy import select
+from .database import Warframe, Weapon, Mod, DataVersion, Translation, init_read_db
+from .search import SEARCH_FIELDS, search_terms, fts_applicable
+from .pagination import encode_cursor, decode_cursor, CursorError
+from .filters import FILTER_OPERATORS, filter_key
+from .serializers import HIDDEN_FIELDS, serialize_rows
+from .settings import READ_REPLICA_REFRESH_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+# 副本中的数据表
+REPLICA_MODELS = {model.__tablename__: model for model in (Warframe, Weapon, Mod)}
+
+# 每个快照缓存的检索结果条目上限
+SEARCH_CACHE_SIZE = 128
+
+# FTS5 bm25() 的参数
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# 检索文本中单元格之间的分隔符（检索词按空白拆分，不会包含该字符）
+_SEPARATOR = '\x00'
+# SQLite的lower()和LIKE只对ASCII字母忽略大小写
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+def _fold(text):
+    """与trigram分词器（case_sensitive=0）一致的大小写折叠，保持字符位置不变"""
+    folded = text.lower()
+    if len(folded) == len(text):
+        return folded
+    return ''.join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+def _like_regex(term):
+    """LIKE模式中的 % 和 _ 转换为正则表达式"""
+    return re.compile(''.join(
+        '.*' if c == '%' else '.' if c == '_' else re.escape(c) for c in term
+    ), re.DOTALL)
+
+def _column_array(values):
+    """没有NULL的整数/浮点数列使用array保存，其余列使用元组"""
+    if values and all(type(value) is int for value in values):
+        try:
+            return array('q', values)
+        except OverflowError:
+            return tuple(values)
+    if values and all(type(value) is float for value in values):
+        return array('d', values)
+    return tuple(values)
+
+def order_value(value, descending):
+    """可以直接比较的排序值：与SQLite一致，NULL最小，升序时排在最前，降序时排在最后"""
+    if descending:
+        return (1,) if value is None else (0, -value)
+    return (0,) if value is None else (1, value)
+
+def sort_order_key(sort):
+    """按数值列排序时，由游标值 (排序列..., 主键) 计算在有序列表中的位置键"""
+    def order_key(values):
+        return tuple(order_value(value, desc) for value, (_, desc) in zip(values, sort)) + (values[-1],)
+    return order_key
+
+def paginate_sorted(keys, width, page=1, per_page=10, cursor=None, order=None, order_key=None):
+    """在已排序的排序键列表上分页，与 pagination.paginate 的结果和游标一致
+
+    width为排序键的列数，返回 (位置列表, next_cursor, prev_cursor)。
+    keys中的值不能直接比较时（按数值列排序），order为按顺序排列的可比较的键，
+    order_key将游标中的排序键转换为可比较的键。
+    """
+    count = len(keys)
+    if order is None:
+        order, order_key = keys, tuple
+    # 与SQLite一致：负数LIMIT表示不限制，负数OFFSET按0处理
+    limit = per_page + 1
+
+    if cursor:
+        values, direction = decode_cursor(cursor, width)
+        # 主键列为TEXT类型，与SQLite的类型亲和性一致，数值按文本比较
+        if isinstance(values[-1], (int, float)) and not isinstance(values[-1], bool):
+            values[-1] = str(values[-1])
+        try:
+            target = order_key(values)
+            if direction == 'next':
+                start = bisect_right(order, target)
+                stop = count if limit < 0 else min(start + limit, count)
+                positions = list(range(start, stop))
+                has_more = len(positions) > per_page
+                positions = positions[:per_page]
+                has_next, has_prev = has_more, True
+            else:
+                stop = bisect_left(order, target)
+                start = 0 if limit < 0 else max(stop - limit, 0)
+                positions = list(range(stop - 1, start - 1, -1))
+                has_more = len(positions) > per_page
+                positions = list(reversed(positions[:per_page]))
+                has_next, has_prev = True, has_more
+        except TypeError:
+            raise CursorError('分页游标与当前查询不匹配')
+    else:
+        start = max((page - 1) * per_page, 0)
+        stop = count if limit < 0 else min(start + limit, count)
+        positions = list(range(start, stop))
+        has_next = len(positions) > per_page
+        positions = positions[:per_page]
+        has_prev = page > 1
+
+    next_cursor = encode_cursor(keys[positions[-1]], 'next') if positions and has_next else None
+    prev_cursor = encode_cursor(keys[positions[0]], 'prev') if positions and has_prev else None
+    return positions, next_cursor, prev_cursor
+
+class TableSnapshot:
+    """一张数据表在某个数据版本下的内存副本，创建后不再修改
+
+    各列按主键顺序保存为列数组，检索字段拼接为一个字符串，检索时在整段文本上查找后按偏移量定位到行和字段，
+    全文检索的相关度按FTS5 bm25()的公式计算，结果和排序与SQLite一致。
+    """
+
+    def __init__(self, table_name, version, columns, translations):
+        self.table_name = table_name
+        self.version = version
+        # {列名: 按主键排序的列值}
+        self.columns = columns
+        # {语言: {字段: {id: 文本}}}
+        self.translations = translations
+        self.ids = columns['id']
+        self.id_keys = [(entity_id,) for entity_id in self.ids]
+        self.search_cache = OrderedDict()
+        self.lock = threading.Lock()
+        self._build_search_index()
+
+    @classmethod
+    def load(cls, db, model, version):
+        table = model.__table__
+        names = [c.name for c in table.columns if c.name not in HIDDEN_FIELDS]
+        rows = serialize_rows(names, db.execute(
+            select(*[table.c[name] for name in names]).order_by(table.c.id)
+        ))
+        columns = {name: _column_array([row[name] for row in rows]) for name in names}
+
+        translations = {}
+        query = select(Translation.entity_id, Translation.lang, Translation.field, Translation.value) \
+            .where(Translation.entity_type == table.name)
+        for entity_id, lang, field, value in db.execute(query):
+            translations.setdefault(lang, {}).setdefault(field, {})[entity_id] = value
+        return cls(table.name, version, columns, translations)
+
+    def _build_search_index(self):
+        fields = [self.columns[name] for name in SEARCH_FIELDS]
+        self.width = len(fields)
+        # 每个单元格（行×检索字段）在检索文本中的起始位置，最后一项为文本长度
+        starts = array('q')
+        sizes = array('q')
+        parts = []
+        position = 0
+        for row in range(len(self.ids)):
+            size = 0
+            for column in fields:
+                value = column[row]
+                length = len(value) if value else 0
+                starts.append(position)
+                parts.append(value)
+                position += length + 1
+                # trigram分词器为每个长度为n的字段产生n-2个词元
+                size += max(length - 2, 0)
+            sizes.append(size)
+        starts.append(position)
+        text = ''.join((value or '') + _SEPARATOR for value in parts)
+        # 各单元格的原始值（NULL与空字符串在LIKE中的结果不同）
+        self.cells = parts
+        self.cell_starts = starts
+        self.doc_sizes = sizes
+        self.avgdl = sum(sizes) / len(sizes) if sizes else 0.0
+        self.fts_text = _fold(text)
+        self.like_text = text.translate(_ASCII_LOWER)
+
+    def _term_hits(self, term):
+        """{行号: [各检索字段中的出现次数]}，出现可以重叠（与trigram短语匹配一致）"""
+        hits = {}
+        text = self.fts_text
+        position = text.find(term)
+        while position != -1:
+            cell = bisect_right(self.cell_starts, position) - 1
+            row, field = divmod(cell, self.width)
+            counts = hits.get(row)
+            if counts is None:
+                counts = hits[row] = [0] * self.width
+            counts[field] += 1
+            position = text.find(term, position + 1)
+        return hits
+
+    def _like_rows(self, term):
+        """任一检索字段 LIKE '%term%' 的行号"""
+        term = term.translate(_ASCII_LOWER)
+        if '%' in term or '_' in term:
+            pattern = _like_regex(term)
+            return {
+                cell // self.width for cell, value in enumerate(self.cells)
+                if value is not None and pattern.search(value.translate(_ASCII_LOWER))
+            }
+        rows = set()
+        text = self.like_text
+        position = text.find(term)
+        while position != -1:
+            row = (bisect_right(self.cell_starts, position) - 1) // self.width
+            rows.add(row)
+            # 同一行只需匹配一次，从下一行开始继续查找
+            position = text.find(term, self.cell_starts[(row + 1) * self.width])
+        return rows
+
+    def _ranked(self, terms):
+        per_term = [self._term_hits(_fold(t)) for t in terms]
+        matched = set(per_term[0]).intersection(*per_term[1:])
+        total = len(self.ids)
+        idf = []
+        for hits in per_term:
+            value = math.log((total - len(hits) + 0.5) / (len(hits) + 0.5))
+            idf.append(value if value > 0.0 else 1e-6)
+        weights = tuple(SEARCH_FIELDS.values())
+
+        ranked = []
+        for row in matched:
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_sizes[row] / self.avgdl)
+            score = 0.0
+            for value, hits in zip(idf, per_term):
+                freq = 0.0
+                for weight, count in zip(weights, hits[row]):
+                    freq += weight * count
+                score += value * ((freq * (BM25_K1 + 1.0)) / (freq + norm))
+            ranked.append((-1.0 * score, self.ids[row], row))
+        ranked.sort()
+        return [(rank, entity_id) for rank, entity_id, _ in ranked], [row for _, _, row in ranked]
+
+    def search(self, term):
+        """返回检索结果的 (排序键列表, 行号列表)，与 search.apply_search 的匹配和排序一致"""
+        with self.lock:
+            cached = self.search_cache.get(term)
+            if cached is not None:
+                self.search_cache.move_to_end(term)
+                return cached
+
+        terms = search_terms(term)
+        if any(_SEPARATOR in t for t in terms):
+            result = ([], [])
+        elif fts_applicable(terms):
+            result = self._ranked(terms)
+        else:
+            matched = None
+            for t in terms or [term]:
+                rows = self._like_rows(t)
+                matched = rows if matched is None else matched & rows
+            rows = sorted(matched)
+            result = ([self.id_keys[row] for row in rows], rows)
+
+        with self.lock:
+            self.search_cache[term] = result
+            while len(self.search_cache) > SEARCH_CACHE_SIZE:
+                self.search_cache.popitem(last=False)
+        return result
+
+    def _filter_rows(self, filters):
+        """满足所有过滤条件的行号，NULL不满足任何条件"""
+        rows = range(len(self.ids))
+        for name, op, value in filters:
+            column = self.columns[name]
+            if op == 'in':
+                values = set(value)
+                rows = [row for row in rows if column[row] in values]
+            else:
+                compare = FILTER_OPERATORS[op]
+                rows = [row for row in rows if column[row] is not None and compare(column[row], value)]
+        return set(rows)
+
+    def select(self, search='', filters=(), sort=()):
+        """检索、过滤和排序，返回 (排序键列表, 行号列表, 可比较的排序键列表)
+
+        排序键与 read_api.build_list_query 一致：指定sort时为 (各排序列..., 主键)，
+        否则检索时为 (相关度, 主键)、不检索时为 (主键,)；后两种情况排序键本身可以比较，第三项为None。
+        """
+        if search:
+            keys, rows = self.search(search)
+        else:
+            keys, rows = self.id_keys, range(len(self.ids))
+        if not filters and not sort:
+            return keys, rows, None
+
+        cache_key = (search, filter_key(filters), tuple(sort))
+        with self.lock:
+            cached = self.search_cache.get(cache_key)
+            if cached is not None:
+                self.search_cache.move_to_end(cache_key)
+                return cached
+
+        if filters:
+            allowed = self._filter_rows(filters)
+            selected = [(key, row) for key, row in zip(keys, rows) if row in allowed]
+            keys, rows = [key for key, _ in selected], [row for _, row in selected]
+        order = None
+        if sort:
+            columns = [(self.columns[name], desc) for name, desc in sort]
+            ranked = sorted(
+                (
+                    tuple(order_value(column[row], desc) for column, desc in columns) + (self.ids[row],),
+                    tuple(column[row] for column, _ in columns) + (self.ids[row],),
+                    row,
+                )
+                for row in rows
+            )
+            order = [item[0] for item in ranked]
+            keys = [item[1] for item in ranked]
+            rows = [item[2] for item in ranked]
+        result = (keys, rows, order)
+
+        with self.lock:
+            self.search_cache[cache_key] = result
+            while len(self.search_cache) > SEARCH_CACHE_SIZE:
+                self.search_cache.popitem(last=False)
+        return result
+
+    def rows(self, indices, names, translated):
+        """按names的顺序生成行字典，translated为 [(字段名, 翻译字段, 语言)]，缺少的翻译为None"""
+        sources = {name: self.columns[name] for name in names if name in self.columns}
+        texts = {
+            name: self.translations.get(lang, {}).get(field, {})
+            for name, field, lang in translated
+        }
+        data = []
+        for row in indices:
+            entity_id = self.ids[row]
+            data.append({
+                name: sources[name][row] if name in sources else texts[name].get(entity_id)
+                for name in names
+            })
+        return data
+
+class ReadReplica:
+    """进程内的只读数据副本
+
+    启动时将各数据表加载为不可变的快照，后台线程按固定间隔检查data_versions表，
+    某张表的版本变化后重新加载该表并整体替换快照引用，正在处理的请求继续使用旧快照。
+    列表/搜索/统计接口和响应缓存的版本号都从当前快照读取，请求处理过程中不查询SQLite。
+    """
+
+    def __init__(self, models=REPLICA_MODELS, refresh_interval=READ_REPLICA_REFRESH_INTERVAL,
+                 session_factory=init_read_db):
+        self.models = models
+        self.refresh_interval = refresh_interval
+        self.session_factory = session_factory
+        # {'versions': {表名: 版本}, 'stats': {表名: 统计信息}, 'snapshots': {表名: TableSnapshot}}
+        self.state = None
+        self.lock = threading.Lock()
+        self.thread = None
+
+    @property
+    def active(self):
+        return self.state is not None
+
+    def refresh(self):
+        """检查数据版本并重新加载变化的表，返回重新加载的表名"""
+        with self.lock:
+            started = time.perf_counter()
+            previous = self.state['snapshots'] if self.state else {}
+            db = self.session_factory()
+            try:
+                # 先读取版本再读取数据：加载期间有新的写入时，快照的版本号只会偏旧，下次检查时会再次加载
+                rows = db.execute(select(
+                    DataVersion.table_name, DataVersion.version, DataVersion.row_count, DataVersion.last_updated
+                )).all()
+                versions = {table_name: version for table_name, version, _, _ in rows}
+                stats = {
+                    table_name: {'count': row_count or 0, 'last_updated': last_updated}
+                    for table_name, _, row_count, last_updated in rows
+                }
+                if self.state and versions == self.state['versions']:
+                    return []
+                snapshots = {}
+                changed = []
+                for table_name, model in self.models.items():
+                    version = versions.get(table_name, 0)
+                    snapshot = previous.get(table_name)
+                    if snapshot is None or snapshot.version != version:
+                        snapshot = TableSnapshot.load(db, model, version)
+                        changed.append(table_name)
+                    snapshots[table_name] = snapshot
+            finally:
+                db.close()
+            self.state = {'versions': versions, 'stats': stats, 'snapshots': snapshots}
+        if changed:
+            loaded = ', '.join(f'{name}({len(snapshots[name].ids)}条)' for name in changed)
+            logger.info(f'只读副本已加载: {loaded}，耗时 {time.perf_counter() - started:.2f} 秒')
+        return changed
+
+    def run(self):
+        while True:
+            time.sleep(self.refresh_interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f'刷新只读副本失败: {str(e)}')
+
+    def start(self):
+        """加载初始快照并启动后台刷新线程（重复调用无副作用）"""
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.refresh()
+        self.thread = threading.Thread(target=self.run, name='read-replica', daemon=True)
+        self.thread.start()
+
+    def versions(self, tables):
+        versions = self.state['versions']
+        return tuple(versions.get(table, 0) for table in tables)
+
+    def table_stats(self):
+        return self.state['stats']
+
+    def query(self, table_name, names, translated, search='', page=1, per_page=10, cursor=None,
+              filters=(), sort=()):
+        """列表/搜索查询，返回 (行字典列表, 总数, next_cursor, prev_cursor)"""
+        snapshot = self.state['snapshots'][table_name]
+        keys, rows, order = snapshot.select(search, filters, sort)
+        if sort:
+            width, order_key = len(sort) + 1, sort_order_key(sort)
+        elif search:
+            # 全文检索按 (相关度, 主键) 排序，LIKE匹配按主键排序
+            width, order_key = (2 if fts_applicable(search_terms(search)) else 1), None
+        else:
+            width, order_key = 1, None
+        positions, next_cursor, prev_cursor = paginate_sorted(
+            keys, width, page, per_page, cursor, order, order_key
+        )
+        data = snapshot.rows([rows[position] for position in positions], names, translated)
+        return data, len(keys), next_cursor, prev_cursor
+
+replica = ReadReplica()
@@ -0,0 +1,124 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+from .database import init_read_db
+from .versions import get_versions
+from .replica import replica
+from .settings import RESPONSE_CACHE_SIZE, RESPONSE_CACHE_MAX_BYTES
+
+class ResponseCache:
+    """GET接口的响应缓存
+
+    按请求路径和查询参数缓存响应体，条目记录相关数据表的版本号，
+    版本变化（爬虫写入或编辑数据）后自动失效。超出容量时按LRU淘汰。
+    """
+
+    def __init__(self, max_entries=RESPONSE_CACHE_SIZE, max_bytes=RESPONSE_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(path, args):
+        """缓存键：请求路径和按名称排序的查询参数，args为 (名称, 值) 序列
+
+        参数值保持原样（接口按原始值校验参数），同名参数保持请求中的顺序（接口只取第一个）。
+        """
+        return (path, tuple(sorted(args, key=lambda item: item[0])))
+
+    @staticmethod
+    def current_versions(tables):
+        if replica.active:
+            # 启用只读副本时响应内容来自副本，按副本快照的版本缓存
+            return replica.versions(tables)
+        db = init_read_db()
+        try:
+            all_versions = get_versions(db)
+        finally:
+            db.close()
+        return tuple(all_versions.get(table, 0) for table in tables)
+
+    def get(self, key, versions):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry['versions'] != versions:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, versions, body, mimetype, etag):
+        if len(body) > self.max_bytes:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old:
+                self.size -= len(old['body'])
+            self.entries[key] = {'versions': versions, 'body': body, 'mimetype': mimetype, 'etag': etag}
+            self.size += len(body)
+            while self.entries and (len(self.entries) > self.max_entries or self.size > self.max_bytes):
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted['body'])
+
+    def store(self, key, versions, body, mimetype):
+        """缓存成功的响应体，返回包含ETag的条目"""
+        entry = {'body': body, 'mimetype': mimetype, 'etag': hashlib.sha1(body).hexdigest()}
+        self.put(key, versions, body, mimetype, entry['etag'])
+        return entry
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def cached(self, tables):
+        """缓存视图函数的成功响应，并支持ETag/304"""
+        from flask import request, make_response
+
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                versions = self.current_versions(tables)
+                key = self.make_key(request.path, request.args.items(multi=True))
+
+                entry = self.get(key, versions)
+                if entry is None:
+                    response = make_response(view(*args, **kwargs))
+                    payload = response.get_json(silent=True) if response.is_json else None
+                    if response.status_code != 200 or not (payload and payload.get('success')):
+                        return response
+                    entry = self.store(key, versions, response.get_data(), response.mimetype)
+
+                if request.if_none_match.contains(entry['etag']):
+                    response = make_response('', 304)
+                else:
+                    response = make_response(entry['body'])
+                    response.mimetype = entry['mimetype']
+                response.set_etag(entry['etag'])
+                # 允许浏览器缓存，但每次使用前都需要重新验证
+                response.headers['Cache-Control'] = 'no-cache'
+                return response
+            return wrapper
+        return decorator
+
+def etag_matches(header, etag):
+    """If-None-Match请求头是否包含该ETag（忽略弱校验前缀）"""
+    if not header:
+        return False
+    for candidate in header.split(','):
+        candidate = candidate.strip()
+        if candidate == '*':
+            return True
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate.strip('"') == etag:
+            return True
+    return False
+
+response_cache = ResponseCache()
@@ -0,0 +1,310 @@
+import itertools
+import logging
+import multiprocessing
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from .database import init_db, CrawlSchedule
+from .jobs import SPIDER_CLASSES, enqueue_job, claim_job, finish_job, job_outcome, worker_id, new_snapshot_id
+
+logger = logging.getLogger(__name__)
+
+# 任务失败后的重试间隔（秒），不超过正常的刷新间隔
+FAILURE_RETRY_DELAY = 600
+# 已有其他任务在运行时，到期的定时任务推迟的时间（秒）
+BUSY_RETRY_DELAY = 60
+# 调度循环最长的休眠时间（秒）
+MAX_SLEEP = 60
+
+def _worker_main(jobs, results, overrides):
+    """爬虫进程入口：reactor只启动一次，从队列中依次接收任务"""
+    from twisted.internet import defer, reactor
+    from scrapy.crawler import CrawlerRunner
+    from scrapy.utils.log import configure_logging
+    from scrapy.utils.misc import load_object
+    from scrapy.utils.project import get_project_settings
+
+    settings = get_project_settings()
+    settings.setdict(overrides or {}, priority='cmdline')
+    configure_logging(settings)
+    runner = CrawlerRunner(settings)
+
+    def failed(job, started, error):
+        logger.error(f"爬取任务 {job.get('job_id')} 失败: {error}")
+        results.put({
+            'id': job['id'],
+            'status': 'failed',
+            'error': error,
+            'items': {data_type: 0 for data_type in job['data_types']},
+            'duration': time.monotonic() - started
+        })
+
+    def run_job(job):
+        started = time.monotonic()
+        try:
+            crawlers = {
+                data_type: runner.create_crawler(load_object(SPIDER_CLASSES[data_type]))
+                for data_type in job['data_types']
+            }
+
+            def finished(outcomes):
+                errors = [repr(failure.value) for ok, failure in outcomes if not ok]
+                status, message = job_outcome(
+                    [crawler.stats.get_value('finish_reason') for crawler in crawlers.values()], errors
+                )
+                results.put({
+                    'id': job['id'],
+                    'status': status,
+                    'error': None if status == 'finished' else message,
+                    'items': {
+                        data_type: crawler.stats.get_value('item_scraped_count', 0)
+                        for data_type, crawler in crawlers.items()
+                    },
+                    'duration': time.monotonic() - started
+                })
+
+            # 带有job_id的爬取由JobProgress扩展写入进度并响应取消；每个任务生成新的快照，不与之前的任务混合
+            snapshot_id = new_snapshot_id(settings)
+            deferreds = [
+                runner.crawl(crawler, job_id=job['job_id'], snapshot_id=snapshot_id)
+                for crawler in crawlers.values()
+            ]
+            defer.DeferredList(deferreds, consumeErrors=True).addCallback(finished).addErrback(
+                lambda failure: failed(job, started, repr(failure.value))
+            )
+        except Exception as e:
+            # 任务无法启动时也要返回结果，否则 CrawlWorker.run 会一直等到超时
+            failed(job, started, repr(e))
+
+    def receive_jobs():
+        while True:
+            job = jobs.get()
+            if job is None:
+                break
+            reactor.callFromThread(run_job, job)
+        reactor.callFromThread(reactor.stop)
+
+    threading.Thread(target=receive_jobs, daemon=True).start()
+    reactor.run(installSignalHandlers=False)
+
+class CrawlWorker:
+    """常驻的爬虫进程
+
+    Scrapy和Twisted只在进程启动时加载一次，之后的任务复用同一个reactor，
+    不再为每次爬取创建新进程。处理 max_jobs 个任务后自动重启，进程异常退出或
+    任务超时时也会在下一个任务前重新启动。
+    """
+
+    def __init__(self, settings=None, max_jobs=50, timeout=3600):
+        # 覆盖项目设置的配置项
+        self.settings = dict(settings or {})
+        self.max_jobs = max_jobs
+        self.timeout = timeout
+        self.process = None
+        self.completed = 0
+        self.job_ids = itertools.count(1)
+
+    def start(self):
+        self.jobs = multiprocessing.Queue()
+        self.results = multiprocessing.Queue()
+        self.process = multiprocessing.Process(
+            target=_worker_main, args=(self.jobs, self.results, self.settings), daemon=True
+        )
+        self.process.start()
+        self.completed = 0
+        logger.info(f'爬虫进程已启动，PID: {self.process.pid}')
+
+    def stop(self, timeout=10):
+        if self.process is None:
+            return
+        if self.process.is_alive():
+            self.jobs.put(None)
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join()
+        self.process = None
+
+    def run(self, data_types, job_id=None):
+        """在常驻进程中运行一个爬取任务并等待结束，返回任务结果
+
+        job_id为crawl_jobs表中的任务ID，进度和取消请求通过该表传递。
+        """
+        if self.process is None or not self.process.is_alive():
+            self.start()
+        run_id = next(self.job_ids)
+        self.jobs.put({'id': run_id, 'job_id': job_id, 'data_types': list(data_types)})
+        deadline = time.monotonic() + self.timeout
+
+        while True:
+            try:
+                result = self.results.get(timeout=1)
+            except queue.Empty:
+                if not self.process.is_alive():
+                    self.process = None
+                    return self._failed(run_id, data_types, '爬虫进程异常退出')
+                if time.monotonic() > deadline:
+                    self.stop(timeout=0)
+                    return self._failed(run_id, data_types, f'任务超过 {self.timeout} 秒未完成')
+                continue
+            if result['id'] == run_id:
+                break
+
+        self.completed += 1
+        if self.completed >= self.max_jobs:
+            logger.info(f'爬虫进程已处理 {self.completed} 个任务，重新启动')
+            self.stop()
+        return result
+
+    def _failed(self, run_id, data_types, error):
+        return {'id': run_id, 'status': 'failed', 'error': error,
+                'items': {data_type: 0 for data_type in data_types}, 'duration': None}
+
+class CrawlScheduler:
+    """按配置的间隔定时刷新各类数据
+
+    下次运行时间保存在crawl_schedule表中，每次运行后在间隔的 ±jitter 比例内随机浮动，
+    避免总是在同一时刻请求上游接口。服务停止期间错过的运行在重启后立即补跑一次。
+    同时到期的数据类型合并为一个任务提交到crawl_jobs表；调度进程同时认领
+    其他来源（Web接口、命令行）排队的任务，在常驻爬虫进程中运行。
+    """
+
+    def __init__(self, worker, schedule, jitter=0.1, session_factory=init_db):
+        self.worker = worker
+        self.schedule = dict(schedule)
+        self.jitter = jitter
+        self.session_factory = session_factory
+
+    def next_run_after(self, moment, interval):
+        return moment + timedelta(seconds=interval * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    def load(self):
+        """初始化调度状态，返回需要补跑的数据类型"""
+        now = datetime.utcnow()
+        db = self.session_factory()
+        try:
+            rows = {row.data_type: row for row in db.query(CrawlSchedule)}
+            for data_type, interval in self.schedule.items():
+                row = rows.get(data_type)
+                if row is None:
+                    # 从未运行过，立即运行
+                    db.add(CrawlSchedule(data_type=data_type, interval=interval, next_run_at=now))
+                elif row.interval != interval:
+                    row.interval = interval
+                    if row.last_run_at:
+                        row.next_run_at = min(row.next_run_at or now, self.next_run_after(row.last_run_at, interval))
+            db.commit()
+            missed = [
+                row.data_type for row in db.query(CrawlSchedule)
+                if row.data_type in self.schedule and row.last_run_at and row.next_run_at <= now
+            ]
+        finally:
+            db.close()
+        if missed:
+            logger.info(f"补跑服务停止期间错过的任务: {', '.join(missed)}")
+        return missed
+
+    def due(self, now=None):
+        """到期需要运行的数据类型"""
+        now = now or datetime.utcnow()
+        db = self.session_factory()
+        try:
+            return [
+                row.data_type for row in db.query(CrawlSchedule)
+                .filter(CrawlSchedule.next_run_at <= now)
+                .order_by(CrawlSchedule.next_run_at)
+                if row.data_type in self.schedule
+            ]
+        finally:
+            db.close()
+
+    def seconds_until_next(self):
+        db = self.session_factory()
+        try:
+            next_runs = [
+                row.next_run_at for row in db.query(CrawlSchedule)
+                if row.data_type in self.schedule and row.next_run_at
+            ]
+        finally:
+            db.close()
+        if not next_runs:
+            return MAX_SLEEP
+        delay = (min(next_runs) - datetime.utcnow()).total_seconds()
+        return min(max(delay, 0), MAX_SLEEP)
+
+    def run_pending(self):
+        """提交到期的定时任务，并运行一个排队中的任务（没有任务时返回None）"""
+        data_types = self.due()
+        if data_types:
+            db = self.session_factory()
+            try:
+                job_id = enqueue_job(db, data_types, source='scheduler')
+            finally:
+                db.close()
+            if job_id is None:
+                logger.info(f"已有爬取任务在运行，推迟定时爬取: {', '.join(data_types)}")
+                self.postpone(data_types, BUSY_RETRY_DELAY)
+
+        db = self.session_factory()
+        try:
+            claimed = claim_job(db, worker_id())
+        finally:
+            db.close()
+        if claimed is None:
+            return None
+        job_id, data_types, source = claimed
+
+        logger.info(f"开始爬取任务 {job_id}（{source}）: {', '.join(data_types)}")
+        started = datetime.utcnow()
+        result = self.worker.run(data_types, job_id=job_id)
+        finished = datetime.utcnow()
+
+        db = self.session_factory()
+        try:
+            finish_job(db, job_id, result['status'], result['error'] or '任务完成')
+        finally:
+            db.close()
+        self.record([t for t in data_types if t in self.schedule], result, started, finished)
+        if result['status'] == 'finished':
+            logger.info(f"爬取任务 {job_id} 完成: {result['items']}，耗时 {result['duration']:.1f} 秒")
+        else:
+            logger.error(f"爬取任务 {job_id} 未完成（{result['status']}）: {result['error']}")
+        return result
+
+    def postpone(self, data_types, delay):
+        db = self.session_factory()
+        try:
+            next_run_at = datetime.utcnow() + timedelta(seconds=delay)
+            for row in db.query(CrawlSchedule).filter(CrawlSchedule.data_type.in_(data_types)):
+                row.next_run_at = next_run_at
+            db.commit()
+        finally:
+            db.close()
+
+    def record(self, data_types, result, started, finished):
+        db = self.session_factory()
+        try:
+            for row in db.query(CrawlSchedule).filter(CrawlSchedule.data_type.in_(data_types)):
+                row.last_run_at = started
+                row.last_status = result['status']
+                row.last_duration = result['duration']
+                if result['status'] == 'finished':
+                    row.next_run_at = self.next_run_after(finished, row.interval)
+                else:
+                    row.next_run_at = finished + timedelta(seconds=min(FAILURE_RETRY_DELAY, row.interval))
+            db.commit()
+        finally:
+            db.close()
+
+    def run_forever(self, stop_event=None):
+        """调度循环，stop_event被设置后退出并关闭爬虫进程"""
+        stop_event = stop_event or threading.Event()
+        self.load()
+        try:
+            while not stop_event.is_set():
+                self.run_pending()
+                stop_event.wait(self.seconds_until_next())
+        finally:
+            self.worker.stop()
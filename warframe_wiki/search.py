@@ -0,0 +1,110 @@
+import logging
+from sqlalchemy import text, literal_column, or_, Integer, Float
+from sqlalchemy.exc import OperationalError
+
+logger = logging.getLogger(__name__)
+
+# 参与全文检索的字段及其bm25权重（名称权重高于描述）
+SEARCH_FIELDS = {
+    'name_en': 10.0,
+    'name_zh': 10.0,
+    'name_alias': 8.0,
+    'description_en': 1.0,
+    'description_zh': 1.0,
+}
+
+SEARCH_TABLES = ('warframes', 'weapons', 'mods')
+
+# trigram分词器要求每个检索词至少3个字符，更短的词退回LIKE匹配
+TRIGRAM_MIN_LENGTH = 3
+
+# 当前SQLite是否支持FTS5 trigram分词器，在建立索引时确定
+_fts_available = False
+
+def fts_table(table_name):
+    return f'{table_name}_fts'
+
+def _index_ddl(table_name):
+    fts = fts_table(table_name)
+    columns = ', '.join(SEARCH_FIELDS)
+    new_values = ', '.join(f'new.{name}' for name in SEARCH_FIELDS)
+    old_values = ', '.join(f'old.{name}' for name in SEARCH_FIELDS)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{columns}, content='{table_name}', content_rowid='rowid', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table_name} BEGIN "
+        f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.rowid, {new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table_name} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.rowid, {old_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {columns} ON {table_name} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.rowid, {old_values}); "
+        f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.rowid, {new_values}); END",
+    ]
+
+def ensure_search_index(engine):
+    """创建FTS5全文索引表及同步触发器，新建索引时从基础表重建"""
+    global _fts_available
+    try:
+        with engine.begin() as conn:
+            for table_name in SEARCH_TABLES:
+                fts = fts_table(table_name)
+                exists = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {'name': fts}
+                ).first()
+                for ddl in _index_ddl(table_name):
+                    conn.execute(text(ddl))
+                if not exists:
+                    conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+        _fts_available = True
+    except OperationalError as e:
+        logger.warning(f"当前SQLite不支持FTS5 trigram，搜索将退回LIKE匹配: {str(e)}")
+        _fts_available = False
+
+def rebuild_search_index(engine):
+    """从基础表完整重建全文索引"""
+    with engine.begin() as conn:
+        for table_name in SEARCH_TABLES:
+            fts = fts_table(table_name)
+            conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+def search_terms(term):
+    return [t for t in term.split() if t]
+
+def fts_query(terms):
+    """将检索词转换为FTS5查询语句，每个词作为短语并用AND连接"""
+    return ' AND '.join('"' + t.replace('"', '""') + '"' for t in terms)
+
+def fts_applicable(terms):
+    """检索词是否使用FTS5全文检索（否则退回LIKE匹配）"""
+    return _fts_available and bool(terms) and min(len(t) for t in terms) >= TRIGRAM_MIN_LENGTH
+
+def search_rank_subquery(model, term):
+    """返回 (rowid, rank) 的全文检索子查询；不适用FTS时返回None"""
+    terms = search_terms(term)
+    if not fts_applicable(terms):
+        return None
+    fts = fts_table(model.__tablename__)
+    weights = ', '.join(str(w) for w in SEARCH_FIELDS.values())
+    return text(
+        f"SELECT rowid, bm25({fts}, {weights}) AS rank FROM {fts} WHERE {fts} MATCH :match"
+    ).bindparams(match=fts_query(terms)).columns(rowid=Integer, rank=Float).subquery()
+
+def search_like_clause(model, term):
+    """短检索词的LIKE匹配条件：每个词需出现在任一检索字段中"""
+    clauses = []
+    for t in search_terms(term) or [term]:
+        pattern = f'%{t}%'
+        clauses.append(or_(*[model.__table__.c[name].ilike(pattern) for name in SEARCH_FIELDS]))
+    return clauses
+
+def apply_search(query, model, term):
+    """为查询（Core select()）添加中英文全文检索条件
+
+    返回 (query, rank)，rank为相关度列（越小越相关），LIKE匹配时为None
+    """
+    ranked = search_rank_subquery(model, term)
+    if ranked is None:
+        return query.where(*search_like_clause(model, term)), None
+    rowid = literal_column(f'{model.__tablename__}.rowid')
+    return query.join_from(model.__table__, ranked, rowid == ranked.c.rowid), ranked.c.rank
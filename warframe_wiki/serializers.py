@@ -0,0 +1,118 @@
+import json
+from datetime import datetime
+from .settings import CRAWL_LANGUAGES
+
+try:
+    import orjson
+except ImportError:  # 未安装orjson时使用标准库
+    orjson = None
+
+# 列表接口默认返回的字段（与原有接口保持一致）
+DEFAULT_LIST_FIELDS = {
+    'warframes': [
+        'id', 'name_en', 'name_zh', 'name_alias', 'description_en', 'description_zh',
+        'health', 'shield', 'armor', 'energy', 'sprint_speed', 'mastery_rank',
+        'abilities_en', 'abilities_zh', 'passive_en', 'passive_zh', 'polarities', 'last_updated'
+    ],
+    'weapons': [
+        'id', 'name_en', 'name_zh', 'name_alias', 'description_en', 'description_zh',
+        'type', 'mastery_rank', 'damage', 'critical_chance', 'critical_multiplier',
+        'status_chance', 'fire_rate', 'accuracy', 'magazine_size', 'reload_time',
+        'disposition', 'last_updated'
+    ],
+    'mods': [
+        'id', 'name_en', 'name_zh', 'name_alias', 'description_en', 'description_zh',
+        'polarity', 'rarity', 'drain', 'effect_en', 'effect_zh', 'max_rank', 'tradable',
+        'mod_set', 'base_effects', 'upgrade_effects', 'last_updated'
+    ]
+}
+
+# 不对外暴露的内部字段
+HIDDEN_FIELDS = ('content_hash',)
+
+# 保存在数据表列（name_en/name_zh等）中的语言，其余语言从translations表读取
+COLUMN_LANGUAGES = ('en', 'zh')
+LANGUAGES = tuple(dict.fromkeys([*COLUMN_LANGUAGES, *CRAWL_LANGUAGES]))
+
+class FieldError(ValueError):
+    """无效的fields或lang参数"""
+
+def translated_fields(model):
+    """有多语言版本的字段，如 name_en/name_zh 对应 name"""
+    return [c.name[:-3] for c in model.__table__.columns if c.name.endswith('_en')]
+
+def _split_language(model, name):
+    """将 name_ja 拆分为 ('name', 'ja')，不是多语言字段时返回None"""
+    field, _, lang = name.rpartition('_')
+    if lang in LANGUAGES and field in translated_fields(model):
+        return field, lang
+    return None
+
+def resolve_fields(model, fields=None, lang=None):
+    """根据?fields=和?lang=参数确定要返回的字段名，id总是包含在内"""
+    table = model.__table__
+    available = [c.name for c in table.columns if c.name not in HIDDEN_FIELDS]
+    available += [
+        f'{field}_{language}' for language in LANGUAGES if language not in COLUMN_LANGUAGES
+        for field in translated_fields(model)
+    ]
+
+    if fields:
+        requested = [name.strip() for name in fields.split(',') if name.strip()]
+        unknown = [name for name in requested if name not in available]
+        if unknown:
+            raise FieldError(f"未知的字段: {', '.join(unknown)}")
+    else:
+        requested = list(DEFAULT_LIST_FIELDS[table.name])
+
+    if lang:
+        if lang not in LANGUAGES:
+            raise FieldError(f'不支持的语言: {lang}')
+        # 多语言字段只返回请求的语言版本
+        resolved = []
+        for name in requested:
+            parts = _split_language(model, name)
+            resolved.append(f'{parts[0]}_{lang}' if parts else name)
+        requested = resolved
+
+    if 'id' not in requested:
+        requested.insert(0, 'id')
+    # 去重并保持顺序
+    return list(dict.fromkeys(requested))
+
+def split_fields(model, names):
+    """将字段分为数据表列和从translations表读取的 (字段名, 翻译字段, 语言)"""
+    table = model.__table__
+    columns = [name for name in names if name in table.c]
+    translated = [
+        (name, *_split_language(model, name))
+        for name in names if name not in table.c
+    ]
+    return columns, translated
+
+def select_columns(model, names):
+    table = model.__table__
+    return [table.c[name] for name in names]
+
+def _format_value(value):
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return value
+
+def serialize_rows(names, rows):
+    """将Core查询结果行转换为字典列表"""
+    return [
+        {name: _format_value(value) for name, value in zip(names, row)}
+        for row in rows
+    ]
+
+def dumps(payload):
+    """使用快速JSON编码器序列化，返回bytes"""
+    if orjson is not None:
+        return orjson.dumps(payload, default=str)
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+
+def json_response(payload, status=200):
+    # 导出命令、爬虫和异步服务也使用本模块，只在Flask视图中才导入Flask
+    from flask import Response
+    return Response(dumps(payload), status=status, mimetype='application/json')
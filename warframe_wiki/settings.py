@@ -34,20 +34,82 @@ DEFAULT_REQUEST_HEADERS = {
 # 自定义User-Agent
 USER_AGENT = 'warframe_wiki (+https://warframe.fandom.com)'
 
-# 数据库设置
-DATABASE_URL = 'sqlite:///warframe_wiki/warframe.db'
+# 数据库设置（可通过环境变量 WARFRAME_DATABASE_PATH 指定数据库文件）
+DATABASE_PATH = os.environ.get('WARFRAME_DATABASE_PATH', 'warframe_data.db')
+DATABASE_URL = f'sqlite:///{DATABASE_PATH}'
+
+# SQLite连接参数，每个新连接都会执行
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 268435456,  # 256MB
+    'cache_size': -65536,  # 64MB
+    'busy_timeout': 5000,  # 毫秒
+}
+SQLITE_READ_POOL_SIZE = 8
 
 # 启用的中间件
 DOWNLOADER_MIDDLEWARES = {
     'scrapy.downloadermiddlewares.retry.RetryMiddleware': 90,
     'scrapy.downloadermiddlewares.httpproxy.HttpProxyMiddleware': 110,
+    'warframe_wiki.middlewares.ConditionalRequestMiddleware': 80,
+    'warframe_wiki.snapshots.SnapshotArchiveMiddleware': 75,
+    'warframe_wiki.snapshots.SnapshotReplayMiddleware': 50,
+}
+
+# 爬取的语言，各语言并发请求；en和zh为必需语言，其余语言的文本保存在translations表
+CRAWL_LANGUAGES = [
+    language.strip() for language in os.getenv('WARFRAME_LANGUAGES', 'en,zh,ja,ko,ru').split(',')
+    if language.strip()
+]
+
+# 逐条流式解析API返回的JSON数组，只保留爬虫需要的字段
+JSON_STREAMING_PARSE = True
+# 合并完成的记录按批映射为Item
+MAPPING_BATCH_SIZE = 500
+
+# 条件请求缓存：保存ETag/Last-Modified，未变化的接口跳过解析和入库
+HTTP_CONDITIONAL_CACHE_ENABLED = True
+HTTP_CONDITIONAL_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'http_cache')
+
+# 原始响应快照：按内容寻址压缩保存，相同的响应只保存一份
+SNAPSHOT_ARCHIVE_ENABLED = True
+SNAPSHOT_DIR = os.getenv('WARFRAME_SNAPSHOT_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'snapshots'))
+# 设置为快照ID（或'latest'）时离线重放该快照，不访问网络
+SNAPSHOT_REPLAY = None
+
+# 定时爬取：每种数据的刷新间隔（秒），实际间隔在 ±CRAWL_SCHEDULE_JITTER 比例内随机浮动
+CRAWL_SCHEDULE = {
+    'warframes': 6 * 3600,
+    'weapons': 6 * 3600,
+    'mods': 6 * 3600,
 }
+CRAWL_SCHEDULE_JITTER = 0.1
+# 常驻爬虫进程处理多少个任务后重启，避免长期运行占用过多内存
+CRAWL_WORKER_MAX_JOBS = 50
+# 单个爬取任务的超时时间（秒），超时后重启爬虫进程
+CRAWL_JOB_TIMEOUT = 3600
+
+# 扩展：由任务管理器启动的爬取定期写入进度，并响应取消请求；记录各阶段耗时指标
+EXTENSIONS = {
+    'warframe_wiki.extensions.JobProgress': 500,
+    'warframe_wiki.extensions.CrawlMetrics': 510,
+}
+JOB_PROGRESS_INTERVAL = 1.0
+
+# 爬虫进程的指标文件（Prometheus文本格式），Web接口的/metrics会合并输出
+METRICS_FILE = os.getenv('WARFRAME_METRICS_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'metrics', 'crawler.prom'))
+METRICS_WRITE_INTERVAL = 10.0
 
 # 启用的管道
 ITEM_PIPELINES = {
     'warframe_wiki.pipelines.WarframeWikiPipeline': 300,
 }
 
+# 管道批量写入设置
+PIPELINE_BULK_MODE = True
+PIPELINE_BATCH_SIZE = 500
+
 # 禁用Cookie
 COOKIES_ENABLED = False
 
@@ -58,12 +120,23 @@ AUTOTHROTTLE_MAX_DELAY = 60
 AUTOTHROTTLE_TARGET_CONCURRENCY = 1.0
 AUTOTHROTTLE_DEBUG = False
 
-# Database settings
-DATABASE_URL = 'sqlite:///warframe_data.db'
-
 # API Settings
 WARFRAME_API_URL = 'https://api.warframestat.us'
 
 # Web Interface Settings
 WEB_HOST = '127.0.0.1'
-WEB_PORT = 8080 
\ No newline at end of file
+WEB_PORT = 8080
+
+# 读取接口响应缓存：最大条目数和最大总字节数
+RESPONSE_CACHE_SIZE = 512
+RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024 
+
+# 爬取事件推送（/api/crawler/events）：读取任务状态的间隔、保持连接的注释间隔（秒）、缓冲的事件数
+CRAWL_EVENTS_POLL_INTERVAL = 0.5
+CRAWL_EVENTS_KEEPALIVE = 15
+CRAWL_EVENTS_BACKLOG = 256
+
+# 进程内只读副本：启动时将数据表加载到内存，列表/搜索/统计接口不再查询SQLite（环境变量 WARFRAME_READ_REPLICA=1 启用）
+READ_REPLICA_ENABLED = os.getenv('WARFRAME_READ_REPLICA', '0') == '1'
+# 检查数据版本并重新加载变化的表的间隔（秒）
+READ_REPLICA_REFRESH_INTERVAL = 1.0
@@ -0,0 +1,164 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from scrapy import signals
+from scrapy.exceptions import NotConfigured, IgnoreRequest
+from scrapy.http import Response
+from .middlewares import load_cached_body
+
+logger = logging.getLogger(__name__)
+
+class SnapshotStore:
+    """按内容寻址保存原始响应的快照库
+
+    响应体以sha256命名、gzip压缩保存在 objects/ 下，内容相同的响应只保存一份；
+    每次爬取生成 manifests/<快照ID>.json，记录每个URL对应的响应体。
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.objects_dir = os.path.join(root, 'objects')
+        self.manifests_dir = os.path.join(root, 'manifests')
+
+    def object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], f'{digest}.json.gz')
+
+    def manifest_path(self, snapshot_id):
+        return os.path.join(self.manifests_dir, f'{snapshot_id}.json')
+
+    def put_object(self, body):
+        """保存响应体，返回 (sha256, 是否新写入)"""
+        digest = hashlib.sha256(body).hexdigest()
+        path = self.object_path(digest)
+        if os.path.exists(path):
+            return digest, False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with gzip.open(tmp_path, 'wb') as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+        return digest, True
+
+    def get_object(self, digest):
+        with gzip.open(self.object_path(digest), 'rb') as f:
+            return f.read()
+
+    def new_snapshot_id(self):
+        """按当前时间生成快照ID，同一秒内已有快照时加上序号"""
+        base = datetime.now().strftime('%Y%m%d_%H%M%S')
+        snapshot_id, number = base, 1
+        while os.path.exists(self.manifest_path(snapshot_id)):
+            number += 1
+            snapshot_id = f'{base}_{number}'
+        return snapshot_id
+
+    def load_manifest(self, snapshot_id):
+        with open(self.manifest_path(snapshot_id), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def record(self, snapshot_id, url, digest, size, **extra):
+        """在快照清单中记录URL及其响应体"""
+        os.makedirs(self.manifests_dir, exist_ok=True)
+        path = self.manifest_path(snapshot_id)
+        if os.path.exists(path):
+            manifest = self.load_manifest(snapshot_id)
+        else:
+            manifest = {'id': snapshot_id, 'created_at': datetime.now().isoformat(timespec='seconds'), 'entries': {}}
+        manifest['entries'][url] = dict(extra, sha256=digest, size=size)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    def list_snapshots(self):
+        """按时间顺序返回所有快照ID"""
+        if not os.path.isdir(self.manifests_dir):
+            return []
+        return sorted(name[:-5] for name in os.listdir(self.manifests_dir) if name.endswith('.json'))
+
+    def resolve(self, snapshot_id):
+        """将'latest'解析为最新的快照ID"""
+        if snapshot_id == 'latest':
+            snapshots = self.list_snapshots()
+            if not snapshots:
+                raise ValueError(f'快照目录中没有可用的快照: {self.root}')
+            return snapshots[-1]
+        if not os.path.exists(self.manifest_path(snapshot_id)):
+            raise ValueError(f'快照不存在: {snapshot_id}')
+        return snapshot_id
+
+class SnapshotArchiveMiddleware:
+    """将每个成功获取的原始响应保存到快照库
+
+    一次爬取任务中的所有爬虫通过snapshot_id参数共用一个快照（由任务管理器生成），
+    常驻爬虫进程中先后运行的任务各自生成新的快照；单独运行的爬虫使用自己的快照。
+    """
+
+    def __init__(self, store, stats):
+        self.store = store
+        self.stats = stats
+        self.snapshot_id = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool('SNAPSHOT_ARCHIVE_ENABLED') or settings.get('SNAPSHOT_REPLAY'):
+            raise NotConfigured
+        middleware = cls(SnapshotStore(settings.get('SNAPSHOT_DIR')), crawler.stats)
+        crawler.signals.connect(middleware.spider_opened, signal=signals.spider_opened)
+        return middleware
+
+    def spider_opened(self, spider):
+        self.snapshot_id = getattr(spider, 'snapshot_id', None) or self.store.new_snapshot_id()
+
+    def process_response(self, request, response, spider):
+        if response.status == 200:
+            body = response.body
+        elif response.status == 304 and request.meta.get('http_cache_path'):
+            # 条件请求命中，快照引用缓存中未变化的响应体
+            body = load_cached_body(request.meta['http_cache_path'])
+        else:
+            return response
+
+        digest, created = self.store.put_object(body)
+        self.store.record(
+            self.snapshot_id, request.url, digest, len(body),
+            spider=spider.name, language=request.meta.get('language')
+        )
+        self.stats.inc_value('snapshot/stored' if created else 'snapshot/deduplicated', spider=spider)
+        return response
+
+class SnapshotReplayMiddleware:
+    """离线重放模式：直接从快照返回响应，不访问网络"""
+
+    def __init__(self, store, snapshot_id):
+        self.store = store
+        self.snapshot_id = snapshot_id
+        self.entries = store.load_manifest(snapshot_id)['entries']
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        snapshot_id = settings.get('SNAPSHOT_REPLAY')
+        if not snapshot_id:
+            raise NotConfigured
+        store = SnapshotStore(settings.get('SNAPSHOT_DIR'))
+        middleware = cls(store, store.resolve(snapshot_id))
+        logger.info(f'重放快照: {middleware.snapshot_id}')
+        return middleware
+
+    def process_request(self, request, spider):
+        entry = self.entries.get(request.url)
+        if entry is None:
+            raise IgnoreRequest(f'快照 {self.snapshot_id} 中没有该URL: {request.url}')
+        return Response(
+            url=request.url,
+            status=200,
+            headers={'Content-Type': 'application/json'},
+            body=self.store.get_object(entry['sha256']),
+            request=request,
+            flags=['snapshot']
+        )
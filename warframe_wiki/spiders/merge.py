@@ -0,0 +1,223 @@
+import scrapy
+import json
+import time
+from ..middlewares import load_cached_body
+from ..json_stream import iter_array
+from ..mapping import CompiledMapping
+from ..metrics import CRAWL_STAGE_SECONDS
+
+# 日志中使用的语言名称
+LANGUAGE_NAMES = {'en': '英文', 'zh': '中文', 'ja': '日文', 'ko': '韩文', 'ru': '俄文'}
+
+class MultilingualMergeSpider(scrapy.Spider):
+    """并发获取各语言数据并按uniqueName合并的通用爬虫基类
+
+    各语言的请求使用独立的下载槽同时发出，响应可以任意顺序到达；
+    某条记录的所有语言版本都到达后立即合并并产出Item。所有语言都解析完后，
+    只缺少可选语言的记录也会合并，缺少的语言没有翻译。
+    子类需要设置 api_path、item_class 和声明式的 field_mapping / translated_fields，
+    映射规则在爬虫创建时编译一次，合并完成的记录按批映射为Item。
+    """
+    api_base_url = 'https://api.warframestat.us'
+    api_path = None
+    # 必需的语言（对应数据表中的_en/_zh列），其余语言由CRAWL_LANGUAGES设置
+    required_languages = ('en', 'zh')
+    languages = required_languages
+    # 数据类型名称，用于日志
+    label = ''
+    # {Item字段: FieldSpec}，见 mapping.py；解析时只保留映射用到的原始字段
+    item_class = None
+    field_mapping = {}
+    # {翻译字段: language -> FieldSpec}，每种语言的文本写入translations表
+    translated_fields = {}
+    # 为True时（scrapy crawl -a force_refresh=1）不发送条件请求，强制重新下载
+    force_refresh = False
+    # 任务被取消后（见 extensions.JobProgress）不再解析已下载的响应
+    cancelled = False
+    user_agent = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # {uniqueName: {语言: 原始记录}}，等待其他语言到达的记录
+        self.pending = {}
+        # 已收到响应（或请求失败）的语言，以及服务器返回304、暂缓解析的响应
+        self.responded = set()
+        self.not_modified = {}
+        # 映射失败或未通过校验的记录
+        self.rejects = []
+        self.set_languages(self.languages)
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        # scrapy crawl -a languages=en,zh,ja 优先于CRAWL_LANGUAGES设置
+        languages = kwargs.get('languages') or crawler.settings.getlist('CRAWL_LANGUAGES') or cls.required_languages
+        spider.set_languages(languages.split(',') if isinstance(languages, str) else languages)
+        return spider
+
+    def set_languages(self, languages):
+        """设置要爬取的语言并编译映射规则"""
+        self.languages = tuple(dict.fromkeys([*self.required_languages, *languages]))
+        self.mapping = CompiledMapping(
+            self.item_class, self.field_mapping, self.validate_item,
+            translations=self.translated_fields, languages=self.languages
+        )
+
+    def start_requests(self):
+        for language in self.languages:
+            yield scrapy.Request(
+                url=f'{self.api_base_url}/{self.api_path}/?language={language}',
+                callback=self.parse_language,
+                errback=self.language_failed,
+                dont_filter=True,
+                headers={'User-Agent': self.user_agent},
+                meta={
+                    'language': language,
+                    # 每种语言使用独立的下载槽，请求可以并发发出
+                    'download_slot': f'{self.api_base_url}#{language}'
+                }
+            )
+
+    def include_record(self, record):
+        """是否保留该记录，子类可以覆盖以过滤数据"""
+        return True
+
+    def validate_item(self, item):
+        """校验映射后的字段，返回拒绝原因，通过时返回None"""
+        if not (item['name_en'] and item['id']):
+            return '缺少名称或ID'
+        return None
+
+    def iter_records(self, response):
+        """解析响应，逐条返回原始记录（JSON_STREAMING_PARSE开启时流式解析）"""
+        if self.settings.getbool('JSON_STREAMING_PARSE', True):
+            return iter_array(response.body)
+        return json.loads(response.body)
+
+    def project(self, language, record):
+        """只保留该语言需要映射的字段，丢弃其余原始数据"""
+        fields = self.mapping.source_fields.get(language)
+        if fields is None:
+            return record
+        projected = {key: record[key] for key in fields if key in record}
+        projected['uniqueName'] = record.get('uniqueName', '')
+        return projected
+
+    def parse_language(self, response):
+        """处理某一种语言的响应；所有语言都未变化时跳过解析和入库"""
+        language = response.meta['language']
+        self.responded.add(language)
+
+        if self.cancelled:
+            return
+        self.crawler.stats.set_value(f'language/{language}/bytes', len(response.body), spider=self)
+        if response.meta.get('not_modified'):
+            # 数据未变化，先不解析，等待其他语言的结果
+            self.crawler.stats.set_value(f'language/{language}/status', 'not_modified', spider=self)
+            self.not_modified[language] = response
+        else:
+            self.crawler.stats.set_value(f'language/{language}/status', 'downloaded', spider=self)
+            yield from self.merge_records(language, response)
+
+        yield from self.finish_languages()
+
+    def language_failed(self, failure):
+        """某种语言的请求失败时，其余语言的数据仍然合并入库"""
+        language = failure.request.meta['language']
+        self.logger.error(f"获取{LANGUAGE_NAMES.get(language, language)}{self.label}数据失败: {failure.value!r}")
+        self.responded.add(language)
+        self.crawler.stats.set_value(f'language/{language}/status', 'failed', spider=self)
+        yield from self.finish_languages()
+
+    def finish_languages(self):
+        """所有语言都有结果后，处理暂缓的304响应和缺少可选语言的记录"""
+        if len(self.responded) < len(self.languages) or self.cancelled:
+            return
+        if self.not_modified:
+            if len(self.not_modified) == len(self.languages):
+                self.logger.info(f"{self.label}数据未发生变化，跳过解析和入库")
+                self.pending.clear()
+                self.not_modified.clear()
+                return
+            # 部分语言有更新，需要从缓存读取未变化的语言数据参与合并
+            for cached_language, cached_response in self.not_modified.items():
+                body = load_cached_body(cached_response.meta['http_cache_path'])
+                yield from self.merge_records(cached_language, cached_response.replace(status=200, body=body))
+            self.not_modified.clear()
+
+        # 剩余记录只要包含必需语言就可以合并
+        complete = [
+            unique_id for unique_id, merged in self.pending.items()
+            if all(language in merged for language in self.required_languages)
+        ]
+        batch_size = self.settings.getint('MAPPING_BATCH_SIZE', 500)
+        for start in range(0, len(complete), batch_size):
+            yield from self.map_batch([
+                (unique_id, self.pending.pop(unique_id))
+                for unique_id in complete[start:start + batch_size]
+            ])
+
+    def merge_records(self, language, response):
+        """解析某一种语言的数据，并与已到达的其他语言数据合并"""
+        language_name = LANGUAGE_NAMES.get(language, language)
+        batch_size = self.settings.getint('MAPPING_BATCH_SIZE', 500)
+        batch = []
+        # 解析耗时不包括产出Item后下游处理的时间
+        parse_time = 0
+        started = time.perf_counter()
+        try:
+            records = self.iter_records(response)
+            count = 0
+            for record in records:
+                count += 1
+                if not self.include_record(record):
+                    continue
+                unique_id = str(record.get('uniqueName', ''))
+                merged = self.pending.setdefault(unique_id, {})
+                merged[language] = self.project(language, record)
+                if len(merged) < len(self.languages):
+                    continue
+
+                del self.pending[unique_id]
+                batch.append((unique_id, merged))
+                if len(batch) >= batch_size:
+                    parse_time += time.perf_counter() - started
+                    yield from self.map_batch(batch)
+                    started = time.perf_counter()
+                    batch = []
+                    if self.cancelled:
+                        self.logger.info(f"任务已取消，停止处理{language_name}{self.label}数据")
+                        return
+
+            parse_time += time.perf_counter() - started
+            CRAWL_STAGE_SECONDS.observe(parse_time, self.name, 'parse')
+            yield from self.map_batch(batch)
+            self.crawler.stats.set_value(f'language/{language}/records', count, spider=self)
+            self.logger.info(f"成功获取到 {count} 个{language_name}{self.label}数据")
+
+        except json.JSONDecodeError as e:
+            self.logger.error(f"解析{language_name}JSON数据失败: {str(e)}")
+            self.logger.debug(f"响应内容: {response.text[:200]}...")
+        except Exception as e:
+            self.logger.error(f"处理{language_name}数据时出错: {str(e)}")
+
+    def map_batch(self, batch):
+        """按批映射合并完成的记录，失败的记录进入拒绝列表"""
+        if not batch:
+            return []
+        with CRAWL_STAGE_SECONDS.time(self.name, 'merge'):
+            items, rejects = self.mapping.map_batch(batch)
+        if rejects:
+            self.rejects.extend(rejects)
+            self.crawler.stats.inc_value('mapping/rejected', len(rejects), spider=self)
+        return items
+
+    def closed(self, reason):
+        if self.rejects:
+            self.logger.warning(f"{len(self.rejects)} 条{self.label}数据映射失败，已跳过")
+            for reject in self.rejects[:10]:
+                self.logger.warning(f"  {reject['name'] or reject['id']}: {reject['reason']}")
+        if self.pending:
+            self.logger.info(f"{len(self.pending)} 条{self.label}数据缺少必需的语言版本，已跳过")
+        self.pending.clear()
+        self.logger.info(f'{self.name.upper()}爬虫关闭，原因: {reason}')
@@ -1,13 +1,60 @@
-import scrapy
-import json
 from ..items import WarframeItem
+from ..mapping import text, number, integer, computed, translated
+from .merge import MultilingualMergeSpider
 import logging
 
-class WarframeSpider(scrapy.Spider):
+def abilities(language):
+    """技能列表，只保留名称和描述都存在的技能"""
+    def extract(records):
+        return [
+            {
+                'name': ability.get('name', ''),
+                'description': ability.get('description', '')
+            }
+            for ability in records[language].get('abilities', [])
+            if ability.get('name') and ability.get('description')
+        ]
+    return computed(extract, **{language: ('abilities',)})
+
+class WarframeSpider(MultilingualMergeSpider):
     name = 'warframe'
     allowed_domains = ['api.warframestat.us']
+    api_path = 'warframes'
+    label = 'Warframe'
+    item_class = WarframeItem
+    field_mapping = {
+        # 基础信息
+        'name_en': text('en', 'name'),
+        'name_zh': text('zh', 'name'),
+        'description_en': text('en', 'description'),
+        'description_zh': text('zh', 'description'),
+        # 属性信息
+        'health': number('en', 'health'),
+        'shield': number('en', 'shield'),
+        'armor': number('en', 'armor'),
+        'energy': number('en', 'power'),
+        'sprint_speed': number('en', 'sprintSpeed'),
+        # 技能信息
+        'abilities_en': abilities('en'),
+        'abilities_zh': abilities('zh'),
+        'passive_en': text('en', 'passiveDescription'),
+        'passive_zh': text('zh', 'passiveDescription'),
+        'mastery_rank': integer('en', 'masteryReq'),
+        'polarities': text('en', 'polarities', default=[]),
+        # 图片和链接
+        'image_url': text('en', 'wikiaThumbnail'),
+        'wiki_url': text('en', 'wikiaUrl'),
+    }
+    # 各语言的文本，写入translations表
+    translated_fields = {
+        'name': translated('name'),
+        'description': translated('description'),
+        'abilities': abilities,
+        'passive': translated('passiveDescription'),
+    }
     custom_settings = {
-        'CONCURRENT_REQUESTS': 1,
+        # 每种语言一个请求，各自使用独立的下载槽
+        'CONCURRENT_REQUESTS': 8,
         'DOWNLOAD_DELAY': 2,
         'DOWNLOAD_TIMEOUT': 30,
         'ROBOTSTXT_OBEY': False,
@@ -16,133 +63,11 @@ class WarframeSpider(scrapy.Spider):
         'HTTPERROR_ALLOWED_CODES': [404, 429],
     }
 
-    def start_requests(self):
-        # 英文API
-        yield scrapy.Request(
-            url='https://api.warframestat.us/warframes/?language=en',
-            callback=self.parse_en,
-            dont_filter=True,
-            headers={
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            },
-            meta={'language': 'en'}
-        )
-        
-        # 中文API
-        yield scrapy.Request(
-            url='https://api.warframestat.us/warframes/?language=zh',
-            callback=self.parse_zh,
-            dont_filter=True,
-            headers={
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            },
-            meta={'language': 'zh'}
-        )
-
-    def parse_en(self, response):
-        """处理英文数据"""
-        try:
-            warframes = json.loads(response.body)
-            self.logger.info(f"成功获取到 {len(warframes)} 个英文Warframe数据")
-            
-            # 保存英文数据以供后续合并
-            self.en_warframes = {
-                str(warframe.get('uniqueName', '')): warframe
-                for warframe in warframes
-                if not any(keyword in str(warframe.get('uniqueName', '')).lower() 
-                          for keyword in ['archwing'])
-            }
-            
-        except json.JSONDecodeError as e:
-            self.logger.error(f"解析英文JSON数据失败: {str(e)}")
-            self.logger.debug(f"响应内容: {response.text[:200]}...")
-        except Exception as e:
-            self.logger.error(f"处理英文数据时出错: {str(e)}")
-
-    def parse_zh(self, response):
-        """处理中文数据并与英文数据合并"""
-        try:
-            warframes = json.loads(response.body)
-            self.logger.info(f"成功获取到 {len(warframes)} 个中文Warframe数据")
-            
-            # 创建中文数据字典
-            zh_warframes = {
-                str(warframe.get('uniqueName', '')): warframe
-                for warframe in warframes
-                if not any(keyword in str(warframe.get('uniqueName', '')).lower() 
-                          for keyword in ['archwing'])
-            }
-            
-            # 合并中英文数据
-            for unique_id, en_warframe in self.en_warframes.items():
-                zh_warframe = zh_warframes.get(unique_id)
-                if not zh_warframe:
-                    continue
-                
-                try:
-                    item = WarframeItem()
-                    
-                    # 基础信息
-                    item['id'] = unique_id
-                    item['name_en'] = en_warframe.get('name', '')
-                    item['name_zh'] = zh_warframe.get('name', '')
-                    item['description_en'] = en_warframe.get('description', '')
-                    item['description_zh'] = zh_warframe.get('description', '')
-                    
-                    # 属性信息
-                    item['health'] = float(en_warframe.get('health', 0))
-                    item['shield'] = float(en_warframe.get('shield', 0))
-                    item['armor'] = float(en_warframe.get('armor', 0))
-                    item['energy'] = float(en_warframe.get('power', 0))
-                    item['sprint_speed'] = float(en_warframe.get('sprintSpeed', 0))
-                    
-                    # 技能信息
-                    en_abilities = en_warframe.get('abilities', [])
-                    zh_abilities = zh_warframe.get('abilities', [])
-                    
-                    item['abilities_en'] = [
-                        {
-                            'name': ability.get('name', ''),
-                            'description': ability.get('description', '')
-                        }
-                        for ability in en_abilities
-                        if ability.get('name') and ability.get('description')
-                    ]
-                    
-                    item['abilities_zh'] = [
-                        {
-                            'name': ability.get('name', ''),
-                            'description': ability.get('description', '')
-                        }
-                        for ability in zh_abilities
-                        if ability.get('name') and ability.get('description')
-                    ]
-                    
-                    item['passive_en'] = en_warframe.get('passiveDescription', '')
-                    item['passive_zh'] = zh_warframe.get('passiveDescription', '')
-                    item['mastery_rank'] = int(en_warframe.get('masteryReq', 0))
-                    item['polarities'] = en_warframe.get('polarities', [])
-                    
-                    # 图片和链接
-                    item['image_url'] = en_warframe.get('wikiaThumbnail', '')
-                    item['wiki_url'] = en_warframe.get('wikiaUrl', '')
-                    
-                    # 检查必要字段
-                    if not (item['name_en'] and item['health'] > 0):
-                        self.logger.warning(f"跳过无效的Warframe数据: {en_warframe.get('name', 'unknown')}")
-                        continue
-                        
-                    yield item
-                    
-                except (ValueError, TypeError) as e:
-                    self.logger.warning(f"处理{en_warframe.get('name')}的数值属性时出错: {str(e)}")
-                    continue
-                
-        except json.JSONDecodeError as e:
-            self.logger.error(f"解析中文JSON数据失败: {str(e)}")
-            self.logger.debug(f"响应内容: {response.text[:200]}...")
-        except Exception as e:
-            self.logger.error(f"处理中文数据时出错: {str(e)}")
+    def include_record(self, record):
+        return not any(keyword in str(record.get('uniqueName', '')).lower() 
+                       for keyword in ['archwing'])
 
-    def closed(self, reason):
-        self.logger.info(f'WARFRAME爬虫关闭，原因: {reason}') 
\ No newline at end of file
+    def validate_item(self, item):
+        if not (item['name_en'] and item['health'] > 0):
+            return '缺少名称或生命值无效'
+        return None
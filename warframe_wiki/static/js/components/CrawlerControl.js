@@ -8,6 +8,8 @@ const CrawlerControl = {
     data() {
         return {
             statusCheckInterval: null,
+            pollInterval: null,
+            eventSource: null,
             error: null
         };
     },
@@ -26,6 +28,20 @@ const CrawlerControl = {
                             <i class="fas fa-tasks"></i>
                             <span>当前任务: {{ crawlerStatus.current_type }}</span>
                         </div>
+                        <div v-if="crawlerStatus.is_running && crawlerStatus.job" class="status-item">
+                            <i class="fas fa-chart-line"></i>
+                            <span>已获取 {{ crawlerStatus.job.items_scraped }} 条（{{ crawlerStatus.job.items_per_second }} 条/秒），已写入 {{ crawlerStatus.job.items_written }} 条，下载 {{ formatBytes(crawlerStatus.job.bytes_downloaded) }}</span>
+                        </div>
+                        <template v-if="crawlerStatus.is_running && crawlerStatus.job">
+                            <div v-for="(spider, name) in crawlerStatus.job.spiders" :key="name" class="status-item small">
+                                <i class="fas fa-spider"></i>
+                                <span>{{ name }}: {{ spider.items_scraped }} / {{ spider.items_written }}
+                                    <span v-for="(language, code) in spider.languages" :key="code" class="ms-1">
+                                        {{ code }}{{ language.records !== undefined ? ' ' + language.records : '' }}
+                                    </span>
+                                </span>
+                            </div>
+                        </template>
                         <div v-if="crawlerStatus.message" class="status-item">
                             <i class="fas fa-info-circle"></i>
                             <span>{{ crawlerStatus.message }}</span>
@@ -35,6 +51,13 @@ const CrawlerControl = {
                             <span>上次运行: {{ new Date(crawlerStatus.last_run).toLocaleString() }}</span>
                         </div>
                     </div>
+
+                    <button v-if="crawlerStatus.is_running"
+                            class="btn btn-outline-danger w-100 mb-3"
+                            @click="cancelCrawler()"
+                            :disabled="crawlerStatus.job && crawlerStatus.job.cancel_requested">
+                        <i class="fas fa-stop"></i> 取消任务
+                    </button>
                     
                     <div class="crawler-actions">
                         <button class="btn btn-primary w-100 mb-3" 
@@ -100,18 +123,46 @@ const CrawlerControl = {
                 if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
                 const result = await response.json();
                 
-                if (result.success) {
+                if (!result.success) {
+                    this.error = result.message;
+                } else {
+                    this.error = null;
                     this.$emit('update:crawlerStatus', {
                         ...this.crawlerStatus,
                         is_running: true,
                         current_type: type || 'all'
                     });
-                    this.startStatusCheck();
+                    // 支持事件推送时由服务器推送状态，否则轮询
+                    if (!this.eventSource) {
+                        this.startStatusCheck();
+                    }
                 }
             } catch (e) {
                 this.error = `启动爬虫失败: ${e.message}`;
             }
         },
+        async cancelCrawler() {
+            try {
+                const response = await fetch('/api/crawler/cancel', {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json',
+                    },
+                    body: JSON.stringify({ job_id: this.crawlerStatus.job ? this.crawlerStatus.job.id : null })
+                });
+
+                if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
+                const result = await response.json();
+                if (!result.success) throw new Error(result.message);
+                this.checkCrawlerStatus();
+            } catch (e) {
+                this.error = `取消爬虫失败: ${e.message}`;
+            }
+        },
+        formatBytes(bytes) {
+            if (bytes >= 1024 * 1024) return `${(bytes / 1024 / 1024).toFixed(1)} MB`;
+            return `${(bytes / 1024).toFixed(1)} KB`;
+        },
         async checkCrawlerStatus() {
             try {
                 const response = await fetch('/api/crawler/status');
@@ -131,6 +182,43 @@ const CrawlerControl = {
                 // 静默处理状态检查错误
             }
         },
+        connectEvents() {
+            this.eventSource = new EventSource('/api/crawler/events');
+            this.eventSource.addEventListener('status', (event) => {
+                const newStatus = JSON.parse(event.data);
+                const wasRunning = this.crawlerStatus.is_running;
+                this.$emit('update:crawlerStatus', newStatus);
+                if (wasRunning && !newStatus.is_running) {
+                    this.$emit('crawler-complete');
+                }
+            });
+            this.eventSource.addEventListener('progress', (event) => {
+                const progress = JSON.parse(event.data);
+                const job = this.crawlerStatus.job;
+                if (job && job.id === progress.id) {
+                    this.$emit('update:crawlerStatus', {
+                        ...this.crawlerStatus,
+                        job: { ...job, ...progress }
+                    });
+                }
+            });
+            this.eventSource.addEventListener('stats', (event) => {
+                this.$emit('stats-update', JSON.parse(event.data));
+            });
+            this.eventSource.onerror = () => {
+                // 服务器不提供事件流时（只读部署返回404）浏览器不会重连，改为轮询
+                if (this.eventSource && this.eventSource.readyState === EventSource.CLOSED) {
+                    this.eventSource = null;
+                    this.startPolling();
+                }
+            };
+        },
+        startPolling() {
+            this.checkCrawlerStatus();
+            this.pollInterval = setInterval(() => {
+                this.checkCrawlerStatus();
+            }, 30000);
+        },
         startStatusCheck() {
             if (this.statusCheckInterval) {
                 clearInterval(this.statusCheckInterval);
@@ -147,12 +235,20 @@ const CrawlerControl = {
         }
     },
     mounted() {
-        this.checkCrawlerStatus();
-        setInterval(() => {
-            this.checkCrawlerStatus();
-        }, 30000);
+        if (window.EventSource) {
+            // 连接后立即收到当前状态，之后由服务器推送变化
+            this.connectEvents();
+            return;
+        }
+        this.startPolling();
     },
     beforeDestroy() {
         this.stopStatusCheck();
+        if (this.pollInterval) {
+            clearInterval(this.pollInterval);
+        }
+        if (this.eventSource) {
+            this.eventSource.close();
+        }
     }
 }; 
\ No newline at end of file
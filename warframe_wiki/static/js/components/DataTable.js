@@ -15,6 +15,8 @@ const DataTable = {
             loading: false,
             error: null,
             searchQuery: '',
+            suggestions: [],
+            searchTimer: null,
             pagination: {
                 total: 0,
                 page: 1,
@@ -29,7 +31,13 @@ const DataTable = {
                 <input type="text" class="form-control" 
                        placeholder="搜索..." 
                        v-model="searchQuery"
+                       :list="'suggest-' + type"
                        @input="onSearch">
+                <datalist :id="'suggest-' + type">
+                    <option v-for="item in suggestions" :key="item.id + item.matched" :value="item[item.matched]">
+                        {{ item.name_zh || item.name_en }}
+                    </option>
+                </datalist>
             </div>
 
             <!-- 数据表格 -->
@@ -199,9 +207,32 @@ const DataTable = {
             if (!text) return '';
             return text.replace(/<[^>]+>/g, '');
         },
+        async fetchSuggestions() {
+            const query = this.searchQuery.trim();
+            if (!query) {
+                this.suggestions = [];
+                return;
+            }
+            try {
+                const params = new URLSearchParams({ q: query, type: this.type, limit: 8 });
+                const response = await fetch(`/api/suggest?${params}`);
+                const result = await response.json();
+                // 忽略输入已经变化后才返回的结果
+                if (result.success && query === this.searchQuery.trim()) {
+                    this.suggestions = result.data;
+                }
+            } catch (e) {
+                console.error('获取自动补全建议失败:', e);
+            }
+        },
         onSearch() {
-            this.pagination.page = 1;
-            this.fetchData();
+            // 每次输入只查询内存中的补全索引，停止输入后再执行完整的搜索
+            this.fetchSuggestions();
+            clearTimeout(this.searchTimer);
+            this.searchTimer = setTimeout(() => {
+                this.pagination.page = 1;
+                this.fetchData();
+            }, 300);
         },
         async changePage(newPage) {
             if (newPage < 1 || newPage > this.totalPages || newPage === this.pagination.page) {
@@ -248,6 +279,7 @@ const DataTable = {
             handler() {
                 this.pagination.page = 1;
                 this.searchQuery = '';
+                this.suggestions = [];
                 this.fetchData();
             },
             immediate: true
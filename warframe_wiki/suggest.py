@@ -0,0 +1,196 @@
+import heapq
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+from sqlalchemy import select
+from .database import Warframe, Weapon, Mod, init_read_db
+from .versions import get_versions
+from .replica import replica
+
+logger = logging.getLogger(__name__)
+
+# 参与自动补全的数据表和名称字段
+SUGGEST_MODELS = {model.__tablename__: model for model in (Warframe, Weapon, Mod)}
+SUGGEST_FIELDS = ('name_en', 'name_zh', 'name_alias')
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+# 两次检查数据版本的最小间隔（秒），期间的请求直接使用当前索引
+VERSION_CHECK_INTERVAL = 1.0
+# 变化的索引项超过总数的该比例时整体重建，否则逐项插入和删除
+REBUILD_RATIO = 0.125
+
+def normalize(text):
+    """折叠大小写并合并空白"""
+    return ' '.join(text.split()).lower()
+
+def _is_cjk(char):
+    return '\u2e80' <= char <= '\u9fff' or '\u3040' <= char <= '\u30ff' or '\uac00' <= char <= '\ud7af'
+
+def word_starts(key):
+    """名称中除开头外可以作为匹配起点的位置：每个单词的开头，以及每个中日韩字符"""
+    return [
+        i for i in range(1, len(key))
+        if key[i].isalnum() and (not key[i - 1].isalnum() or _is_cjk(key[i]))
+    ]
+
+def index_entries(data_type, entity_id, names):
+    """一条记录的索引项，返回 (完整名称的索引项, 名称中单词开头的索引项)
+
+    索引项为 (小写名称或其后缀, 数据类型, id, 字段)，按元组顺序排序后可以用二分查找定位前缀。
+    """
+    full, words = [], []
+    for field, name in zip(SUGGEST_FIELDS, names):
+        if not name:
+            continue
+        key = normalize(name)
+        if not key:
+            continue
+        full.append((key, data_type, entity_id, field))
+        words.extend((key[i:], data_type, entity_id, field) for i in word_starts(key))
+    return full, words
+
+def _splice(entries, removed, added):
+    """返回删除和插入若干索引项后的新列表（不修改原列表，正在查询的请求不受影响）"""
+    if (len(removed) + len(added)) > len(entries) * REBUILD_RATIO:
+        removed = set(removed)
+        return sorted([entry for entry in entries if entry not in removed] + added)
+    entries = list(entries)
+    for entry in removed:
+        index = bisect_left(entries, entry)
+        if index < len(entries) and entries[index] == entry:
+            del entries[index]
+    for entry in added:
+        insort(entries, entry)
+    return entries
+
+def _prefix_range(entries, prefix):
+    """从前缀的起点开始按顺序产出索引项，直到前缀不再匹配"""
+    index = bisect_left(entries, (prefix,))
+    while index < len(entries):
+        entry = entries[index]
+        if not entry[0].startswith(prefix):
+            return
+        yield entry
+        index += 1
+
+class SuggestIndex:
+    """名称自动补全的前缀索引
+
+    warframes/weapons/mods的中文名、英文名和别名按小写排序，每种数据类型保存在一个有序列表中，
+    查询时在各类型的列表中二分查找前缀的起点，归并后顺序取出前N条，与数据量无关。
+    完整名称的前缀匹配排在前面，其次是名称中某个单词（或中文名中任意位置）开头的匹配。
+    数据版本变化时只对新增、修改和删除的记录更新索引项，更新后整体替换索引引用。
+    """
+
+    def __init__(self, models=SUGGEST_MODELS, check_interval=VERSION_CHECK_INTERVAL,
+                 session_factory=init_read_db):
+        self.models = models
+        self.check_interval = check_interval
+        self.session_factory = session_factory
+        # {'full': {类型: [索引项]}, 'words': {类型: [索引项]}, 'names': {(类型, id): (名称...)}}
+        self.state = {
+            'full': {table_name: [] for table_name in models},
+            'words': {table_name: [] for table_name in models},
+            'names': {},
+        }
+        # {表名: 已建立索引的数据版本}
+        self.versions = {}
+        self.checked_at = None
+        self.lock = threading.Lock()
+
+    def _load_names(self, db, table_name):
+        """读取一张表所有记录的名称 {id: (name_en, name_zh, name_alias)}"""
+        if replica.active:
+            # 启用只读副本时直接使用内存中的列
+            columns = replica.state['snapshots'][table_name].columns
+            return dict(zip(columns['id'], zip(*[columns[field] for field in SUGGEST_FIELDS])))
+        table = self.models[table_name].__table__
+        query = select(table.c.id, *[table.c[field] for field in SUGGEST_FIELDS])
+        return {row[0]: tuple(row[1:]) for row in db.execute(query)}
+
+    def _current_versions(self, db):
+        if replica.active:
+            return dict(zip(self.models, replica.versions(tuple(self.models))))
+        return get_versions(db)
+
+    def refresh(self):
+        """检查数据版本，更新变化的表的索引项，返回更新的记录数"""
+        with self.lock:
+            self.checked_at = time.monotonic()
+            db = self.session_factory()
+            try:
+                versions = self._current_versions(db)
+                changed_tables = [
+                    table_name for table_name in self.models
+                    if table_name not in self.versions or versions.get(table_name, 0) != self.versions[table_name]
+                ]
+                loaded = {table_name: self._load_names(db, table_name) for table_name in changed_tables}
+            finally:
+                db.close()
+            if not changed_tables:
+                return 0
+
+            state = self.state
+            names = dict(state['names'])
+            full_entries, word_entries = dict(state['full']), dict(state['words'])
+            changed = set()
+            for table_name, rows in loaded.items():
+                removed_full, removed_words, added_full, added_words = [], [], [], []
+                previous = {
+                    entity_id: values for (data_type, entity_id), values in state['names'].items()
+                    if data_type == table_name
+                }
+                for entity_id, values in previous.items():
+                    if rows.get(entity_id) != values:
+                        full, words = index_entries(table_name, entity_id, values)
+                        removed_full.extend(full)
+                        removed_words.extend(words)
+                        del names[(table_name, entity_id)]
+                        changed.add((table_name, entity_id))
+                for entity_id, values in rows.items():
+                    if previous.get(entity_id) != values:
+                        full, words = index_entries(table_name, entity_id, values)
+                        added_full.extend(full)
+                        added_words.extend(words)
+                        names[(table_name, entity_id)] = values
+                        changed.add((table_name, entity_id))
+                full_entries[table_name] = _splice(full_entries[table_name], removed_full, added_full)
+                word_entries[table_name] = _splice(word_entries[table_name], removed_words, added_words)
+                self.versions[table_name] = versions.get(table_name, 0)
+
+            self.state = {'full': full_entries, 'words': word_entries, 'names': names}
+        if changed:
+            logger.info(f"自动补全索引已更新: {', '.join(changed_tables)}，{len(changed)} 条记录变化")
+        return len(changed)
+
+    def ensure_current(self):
+        if self.checked_at is None or time.monotonic() - self.checked_at >= self.check_interval:
+            self.refresh()
+
+    def lookup(self, query, limit=DEFAULT_LIMIT, data_types=None):
+        """返回名称以query开头（或名称中某个单词以query开头）的前limit条记录"""
+        self.ensure_current()
+        prefix = normalize(query)
+        if not prefix or limit <= 0:
+            return []
+        state = self.state
+        data_types = [name for name in self.models if not data_types or name in data_types]
+        results, seen = [], set()
+        for group in (state['full'], state['words']):
+            for key, data_type, entity_id, field in heapq.merge(
+                *[_prefix_range(group[name], prefix) for name in data_types]
+            ):
+                if len(results) >= limit:
+                    break
+                if (data_type, entity_id) not in seen:
+                    seen.add((data_type, entity_id))
+                    results.append((data_type, entity_id, field))
+        return [
+            dict(type=data_type, id=entity_id, matched=field,
+                 **dict(zip(SUGGEST_FIELDS, state['names'][(data_type, entity_id)])))
+            for data_type, entity_id, field in results
+        ]
+
+suggest_index = SuggestIndex()
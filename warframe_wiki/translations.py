@@ -0,0 +1,88 @@
+from sqlalchemy import select, delete, insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from .database import Translation
+
+# 每条语句中IN列表的最大长度，避免超过SQLite的变量数限制
+IN_CHUNK_SIZE = 500
+
+def _chunks(values, size=IN_CHUNK_SIZE):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+def _is_empty(value):
+    return value is None or value == '' or value == []
+
+def replace_translations(db, entity_type, entries):
+    """替换实体的全部翻译
+
+    entries为 [(entity_id, {语言: {字段: 文本}})]，空值不保存；
+    只在调用方的事务中执行，由调用方提交。
+    """
+    entries = [(entity_id, translations) for entity_id, translations in entries if translations is not None]
+    if not entries:
+        return
+    ids = [entity_id for entity_id, _ in entries]
+    for chunk in _chunks(ids):
+        db.execute(delete(Translation).where(
+            Translation.entity_type == entity_type,
+            Translation.entity_id.in_(chunk)
+        ))
+    rows = [
+        {'entity_type': entity_type, 'entity_id': entity_id, 'lang': lang, 'field': field, 'value': value}
+        for entity_id, translations in entries
+        for lang, fields in translations.items()
+        for field, value in fields.items()
+        if not _is_empty(value)
+    ]
+    if rows:
+        db.execute(insert(Translation), rows)
+
+def set_translation(db, entity_type, entity_id, field, lang, value):
+    """更新单个字段在某种语言下的文本（手动编辑_en/_zh字段时保持同步）"""
+    if _is_empty(value):
+        db.execute(delete(Translation).where(
+            Translation.entity_type == entity_type,
+            Translation.entity_id == entity_id,
+            Translation.lang == lang,
+            Translation.field == field
+        ))
+        return
+    stmt = sqlite_insert(Translation).values(
+        entity_type=entity_type, entity_id=entity_id, lang=lang, field=field, value=value
+    )
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[Translation.entity_type, Translation.entity_id, Translation.lang, Translation.field],
+        set_={'value': stmt.excluded.value}
+    ))
+
+def load_translations(db, entity_type, entity_ids, lang, fields=None):
+    """按主键索引读取一批实体在某种语言下的文本 {entity_id: {字段: 文本}}"""
+    result = {}
+    entity_ids = list(entity_ids)
+    for chunk in _chunks(entity_ids):
+        query = select(Translation.entity_id, Translation.field, Translation.value).where(
+            Translation.entity_type == entity_type,
+            Translation.entity_id.in_(chunk),
+            Translation.lang == lang
+        )
+        if fields:
+            query = query.where(Translation.field.in_(list(fields)))
+        for entity_id, field, value in db.execute(query):
+            result.setdefault(entity_id, {})[field] = value
+    return result
+
+def attach_translations(db, entity_type, rows, translated):
+    """为序列化后的行补充翻译字段，translated为 [(字段名, 翻译字段, 语言)]，缺少的翻译为None"""
+    if not rows or not translated:
+        return rows
+    by_lang = {}
+    for name, field, lang in translated:
+        by_lang.setdefault(lang, []).append((name, field))
+    ids = [row['id'] for row in rows]
+    for lang, names in by_lang.items():
+        loaded = load_translations(db, entity_type, ids, lang, [field for _, field in names])
+        for row in rows:
+            values = loaded.get(row['id'], {})
+            for name, field in names:
+                row[name] = values.get(field)
+    return rows
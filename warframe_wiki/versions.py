@@ -0,0 +1,115 @@
+import logging
+from sqlalchemy import text, select
+from .database import DataVersion
+
+logger = logging.getLogger(__name__)
+
+# 需要跟踪版本和统计信息的数据表
+VERSIONED_TABLES = ('warframes', 'weapons', 'mods')
+
+# 每种写操作对版本表的增量更新
+_TRIGGER_UPDATES = {
+    'INSERT': "version = version + 1, row_count = row_count + 1, "
+              "last_updated = coalesce(max(last_updated, new.last_updated), last_updated, new.last_updated)",
+    'UPDATE': "version = version + 1, "
+              "last_updated = coalesce(max(last_updated, new.last_updated), last_updated, new.last_updated)",
+    # 删除的是最后更新的记录时才重新计算最大值
+    'DELETE': "version = version + 1, row_count = row_count - 1, "
+              "last_updated = CASE WHEN old.last_updated >= last_updated "
+              "THEN (SELECT max(last_updated) FROM {table}) ELSE last_updated END",
+}
+
+def _trigger_ddl(table_name):
+    """返回 [(触发器名, CREATE语句)]"""
+    triggers = []
+    for event, updates in _TRIGGER_UPDATES.items():
+        name = f"{table_name}_stats_{event.lower()}"
+        triggers.append((name,
+            f"CREATE TRIGGER {name} "
+            f"AFTER {event} ON {table_name} BEGIN "
+            f"UPDATE data_versions SET {updates.format(table=table_name)} WHERE table_name = '{table_name}'; END"
+        ))
+    return triggers
+
+def _rebuild_sql(table_name):
+    return text(
+        f"UPDATE data_versions SET "
+        f"row_count = (SELECT count(*) FROM {table_name}), "
+        f"last_updated = (SELECT max(last_updated) FROM {table_name}) "
+        f"WHERE table_name = :name"
+    ).bindparams(name=table_name)
+
+def ensure_version_tracking(engine):
+    """初始化版本表并创建增量维护版本号和统计信息的触发器"""
+    with engine.begin() as conn:
+        for table_name in VERSIONED_TABLES:
+            conn.execute(
+                text("INSERT OR IGNORE INTO data_versions (table_name, version) VALUES (:name, 0)"),
+                {'name': table_name}
+            )
+            changed = False
+            for name, ddl in _trigger_ddl(table_name):
+                # 旧版本只维护版本号的触发器
+                conn.execute(text(f"DROP TRIGGER IF EXISTS {name.replace('_stats_', '_version_')}"))
+                existing = conn.execute(
+                    text("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = :name"), {'name': name}
+                ).scalar()
+                if existing != ddl:
+                    # 触发器定义有变化时重建
+                    conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+                    conn.execute(text(ddl))
+                    changed = changed or existing is not None
+            # 新建、从旧版本升级或触发器定义变化时，从基础表重新计算统计信息
+            missing = conn.execute(
+                text("SELECT row_count IS NULL FROM data_versions WHERE table_name = :name"),
+                {'name': table_name}
+            ).scalar()
+            if missing or changed:
+                conn.execute(_rebuild_sql(table_name))
+
+def get_versions(db):
+    """读取所有数据表的当前版本号 {表名: 版本}"""
+    return dict(db.execute(select(DataVersion.table_name, DataVersion.version)).all())
+
+def get_version(db, table_name):
+    return db.execute(
+        select(DataVersion.version).where(DataVersion.table_name == table_name)
+    ).scalar() or 0
+
+def get_table_stats(db):
+    """一次读取所有数据表的统计信息 {表名: {'count', 'last_updated'}}"""
+    rows = db.execute(
+        select(DataVersion.table_name, DataVersion.row_count, DataVersion.last_updated)
+    ).all()
+    return {
+        table_name: {'count': row_count or 0, 'last_updated': last_updated}
+        for table_name, row_count, last_updated in rows
+    }
+
+def check_table_stats(db, repair=False):
+    """将统计信息与基础表的实际数据比对，返回不一致的表
+
+    repair为True时从基础表重建不一致的统计信息。
+    """
+    mismatches = {}
+    for table_name in VERSIONED_TABLES:
+        recorded = db.execute(
+            text("SELECT row_count, last_updated FROM data_versions WHERE table_name = :name"),
+            {'name': table_name}
+        ).one_or_none()
+        actual = db.execute(
+            text(f"SELECT count(*), max(last_updated) FROM {table_name}")
+        ).one()
+        recorded = tuple(recorded) if recorded else (None, None)
+        if recorded != tuple(actual):
+            mismatches[table_name] = {
+                'recorded': {'count': recorded[0], 'last_updated': recorded[1]},
+                'actual': {'count': actual[0], 'last_updated': actual[1]}
+            }
+
+    if repair and mismatches:
+        for table_name in mismatches:
+            db.execute(_rebuild_sql(table_name))
+        db.commit()
+        logger.info(f"已重建统计信息: {', '.join(mismatches)}")
+    return mismatches
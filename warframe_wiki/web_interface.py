@@ -1,18 +1,27 @@
-from flask import Flask, send_from_directory, jsonify, request, make_response, render_template
-from .database import init_db, Warframe, Weapon, Mod
+from flask import Flask, send_from_directory, jsonify, request, make_response, render_template, Response, stream_with_context, g
+from .database import Warframe, Weapon, Mod
+from .engine import get_engine, get_read_engine
+from .response_cache import response_cache
+from .versions import get_version
+from .serializers import json_response, translated_fields, LANGUAGES
+from .translations import set_translation
+from .read_api import stats_payload, list_payload, suggest_payload
+from .replica import replica
+from .suggest import suggest_index
+from .exporters import EXPORT_MODELS, export_columns, iter_rows, encode_rows
 import logging
 from datetime import datetime
-from sqlalchemy import func
 import os
 import json
-from sqlalchemy.orm import scoped_session
-from scrapy.crawler import CrawlerProcess
-from scrapy.utils.project import get_project_settings
-from .spiders.warframe_spider import WarframeSpider
-from .spiders.weapon_spider import WeaponSpider
-from .spiders.mod_spider import ModSpider
+from sqlalchemy.orm import scoped_session, sessionmaker
+from .jobs import SPIDER_CLASSES, enqueue_job, cancel_job, list_jobs, current_status, run_next_job
+from .events import broadcaster
+from .metrics import registry, read_families, HTTP_REQUEST_SECONDS, HTTP_REQUEST_QUERIES, start_request_queries, finish_request_queries
+from .settings import METRICS_FILE, READ_REPLICA_ENABLED
 import multiprocessing
 import time
+import hashlib
+import zlib
 
 # 获取当前文件所在目录
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -20,24 +29,42 @@ static_dir = os.path.join(current_dir, 'static')
 
 app = Flask(__name__, static_url_path='', static_folder=static_dir)
 
-# 创建数据库会话工厂
-Session = scoped_session(init_db)
-
-# 全局变量用于追踪爬虫状态
-crawler_status = {
-    'is_running': False,
-    'last_run': None,
-    'message': '',
-    'current_type': None
-}
+# 创建数据库会话工厂：写操作使用共享可写引擎，读取接口使用只读连接池
+Session = scoped_session(sessionmaker(bind=get_engine()))
+ReadSession = scoped_session(sessionmaker(bind=get_read_engine()))
 
 @app.teardown_appcontext
 def shutdown_session(exception=None):
     Session.remove()
+    ReadSession.remove()
+
+@app.before_request
+def start_request_metrics():
+    g.request_started = time.perf_counter()
+    start_request_queries()
+
+@app.before_request
+def reject_writes_in_read_only_mode():
+    """只读部署（serve.py）不允许编辑数据和控制爬虫"""
+    if app.config.get('READ_ONLY') and request.method not in ('GET', 'HEAD', 'OPTIONS'):
+        return jsonify({'success': False, 'error': '只读服务不支持修改数据或启动爬虫'}), 405
+
+@app.after_request
+def record_request_metrics(response):
+    """按路由记录响应时间和SQL语句数（流式响应只计到开始输出为止）"""
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, request.method, route, response.status_code)
+        HTTP_REQUEST_QUERIES.observe(finish_request_queries(), route)
+    return response
 
 def get_db():
     return Session()
 
+def get_read_db():
+    return ReadSession()
+
 # 确保日志目录存在
 log_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
 if not os.path.exists(log_dir):
@@ -59,33 +86,20 @@ def index():
 def send_js(path):
     return send_from_directory(os.path.join(app.static_folder, 'js'), path)
 
+@app.route('/metrics')
+def metrics():
+    """Prometheus文本格式的指标，包括Web进程自身和爬虫进程写入METRICS_FILE的指标"""
+    body = registry.render([read_families(METRICS_FILE)])
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/stats')
+@response_cache.cached(['warframes', 'weapons', 'mods'])
 def get_stats():
     """获取数据库统计信息"""
     db = None
     try:
-        db = get_db()
-        stats = {
-            'warframes': {
-                'count': db.query(func.count(Warframe.id)).scalar(),
-                'last_updated': db.query(func.max(Warframe.last_updated)).scalar()
-            },
-            'weapons': {
-                'count': db.query(func.count(Weapon.id)).scalar(),
-                'last_updated': db.query(func.max(Weapon.last_updated)).scalar()
-            },
-            'mods': {
-                'count': db.query(func.count(Mod.id)).scalar(),
-                'last_updated': db.query(func.max(Mod.last_updated)).scalar()
-            }
-        }
-        
-        # 格式化时间
-        for category in stats.values():
-            if category['last_updated']:
-                category['last_updated'] = category['last_updated'].strftime('%Y-%m-%d %H:%M:%S')
-        
-        response = jsonify({'success': True, 'data': stats})
+        db = get_read_db()
+        response = jsonify(stats_payload(db))
         return no_cache_response(response)
     except Exception as e:
         app.logger.error(f"获取统计信息失败: {str(e)}")
@@ -97,52 +111,15 @@ def get_stats():
         if db:
             db.close()
 
-@app.route('/api/warframes')
-def get_warframes():
+def list_items(model, label):
+    """列表/搜索接口的通用实现，见 read_api.list_payload"""
     db = None
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
-        search = request.args.get('search', '')
-        
-        db = get_db()
-        query = db.query(Warframe)
-        if search:
-            search = f"%{search}%"
-            query = query.filter(Warframe.name_en.ilike(search))
-        
-        total = query.count()
-        warframes = query.offset((page - 1) * per_page).limit(per_page).all()
-        
-        response = jsonify({
-            'success': True,
-            'data': [{
-                'id': str(w.id),
-                'name_en': w.name_en,
-                'name_zh': w.name_zh,
-                'name_alias': w.name_alias,
-                'description_en': w.description_en,
-                'description_zh': w.description_zh,
-                'health': w.health,
-                'shield': w.shield,
-                'armor': w.armor,
-                'energy': w.energy,
-                'sprint_speed': w.sprint_speed,
-                'mastery_rank': w.mastery_rank,
-                'abilities_en': w.abilities_en,
-                'abilities_zh': w.abilities_zh,
-                'passive_en': w.passive_en,
-                'passive_zh': w.passive_zh,
-                'polarities': w.polarities,
-                'last_updated': w.last_updated.strftime('%Y-%m-%d %H:%M:%S') if w.last_updated else None
-            } for w in warframes],
-            'total': total,
-            'page': page,
-            'per_page': per_page
-        })
+        db = get_read_db()
+        response = json_response(list_payload(db, model, request.args))
         return no_cache_response(response)
     except Exception as e:
-        app.logger.error(f"获取Warframes数据失败: {str(e)}")
+        app.logger.error(f"获取{label}数据失败: {str(e)}")
         if db:
             db.rollback()
         response = jsonify({'success': False, 'error': str(e)})
@@ -151,112 +128,100 @@ def get_warframes():
         if db:
             db.close()
 
-@app.route('/api/weapons')
-def get_weapons():
-    db = None
+@app.route('/api/suggest')
+def suggest():
+    """名称自动补全，见 read_api.suggest_payload"""
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
-        search = request.args.get('search', '')
-        
-        db = get_db()
-        query = db.query(Weapon)
-        if search:
-            search = f"%{search}%"
-            query = query.filter(Weapon.name_en.ilike(search))
-        
-        total = query.count()
-        weapons = query.offset((page - 1) * per_page).limit(per_page).all()
-        
-        response = jsonify({
-            'success': True,
-            'data': [{
-                'id': str(w.id),
-                'name_en': w.name_en,
-                'name_zh': w.name_zh,
-                'name_alias': w.name_alias,
-                'description_en': w.description_en,
-                'description_zh': w.description_zh,
-                'type': w.type,
-                'mastery_rank': w.mastery_rank,
-                'damage': w.damage,
-                'critical_chance': w.critical_chance,
-                'critical_multiplier': w.critical_multiplier,
-                'status_chance': w.status_chance,
-                'fire_rate': w.fire_rate,
-                'accuracy': w.accuracy,
-                'magazine_size': w.magazine_size,
-                'reload_time': w.reload_time,
-                'disposition': w.disposition,
-                'last_updated': w.last_updated.strftime('%Y-%m-%d %H:%M:%S') if w.last_updated else None
-            } for w in weapons],
-            'total': total,
-            'page': page,
-            'per_page': per_page
-        })
+        response = json_response(suggest_payload(request.args))
         return no_cache_response(response)
     except Exception as e:
-        app.logger.error(f"获取Weapons数据失败: {str(e)}")
-        if db:
-            db.rollback()
+        app.logger.error(f"获取自动补全建议失败: {str(e)}")
         response = jsonify({'success': False, 'error': str(e)})
         return no_cache_response(response)
-    finally:
-        if db:
-            db.close()
+
+@app.route('/api/warframes')
+@response_cache.cached(['warframes'])
+def get_warframes():
+    return list_items(Warframe, 'Warframes')
+
+@app.route('/api/weapons')
+@response_cache.cached(['weapons'])
+def get_weapons():
+    return list_items(Weapon, 'Weapons')
 
 @app.route('/api/mods')
+@response_cache.cached(['mods'])
 def get_mods():
-    db = None
+    return list_items(Mod, 'Mods')
+
+# 流式导出支持的格式及对应的MIME类型
+EXPORT_MIMETYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+def export_etag(db, model, fmt, compress):
+    """根据数据表的版本号生成导出内容的ETag"""
+    version = get_version(db, model.__tablename__)
+    digest = hashlib.sha1(
+        # 包含导出的列，列变化后客户端缓存的旧内容失效
+        f"{model.__tablename__}:{fmt}:{version}:{','.join(export_columns(model))}".encode('utf-8')
+    ).hexdigest()
+    return digest + ('-gz' if compress else '')
+
+def gzip_stream(chunks):
+    """对文本块进行流式gzip压缩"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+@app.route('/api/export/<string:data_type>')
+def export_data(data_type):
+    """以分块响应流式导出整张表（NDJSON或CSV）"""
+    if data_type not in EXPORT_MODELS:
+        return jsonify({'success': False, 'error': '无效的数据类型'}), 404
+
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_MIMETYPES:
+        return jsonify({'success': False, 'error': f'不支持的导出格式: {fmt}'}), 400
+
+    model = EXPORT_MODELS[data_type]
+    compress = bool(request.accept_encodings['gzip'])
+
+    db = get_read_db()
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
-        search = request.args.get('search', '')
-        
-        db = get_db()
-        query = db.query(Mod)
-        if search:
-            search = f"%{search}%"
-            query = query.filter(Mod.name_en.ilike(search))
-        
-        total = query.count()
-        mods = query.offset((page - 1) * per_page).limit(per_page).all()
-        
-        response = jsonify({
-            'success': True,
-            'data': [{
-                'id': str(m.id),
-                'name_en': m.name_en,
-                'name_zh': m.name_zh,
-                'name_alias': m.name_alias,
-                'description_en': m.description_en,
-                'description_zh': m.description_zh,
-                'polarity': m.polarity,
-                'rarity': m.rarity,
-                'drain': m.drain,
-                'effect_en': m.effect_en,
-                'effect_zh': m.effect_zh,
-                'max_rank': m.max_rank,
-                'tradable': m.tradable,
-                'mod_set': m.mod_set,
-                'base_effects': m.base_effects,
-                'upgrade_effects': m.upgrade_effects,
-                'last_updated': m.last_updated.strftime('%Y-%m-%d %H:%M:%S') if m.last_updated else None
-            } for m in mods],
-            'total': total,
-            'page': page,
-            'per_page': per_page
-        })
-        return no_cache_response(response)
-    except Exception as e:
-        app.logger.error(f"获取Mods数据失败: {str(e)}")
-        if db:
-            db.rollback()
-        response = jsonify({'success': False, 'error': str(e)})
-        return no_cache_response(response)
+        etag = export_etag(db, model, fmt, compress)
     finally:
-        if db:
-            db.close()
+        db.close()
+
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        columns = export_columns(model)
+
+        def generate():
+            stream_db = get_read_db()
+            try:
+                yield from encode_rows(iter_rows(stream_db, model), fmt, columns)
+            finally:
+                stream_db.close()
+
+        chunks = generate()
+        response = Response(
+            stream_with_context(gzip_stream(chunks) if compress else (c.encode('utf-8') for c in chunks)),
+            mimetype=EXPORT_MIMETYPES[fmt]
+        )
+        response.headers['Content-Disposition'] = f'attachment; filename={data_type}.{fmt}'
+        if compress:
+            response.headers['Content-Encoding'] = 'gzip'
+
+    response.set_etag(etag)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 @app.route('/api/<string:data_type>/<path:item_id>', methods=['PUT'])
 def update_item(data_type, item_id):
@@ -293,7 +258,12 @@ def update_item(data_type, item_id):
             return jsonify({'success': False, 'error': '未找到要更新的项目'})
 
         # 更新记录
+        bilingual = translated_fields(model)
         for key, value in data.items():
+            field, _, lang = key.rpartition('_')
+            if field in bilingual and lang in LANGUAGES:
+                # 同步translations表，其他语言的文本只保存在translations表中
+                set_translation(db, data_type, item.id, field, lang, value)
             if key != 'id' and key != 'last_updated' and hasattr(item, key):
                 if key == 'damage' and isinstance(value, dict):
                     value = json.dumps(value)
@@ -304,6 +274,10 @@ def update_item(data_type, item_id):
         try:
             db.commit()
             app.logger.info("更新成功")
+            if replica.active:
+                # 立即重新加载只读副本，编辑后的列表接口返回新数据
+                replica.refresh()
+            suggest_index.refresh()
             
             # 转换为字典
             result = {
@@ -383,127 +357,112 @@ def update_item(data_type, item_id):
         if db:
             db.close()
 
-def run_crawler_task(spider_type=None):
-    """在单独的进程中运行爬虫
-    Args:
-        spider_type: 可选值为 'warframes', 'weapons', 'mods' 或 None（爬取所有）
-    """
+@app.route('/api/crawler/status')
+def get_crawler_status():
+    """当前（或最近一次）爬取任务的状态，来自crawl_jobs表，多个Web进程看到的状态一致"""
+    db = None
     try:
-        # 创建自定义设置
-        settings = get_project_settings()
-        settings.set('LOG_ENABLED', True)
-        settings.set('LOG_LEVEL', 'INFO')
-        
-        # 初始化爬虫进程
-        process = CrawlerProcess(settings)
-        
-        # 根据类型选择要运行的爬虫
-        if spider_type == 'warframes':
-            process.crawl(WarframeSpider)
-            print(f'正在运行Warframe爬虫...')
-        elif spider_type == 'weapons':
-            process.crawl(WeaponSpider)
-            print(f'正在运行Weapon爬虫...')
-        elif spider_type == 'mods':
-            process.crawl(ModSpider)
-            print(f'正在运行Mod爬虫...')
-        else:
-            # 运行所有爬虫
-            print(f'正在运行所有爬虫...')
-            process.crawl(WarframeSpider)
-            process.crawl(WeaponSpider)
-            process.crawl(ModSpider)
-        
-        # 启动爬虫进程
-        process.start(stop_after_crawl=True)
-        
+        db = get_db()
+        return jsonify(current_status(db))
     except Exception as e:
-        print(f'爬虫进程出错: {str(e)}')
+        app.logger.error(f"获取爬虫状态失败: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)})
+    finally:
+        if db:
+            db.close()
 
-def update_crawler_status(new_status):
-    """更新爬虫状态"""
-    global crawler_status
-    crawler_status.update(new_status)
+@app.route('/api/crawler/events')
+def crawler_events():
+    """以Server-Sent Events推送爬取任务的状态、进度和数据统计，代替轮询status和stats接口
 
-@app.route('/api/crawler/status')
-def get_crawler_status():
-    return jsonify(crawler_status)
+    每个连接占用一个WSGI线程，只读部署（serve.py、gunicorn同步worker）不提供，
+    由异步服务（serve.py --async）的同名接口提供；前端连接失败时改为轮询。
+    """
+    if app.config.get('READ_ONLY'):
+        return jsonify({'success': False, 'error': '事件流由异步服务提供（serve.py --async）'}), 404
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    response = Response(broadcaster.listen(last_event_id), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # 禁止反向代理缓冲事件流
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 @app.route('/api/crawler/start', methods=['POST'])
 def start_crawler():
-    global crawler_status
-    
-    if crawler_status['is_running']:
-        return jsonify({
-            'success': False,
-            'message': '爬虫任务已在运行中'
-        })
-    
+    db = None
     try:
         # 获取要爬取的数据类型
         spider_type = request.json.get('type') if request.json else None
-        
-        # 更新状态消息
-        status_message = '爬虫任务正在运行...'
-        if spider_type:
-            status_message = f'正在更新{spider_type}数据...'
-        
-        # 更新状态为运行中
-        update_crawler_status({
-            'is_running': True,
-            'message': status_message,
-            'last_run': time.strftime('%Y-%m-%d %H:%M:%S'),
-            'current_type': spider_type or 'all'
-        })
-        
-        # 创建新进程运行爬虫
-        crawler_process = multiprocessing.Process(
-            target=run_crawler_task,
-            args=(spider_type,)
-        )
-        crawler_process.start()
-        
-        # 启动监控进程状态的线程
-        def monitor_crawler():
-            while crawler_process.is_alive():
-                time.sleep(1)
-            
-            # 爬虫进程结束后更新状态
-            completion_message = '爬虫任务完成'
-            if spider_type:
-                completion_message = f'{spider_type}数据更新完成'
-            
-            update_crawler_status({
-                'is_running': False,
-                'message': completion_message,
-                'last_run': time.strftime('%Y-%m-%d %H:%M:%S'),
-                'current_type': None
+        if spider_type and spider_type not in SPIDER_CLASSES:
+            return jsonify({'success': False, 'message': f'不支持的数据类型: {spider_type}'})
+
+        db = get_db()
+        job_id = enqueue_job(db, [spider_type] if spider_type else list(SPIDER_CLASSES), source='web')
+        if job_id is None:
+            return jsonify({
+                'success': False,
+                'message': '爬虫任务已在运行中'
             })
-        
-        import threading
-        monitor_thread = threading.Thread(target=monitor_crawler)
-        monitor_thread.daemon = True
-        monitor_thread.start()
-        
+
+        # 在新进程中认领并运行任务；定时爬取服务运行时也可能由它先认领
+        multiprocessing.Process(target=run_next_job, daemon=True).start()
+
         return jsonify({
             'success': True,
-            'message': '爬虫任务已启动'
+            'message': '爬虫任务已启动',
+            'job_id': job_id
         })
-        
+
     except Exception as e:
         error_msg = f'启动爬虫失败: {str(e)}'
         app.logger.error(error_msg)
-        update_crawler_status({
-            'is_running': False,
-            'message': error_msg,
-        })
         return jsonify({
             'success': False,
             'message': error_msg
         })
+    finally:
+        if db:
+            db.close()
+
+@app.route('/api/crawler/cancel', methods=['POST'])
+def cancel_crawler():
+    """取消任务：排队中的任务立即取消，运行中的任务在下次写入进度时停止"""
+    db = None
+    try:
+        job_id = request.json.get('job_id') if request.json else None
+        db = get_db()
+        job = cancel_job(db, job_id)
+        if job is None:
+            return jsonify({'success': False, 'message': '没有正在运行的爬虫任务'})
+        return jsonify({'success': True, 'message': job['message'], 'job': job})
+    except Exception as e:
+        app.logger.error(f"取消爬虫任务失败: {str(e)}")
+        if db:
+            db.rollback()
+        return jsonify({'success': False, 'message': f'取消爬虫任务失败: {str(e)}'})
+    finally:
+        if db:
+            db.close()
+
+@app.route('/api/crawler/jobs')
+def get_crawler_jobs():
+    """最近的爬取任务记录"""
+    db = None
+    try:
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+        db = get_db()
+        return jsonify({'jobs': list_jobs(db, limit)})
+    except Exception as e:
+        app.logger.error(f"获取爬取任务记录失败: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)})
+    finally:
+        if db:
+            db.close()
 
-def run_web_interface(host, port):
+def run_web_interface(host, port, debug=False):
     """启动Web界面"""
     app.logger.setLevel(logging.INFO)
+    if READ_REPLICA_ENABLED:
+        replica.start()
     # 禁用reloader以避免Windows下的套接字问题
-    app.run(host=host, port=port, debug=True, use_reloader=False) 
\ No newline at end of file
+    app.run(host=host, port=port, debug=debug, use_reloader=False, threaded=True)